@@ -1,8 +1,31 @@
+import io
 import os
 import csv
+import json
+import gzip
+import sys
+import time
+import argparse
+import threading
+from datetime import date, datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import mysql.connector
+from mysql.connector import FieldType
+from mysql.connector.pooling import MySQLConnectionPool
 from dotenv import load_dotenv
 
+try:
+    import zstandard
+except ImportError:  # csv.zst hanya tersedia jika zstandard terpasang
+    zstandard = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # parquet hanya tersedia jika pyarrow terpasang
+    pa = pq = None
+
 
 load_dotenv()
 
@@ -13,35 +36,354 @@ DB_CONFIG = {
     "database": os.getenv('DB_DATABASE'),
 }
 
-# Connect to MySQL
-conn = mysql.connector.connect(**DB_CONFIG)
+EXPORT_FOLDER = "exports"
+BATCH_SIZE = 50_000
+PROGRESS_SECONDS = 10
+FORMATS = {"csv": ".csv", "csv.gz": ".csv.gz", "csv.zst": ".csv.zst", "parquet": ".parquet"}
+
+# --- Incremental export ---
+MANIFEST_NAME = "_manifest.json"
+# Kolom watermark per tabel; tabel lain memakai primary key integer jika ada.
+# Kolom tanggal hanya menangkap baris baru, bukan perubahan baris lama
+WATERMARK_COLUMNS = {
+    "dim_outlet": "update_at",
+    "beli_reg_sap": "posting_date",
+    "beli_retur_sap": "posting_date",
+    "beli_konsi_sap": "posting_date",
+    "im_purchases_and_return": "tanggal",
+}
+WATERMARK_TYPES = ("date", "datetime", "timestamp", "tinyint", "smallint", "mediumint", "int", "bigint")
+# Presisi maksimum DECIMAL MySQL, dipakai jika presisi kolom tidak diketahui
+MAX_DECIMAL = (65, 30)
+
+_print_lock = threading.Lock()
 
-cursor = conn.cursor()
 
-# Create export folder if not exists
-EXPORT_FOLDER = "exports"
-os.makedirs(EXPORT_FOLDER, exist_ok=True)
+def log(message: str) -> None:
+    with _print_lock:
+        print(message, flush=True)
+
+
+def create_pool(size: int) -> MySQLConnectionPool:
+    """Connection pool MySQL, satu koneksi per worker export."""
+    return MySQLConnectionPool(pool_name="export", pool_size=size, **DB_CONFIG)
+
+
+def list_tables(pool: MySQLConnectionPool) -> list:
+    conn = pool.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SHOW TABLES;")
+        tables = [table[0] for table in cursor.fetchall()]
+        cursor.close()
+    finally:
+        conn.close()
+    return tables
+
+
+# --- Output ---
+
+def _arrow_type(type_code, decimal: tuple = None):
+    """
+    Tipe kolom Parquet dari tipe kolom MySQL (cursor.description). DECIMAL tetap
+    decimal dengan presisi / skala kolom (decimal: (precision, scale)), bukan float.
+    """
+    name = FieldType.get_info(type_code)
+    if name in ("TINY", "SHORT", "INT24", "LONG", "LONGLONG", "YEAR"):
+        return pa.int64()
+    if name in ("DECIMAL", "NEWDECIMAL"):
+        precision, scale = decimal or MAX_DECIMAL
+        return pa.decimal128(precision, scale) if precision <= 38 else pa.decimal256(precision, scale)
+    if name in ("FLOAT", "DOUBLE"):
+        return pa.float64()
+    if name == "DATE":
+        return pa.date32()
+    if name in ("DATETIME", "TIMESTAMP"):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def _arrow_value(value, arrow_type):
+    if value is None:
+        return None
+    if arrow_type == pa.string() and not isinstance(value, str):
+        return value.decode("utf-8", errors="replace") if isinstance(value, (bytes, bytearray)) else str(value)
+    return value
+
+
+class CsvSink:
+    """CSV biasa / gzip / zstd, ditulis per batch."""
+
+    def __init__(self, path: str, description, fmt: str):
+        if fmt == "csv.gz":
+            self._file = gzip.open(path, "wt", newline="", encoding="utf-8", compresslevel=6)
+        elif fmt == "csv.zst":
+            if zstandard is None:
+                raise ImportError("zstandard dibutuhkan untuk format csv.zst")
+            compressed = zstandard.ZstdCompressor(level=3).stream_writer(open(path, "wb"), closefd=True)
+            self._file = io.TextIOWrapper(compressed, encoding="utf-8", newline="")
+        else:
+            self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([desc[0] for desc in description])
+
+    def write(self, rows) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetSink:
+    """Parquet zstd dengan schema dari tipe kolom MySQL, satu row group per batch."""
+
+    def __init__(self, path: str, description, decimals: dict = None):
+        if pq is None:
+            raise ImportError("pyarrow dibutuhkan untuk format parquet")
+        self._names = [desc[0] for desc in description]
+        self._types = [_arrow_type(desc[1], (decimals or {}).get(desc[0])) for desc in description]
+        self.schema = pa.schema(list(zip(self._names, self._types)))
+        self._writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, rows) -> None:
+        columns = [
+            pa.array([_arrow_value(row[i], arrow_type) for row in rows], type=arrow_type)
+            for i, arrow_type in enumerate(self._types)
+        ]
+        self._writer.write_table(pa.Table.from_arrays(columns, schema=self.schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def open_sink(path: str, description, fmt: str, decimals: dict = None):
+    return ParquetSink(path, description, decimals) if fmt == "parquet" else CsvSink(path, description, fmt)
+
+
+# --- Export ---
+
+def export_query(pool: MySQLConnectionPool, label: str, query: str, path: str, fmt: str, params=(), batch_size: int = BATCH_SIZE,
+                 track_column: str = None, decimals: dict = None) -> dict:
+    """
+    Jalankan query dengan cursor unbuffered dan tulis hasilnya per batch (fetchmany)
+    ke path, sehingga tabel sebesar apa pun tidak pernah dimuat utuh ke memory.
+    File ditulis ke path sementara lalu di-rename setelah selesai.
+    track_column: kolom yang nilai min / max-nya ikut dicatat (untuk watermark).
+    decimals: {kolom: (precision, scale)} kolom DECIMAL, lihat table_columns.
+    """
+    start = last_report = time.perf_counter()
+    total_rows = 0
+    low = high = None
+    schema = None
+    tmp_path = f"{path}.tmp"
+    conn = pool.get_connection()
+    try:
+        cursor = conn.cursor(buffered=False)
+        cursor.execute(query, params)
+        schema = [{"name": desc[0], "type": FieldType.get_info(desc[1])} for desc in cursor.description]
+        track_idx = [desc[0] for desc in cursor.description].index(track_column) if track_column else None
+        sink = open_sink(tmp_path, cursor.description, fmt, decimals)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                sink.write(rows)
+                total_rows += len(rows)
+                if track_idx is not None:
+                    values = [row[track_idx] for row in rows if row[track_idx] is not None]
+                    if values:
+                        low = min(values) if low is None else min(low, min(values))
+                        high = max(values) if high is None else max(high, max(values))
+
+                now = time.perf_counter()
+                if now - last_report >= PROGRESS_SECONDS:
+                    last_report = now
+                    log(f"   {label}: {total_rows:,} rows ({total_rows / (now - start):,.0f} rows/s)")
+        finally:
+            sink.close()
+            cursor.close()
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+    elapsed = time.perf_counter() - start
+    return {"rows": total_rows, "seconds": round(elapsed, 2), "bytes": os.path.getsize(path), "schema": schema, "min": low, "max": high}
+
+
+def export_table(pool: MySQLConnectionPool, table: str, output_dir: str, fmt: str, batch_size: int = BATCH_SIZE) -> dict:
+    """Export penuh satu tabel ke {output_dir}/{table}{ext}."""
+    log(f"📤 Exporting table: {table}")
+    path = os.path.join(output_dir, f"{table}{FORMATS[fmt]}")
+    decimals = decimal_columns(table_columns(pool, table)) if fmt == "parquet" else None
+    stats = export_query(pool, table, f"SELECT * FROM `{table}`", path, fmt, batch_size=batch_size, decimals=decimals)
+    log(
+        f"✅ {os.path.basename(path)} saved: {stats['rows']:,} rows in {stats['seconds']}s "
+        f"({stats['rows'] / max(stats['seconds'], 1e-9):,.0f} rows/s, {stats['bytes'] / 2**20:,.1f} MB)"
+    )
+    return stats
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def read_manifest(dataset_dir: str) -> dict:
+    path = os.path.join(dataset_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def write_manifest(dataset_dir: str, manifest: dict) -> None:
+    path = os.path.join(dataset_dir, MANIFEST_NAME)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def table_columns(pool: MySQLConnectionPool, table: str) -> list:
+    """(nama, tipe, key, precision, scale) kolom tabel dari information_schema."""
+    conn = pool.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT COLUMN_NAME, DATA_TYPE, COLUMN_KEY, NUMERIC_PRECISION, NUMERIC_SCALE FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s ORDER BY ORDINAL_POSITION",
+            (table,),
+        )
+        columns = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+    return columns
+
+
+def decimal_columns(columns: list) -> dict:
+    """{kolom: (precision, scale)} untuk kolom DECIMAL (cursor.description tidak memuat presisi)."""
+    return {name: (int(precision), int(scale)) for name, data_type, _, precision, scale in columns
+            if data_type.lower() == "decimal" and precision is not None}
+
+
+def resolve_watermark(columns: list, table: str, override: str = None):
+    """
+    (kolom watermark, primary key) untuk tabel dari table_columns. Kolom watermark
+    hanya dipakai jika bertipe tanggal / integer (tanggal yang disimpan sebagai
+    teks tidak bisa dibandingkan dengan benar); jika tidak ada, watermark None dan
+    tabel diexport penuh sebagai snapshot.
+    """
+    types = {name: data_type.lower() for name, data_type, *_ in columns}
+    primary_key = [name for name, _, key, *_ in columns if key == "PRI"]
+    for candidate in (override or WATERMARK_COLUMNS.get(table), primary_key[0] if len(primary_key) == 1 else None):
+        if candidate and types.get(candidate) in WATERMARK_TYPES:
+            return candidate, primary_key
+        if candidate:
+            log(f"   {table}: kolom {candidate} tidak bisa dipakai sebagai watermark ({types.get(candidate)})")
+    return None, primary_key
+
+
+def export_incremental(pool: MySQLConnectionPool, table: str, output_dir: str, fmt: str, batch_size: int = BATCH_SIZE,
+                       watermark_column: str = None) -> dict:
+    """
+    Export hanya baris baru / berubah sejak watermark terakhir sebagai partisi
+    baru di {output_dir}/{table}/, lalu perbarui _manifest.json.
+
+    Perbandingan watermark inklusif (>=) supaya baris yang masuk belakangan dengan
+    nilai watermark yang sama tidak terlewat; partisi baru mengulang semua baris di
+    nilai batas itu dan pembaca dataset (validation.exports) mengganti baris batas
+    di partisi lama, lalu menyimpan versi terbaru per primary key jika ada.
+    Watermark tanggal (tanggal, posting_date) tidak menangkap baris yang diubah
+    setelah tanggalnya terlewati; jalankan export penuh untuk memperbaruinya.
+    Tabel tanpa watermark diexport penuh dan menggantikan partisi sebelumnya.
+    """
+    dataset_dir = os.path.join(output_dir, table)
+    os.makedirs(dataset_dir, exist_ok=True)
+    columns = table_columns(pool, table)
+    column, primary_key = resolve_watermark(columns, table, watermark_column)
+    manifest = read_manifest(dataset_dir)
+    if manifest is None or manifest["format"] != fmt or manifest["watermark_column"] != column:
+        manifest = {"table": table, "format": fmt, "watermark_column": column, "key_columns": primary_key,
+                    "watermark": None, "schema": None, "partitions": []}
+
+    query, params = f"SELECT * FROM `{table}`", ()
+    if column and manifest["watermark"] is not None:
+        query, params = f"{query} WHERE `{column}` >= %s", (manifest["watermark"],)
+
+    sequence = len(manifest["partitions"]) if column else 0
+    created_at = datetime.now()
+    file_name = f"part-{sequence:05d}-{created_at:%Y%m%d%H%M%S}{FORMATS[fmt]}"
+    log(f"📤 Exporting table: {table} ({'watermark ' + column + ' >= ' + str(manifest['watermark']) if params else 'penuh'})")
+    stats = export_query(pool, table, query, os.path.join(dataset_dir, file_name), fmt, params, batch_size, track_column=column,
+                         decimals=decimal_columns(columns) if fmt == "parquet" else None)
+
+    if stats["rows"] == 0 and column:
+        os.remove(os.path.join(dataset_dir, file_name))
+        log(f"✅ {table}: tidak ada baris baru")
+        return stats
+
+    partition = {"file": file_name, "rows": stats["rows"], "bytes": stats["bytes"], "created_at": created_at.isoformat(timespec="seconds"),
+                 "watermark_from": _json_value(stats["min"]), "watermark_to": _json_value(stats["max"])}
+    if column:
+        manifest["partitions"].append(partition)
+        if stats["max"] is not None:
+            manifest["watermark"] = _json_value(stats["max"])
+    else:
+        stale = [p["file"] for p in manifest["partitions"] if p["file"] != file_name]
+        manifest["partitions"] = [partition]
+    manifest["schema"] = stats["schema"]
+    manifest["updated_at"] = partition["created_at"]
+    write_manifest(dataset_dir, manifest)
+    if not column:
+        for old in stale:
+            if os.path.exists(os.path.join(dataset_dir, old)):
+                os.remove(os.path.join(dataset_dir, old))
+
+    log(f"✅ {table}/{file_name} saved: {stats['rows']:,} rows in {stats['seconds']}s, watermark {manifest['watermark']}")
+    return stats
+
 
-# Get list of all tables
-cursor.execute("SHOW TABLES;")
-tables = [table[0] for table in cursor.fetchall()]
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Export tabel MySQL ke CSV / Parquet secara streaming dan paralel.")
+    parser.add_argument("tables", nargs="*", help="Tabel yang diexport (default: semua tabel)")
+    parser.add_argument("--format", default="csv", choices=list(FORMATS))
+    parser.add_argument("--output-dir", default=EXPORT_FOLDER)
+    parser.add_argument("--workers", type=int, default=4, help="Jumlah tabel yang diexport bersamaan")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--incremental", action="store_true", help="Hanya export baris baru sejak watermark terakhir, sebagai partisi")
+    parser.add_argument("--watermark", action="append", metavar="TABEL=KOLOM", help="Kolom watermark per tabel, bisa diulang")
+    args = parser.parse_args(argv)
+    watermarks = dict(item.split("=", 1) for item in args.watermark or [])
 
-# Export each table
-for table in tables:
-    print(f"📤 Exporting table: {table}")
+    os.makedirs(args.output_dir, exist_ok=True)
+    pool = create_pool(max(args.workers, 1))
+    tables = args.tables or list_tables(pool)
 
-    cursor.execute(f"SELECT * FROM `{table}`")
-    rows = cursor.fetchall()
-    column_names = [desc[0] for desc in cursor.description]
+    start = time.perf_counter()
+    total_rows, failed = 0, []
+    with ThreadPoolExecutor(max_workers=max(args.workers, 1)) as executor:
+        if args.incremental:
+            futures = {
+                executor.submit(export_incremental, pool, table, args.output_dir, args.format, args.batch_size, watermarks.get(table)): table
+                for table in tables
+            }
+        else:
+            futures = {executor.submit(export_table, pool, table, args.output_dir, args.format, args.batch_size): table for table in tables}
+        for future in as_completed(futures):
+            try:
+                total_rows += future.result()["rows"]
+            except Exception as e:
+                failed.append(futures[future])
+                log(f"❌ {futures[future]}: {e}")
 
-    # Write to CSV
-    with open(f"{EXPORT_FOLDER}/{table}.csv", mode="w", newline='', encoding="utf-8") as file:
-        writer = csv.writer(file)
-        writer.writerow(column_names)
-        writer.writerows(rows)
+    elapsed = time.perf_counter() - start
+    log(f"Selesai: {len(tables) - len(failed)}/{len(tables)} tabel, {total_rows:,} rows dalam {elapsed:.1f}s ({total_rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    return 1 if failed else 0
 
-    print(f"✅ {table}.csv saved.")
 
-# Cleanup
-cursor.close()
-conn.close()
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
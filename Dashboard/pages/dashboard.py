@@ -1,11 +1,17 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import requests
 from minio import Minio
 from dotenv import load_dotenv
 import os
-import io
+from validation.engine import ID_COLUMNS, SC_GROUP_COL, classify
+from validation.filters import FilterIndex
+from validation.id_index import IdIndex, parse_ids
+from validation.result_cache import RESULT_CACHE
+from validation.session_store import SESSION_STORE
+from validation.reference import load_reference, load_reference_id_index, load_reference_index
+from validation.storage import MISSING_OBJECT_CODES, summary_object_name
+from validation import analytics, summary, webhooks
 
 st.set_page_config(page_title="Validation Dashboard", layout="wide")
 
@@ -26,22 +32,104 @@ if not st.session_state.get('logged_in'):
 
 def load_file_from_minio(file_name: str) -> pd.DataFrame:
     """
-    Load file dari MinIO dan baca menjadi DataFrame
+    Load file hasil validasi (Parquet / CSV) dari MinIO lewat cache LRU dan baca menjadi DataFrame
     """
     try:
-        BUCKET_NAME = os.getenv("BUCKET_NAME")
-        obj = minio_client.get_object(BUCKET_NAME, file_name)
-        data = obj.read()
-        obj.close()
-        # obj.release()
-
-        # Pastikan format sesuai (contoh: CSV)
-        df = pd.read_csv(io.BytesIO(data))
-        return df
+        # Cache dipakai bersama antar session, df hanya dibaca (jangan diubah in-place)
+        return RESULT_CACHE.get(minio_client, os.getenv("BUCKET_NAME"), file_name)
     except Exception as e:
         st.error(f"Gagal mengambil file dari MinIO: {e}")
         return None
 
+def open_result_view(file_name: str, id_col: str):
+    """
+    (view hasil, view perhitungan ulang) DuckDB atas file hasil di cache disk. Path file
+    dicek setiap rerun (file bisa dihapus prune / ETag baru dari session lain lalu
+    di-download ulang), kedua view dibuka ulang hanya jika path berubah sehingga cache
+    opsi filter dan rentang tanggal di view tetap terpakai. (None, None) jika duckdb tidak
+    dipakai, gagal dibuka, atau hasil lama yang belum punya kolom perhitungan ulang
+    (dilengkapi lewat pandas)
+    """
+    if not analytics.enabled():
+        return None, None
+    try:
+        path = RESULT_CACHE.local_path(minio_client, os.getenv("BUCKET_NAME"), file_name)
+    except Exception:
+        return None, None
+    cached = st.session_state.get('result_view')
+    if cached is None or cached[:2] != (file_name, path):
+        try:
+            view = analytics.open_result(path)
+            views = (view, analytics.recalc_view(view, id_col)) if view.has_column('recalculated_status') else (None, None)
+        except Exception:
+            views = (None, None)
+        cached = st.session_state['result_view'] = (file_name, path, views)
+    return cached[2]
+
+def csv_download(key: str, label: str, file_name: str, result_name: str, view, filters) -> None:
+    """
+    Tombol download CSV baris terfilter. CSV baru dibuat (COPY semua baris) saat
+    Prepare diklik, bukan di setiap rerun, dan disimpan di session selama hasil dan
+    filternya sama
+    """
+    token = (result_name, repr(filters))
+    cached = st.session_state.get(key)
+    if cached is not None and cached[0] != token:
+        # Filter berubah: CSV lama dilepas dari session
+        del st.session_state[key]
+        cached = None
+    if cached is None and st.button(f"Prepare {label}", key=f"{key}_prepare", use_container_width=True, icon=":material/description:"):
+        with st.spinner("Menyiapkan file CSV..."):
+            cached = st.session_state[key] = (token, view.to_csv(*filters))
+    if cached is not None:
+        st.download_button(label,
+            data=cached[1],
+            file_name=file_name,
+            mime='text/csv',
+            use_container_width=True,
+            type="primary",
+            icon=":material/download:"
+        )
+
+def load_summary(file_name: str, build) -> pd.DataFrame:
+    """
+    Cube ringkasan hasil dari object sidecar di MinIO. Hasil lama yang belum punya
+    sidecar dihitung sekali dengan build() dan disimpan di session
+    """
+    try:
+        return RESULT_CACHE.get(minio_client, os.getenv("BUCKET_NAME"), summary_object_name(file_name))
+    except Exception as e:
+        if getattr(e, "code", None) not in MISSING_OBJECT_CODES:
+            st.warning(f"Gagal mengambil ringkasan dari MinIO, ringkasan dihitung dari hasil: {e}")
+        cached = st.session_state.get('summary')
+        if cached is None or cached[0] != file_name:
+            cached = st.session_state['summary'] = (file_name, build())
+        return cached[1]
+
+def session_id_index(key: str, name: str, df: pd.DataFrame, col: str) -> IdIndex:
+    """
+    IdIndex untuk DataFrame session di SESSION_STORE, dibangun ulang hanya jika DataFrame-nya
+    berganti (token tetap sama setelah spill / reload, jadi frame tidak ditahan di session_state)
+    """
+    token = SESSION_STORE.token(st.session_state.get('session_id'), name)
+    cached = st.session_state.get(key)
+    if cached is None or cached[0] != token:
+        cached = st.session_state[key] = (token, IdIndex(df, col))
+    return cached[1]
+
+def session_filter_index(key, df: pd.DataFrame, categorical_cols) -> FilterIndex:
+    """
+    FilterIndex per session untuk hasil yang sedang dibuka, dibangun ulang jika hasilnya berganti
+    """
+    source = st.session_state.get('minio_path')
+    cache = st.session_state.get('filter_index')
+    if cache is None or cache.get('source') != source:
+        cache = st.session_state['filter_index'] = {'source': source}
+    index = cache.get(key)
+    if index is None or index.n_rows != len(df):
+        index = cache[key] = FilterIndex(df, categorical_cols, 'date')
+    return index
+
 # Check for all required dataframes
 # required_keys = ['result_df', 'val_df', 'role']
 # if not all(key in st.session_state for key in required_keys):
@@ -53,26 +141,55 @@ def load_file_from_minio(file_name: str) -> pd.DataFrame:
 
 # --- Load Data From Session ---
 
-val_df = pd.read_csv('./im_purchases_and_return.csv')
+val_df = load_reference()
 user = st.session_state.get('user')
 role = st.session_state.get('role')
-sc_df = st.session_state.get('sc_df')
-sap_df = st.session_state.get('sap_df')
+sc_df = SESSION_STORE.get(st.session_state.get('session_id'), 'sc_df')
+sap_df = SESSION_STORE.get(st.session_state.get('session_id'), 'sap_df')
 minio_load = st.session_state.get('minio_path')
 file_name = st.session_state.get('file_name')
-df = load_file_from_minio(minio_load)
-
-# Ambil file dari MinIO
-
-df['date'] = pd.to_datetime(df['date'])
-if df is None:
-    st.stop()
 
 if role == "Admin":
     role_to_process = st.session_state.get('role_to_process')
 else:
     role_to_process = role
 
+id_col, val_id_col = ID_COLUMNS[role_to_process]
+filter_cols_main = ['status', 'outlet_code', 'Discrepancy_category']
+
+# Dengan duckdb, tabel dan filter di-query langsung dari file hasil tanpa memuatnya ke memory
+result_view, result_recalc_view = open_result_view(minio_load, id_col)
+if result_view is not None:
+    main_view = result_view
+    recalc_view = result_recalc_view
+    build_summary = lambda: result_view.summary(id_col)
+else:
+    # Ambil file dari MinIO
+    df = load_file_from_minio(minio_load)
+    if df is None:
+        st.stop()
+
+    # Hasil lama belum menyimpan kategori dan perhitungan ulang, lengkapi dari referensi
+    if 'recalculated_status' not in df.columns:
+        val_total_agg = load_reference_index(val_id_col)['total'].rename('validation_raw_total')
+        df = classify(df.drop(columns=['validation_raw_total'], errors='ignore').join(val_total_agg, on=id_col), id_col)
+
+    # Perhitungan ulang dengan kolom 'total' untuk baris Discrepancy (sudah dihitung saat validasi)
+    recalc_df = df.loc[
+        (df['status'] == 'Discrepancy').to_numpy(),
+        [id_col, 'outlet_code', 'date', 'target_col_value', 'validation_raw_total', 'recalculated_difference', *analytics.RECALC_COLUMNS.values()],
+    ].rename(columns={v: k for k, v in analytics.RECALC_COLUMNS.items()})
+
+    # Index filter dibangun sekali per hasil, bukan setiap rerun
+    main_view = analytics.FrameView(df, session_filter_index(('main', minio_load), df, filter_cols_main))
+    recalc_view = analytics.FrameView(recalc_df, session_filter_index(('recalc', minio_load), recalc_df, filter_cols_main))
+    build_summary = lambda: summary.build_summary(df, id_col)
+
+# KPI, tabel bulanan dan grafik dibaca dari cube ringkasan, bukan dari df
+summary_df = load_summary(minio_load, build_summary)
+summary_totals = summary.totals(summary_df)
+total_discre = summary_totals['recalc_discrepancy_count']
+
 # --- Main Dashboad ---
 st.title("📊 Validation Dashboard")
 st.write(f":blue-background[{file_name}] :red-background[{role_to_process}]")
@@ -91,10 +208,22 @@ with st.sidebar:
     st.divider()
     st.header("Controls")
     if st.button("Logout", use_container_width=True, type="primary"):
+        SESSION_STORE.drop_session(st.session_state.get('session_id'))
         for key in list(st.session_state.keys()):
             del st.session_state[key]
         st.switch_page("pages/login.py")
         st.stop()
+    if role == "Admin":
+        cache_info = RESULT_CACHE.info()
+        st.caption(
+            f"Result cache: {cache_info['memory_hits']} memory hit, {cache_info['disk_hits']} disk hit, "
+            f"{cache_info['misses']} miss ({cache_info['memory_bytes'] / 2**20:.0f} MB)"
+        )
+        store_info = SESSION_STORE.info(st.session_state.get('session_id'))
+        st.caption(
+            f"Session store: {store_info['sessions']} session, {store_info['resident_bytes'] / 2**20:.0f} MB di memory, "
+            f"{store_info['spilled_bytes'] / 2**20:.0f} MB di disk (session ini {store_info['session_bytes'] / 2**20:.0f} MB)"
+        )
 
 
 # --- Create Tabs ---
@@ -110,49 +239,32 @@ with tab2:
         selected_status = st.multiselect("Status", options=['Matched', 'Discrepancy'], default=[])
 
     with filter_cols[1]:
-        selected_outlets = st.multiselect("Outlet Code", options=sorted(df['outlet_code'].unique()), default=[])
+        selected_outlets = st.multiselect("Outlet Code", options=main_view.options('outlet_code'), default=[])
 
     with filter_cols[2]:
-        min_date, max_date = df['date'].min().date(), df['date'].max().date()
+        min_date, max_date = main_view.date_bounds()
         selected_date_range = st.date_input("Date Range", value=(), min_value=min_date, max_value=max_date)
-    
-    bins = [0, 2001, 10001, 100001, float('inf')]
-    labels = ["Rounding (< 2k)", "Small (2k-10k)", "Medium (10k-100k)", "Big (> 100k)"]
-    discrepancy_mask = df['status'] == 'Discrepancy'
-    df['Discrepancy_category'] = pd.cut(abs(df.loc[discrepancy_mask, 'difference']), bins=bins, labels=labels, right=False)
-    
-    if pd.api.types.is_categorical_dtype(df['Discrepancy_category']):
-        df['Discrepancy_category'] = df['Discrepancy_category'].cat.add_categories('Valid').fillna('Valid')
-    else:
-        df['Discrepancy_category'] = df['Discrepancy_category'].fillna('Valid')
-    
-    # Update status jika kategori adalah Rounding (< 2k)
-    rounding_mask = df['Discrepancy_category'] == "Rounding (< 2k)"
-    df.loc[rounding_mask, 'status'] = "Matched"
         
     with filter_cols[3]:
-        selected_discrepancy = st.multiselect("Discrepancy Category", options=sorted(df['Discrepancy_category'].unique()), default=[])
+        selected_discrepancy = st.multiselect("Discrepancy Category", options=main_view.options('Discrepancy_category'), default=[])
 
     # Apply filters to create a view
-    filtered_df = df.copy()
-    if selected_status:
-        filtered_df = filtered_df[filtered_df['status'].isin(selected_status)]
-    if selected_outlets:
-        filtered_df = filtered_df[filtered_df['outlet_code'].isin(selected_outlets)]
-    if len(selected_date_range) == 2:
-        start_date, end_date = pd.to_datetime(selected_date_range[0]), pd.to_datetime(selected_date_range[1])
-        filtered_df = filtered_df[(filtered_df['date'] >= start_date) & (filtered_df['date'] <= end_date)]
-    if selected_discrepancy:
-        filtered_df = filtered_df[filtered_df['Discrepancy_category'].isin(selected_discrepancy)]
-
-    discrepancy_total = (df['status'] == 'Discrepancy').sum()
-    st.info(f"**{discrepancy_total}** data yang tidak sesuai dari **{len(df)}** data berdasarkan perhitungan kolom 'dpp'.")
+    main_filters = (
+        {'status': selected_status, 'outlet_code': selected_outlets, 'Discrepancy_category': selected_discrepancy},
+        selected_date_range if len(selected_date_range) == 2 else None,
+    )
+
+    discrepancy_total = summary_totals['discrepancy_count']
+    st.info(f"**{discrepancy_total}** data yang tidak sesuai dari **{summary_totals['total_count']}** data berdasarkan perhitungan kolom 'dpp'.")
 
     # Define and display the main results table
-    id_col = 'transaction_code' if role_to_process == 'Supply Chain' else 'document_id'
     display_order = [id_col, 'outlet_code', 'date', 'target_col_value', 'validation_total', 'difference', 'status', 'Discrepancy_category']
 
-    st.dataframe(filtered_df[display_order], use_container_width=True, column_config={
+    # Yang dikirim ke browser dibatasi DISPLAY_ROWS baris, download tetap berisi semua baris terfilter
+    filtered_count = main_view.count(*main_filters)
+    if filtered_count > analytics.DISPLAY_ROWS:
+        st.caption(f"Menampilkan {analytics.DISPLAY_ROWS:,} dari {filtered_count:,} baris, gunakan Download Data untuk semua baris.")
+    st.dataframe(main_view.select(*main_filters, display_order, limit=analytics.DISPLAY_ROWS), use_container_width=True, column_config={
         'target_col_value': st.column_config.NumberColumn(format="localized"),
         'validation_total': st.column_config.NumberColumn(format="localized"),
         'difference': st.column_config.NumberColumn(format="localized"),
@@ -160,14 +272,7 @@ with tab2:
 
     with head2:
         st.markdown(" ")
-        st.download_button("Download Data", 
-            data=filtered_df.to_csv(index=False).encode('utf-8'), 
-            file_name='validation_results.csv', 
-            mime='text/csv',
-            use_container_width=True,
-            type="primary",
-            icon=":material/download:"
-        )
+        csv_download('main_csv', "Download Data", 'validation_results.csv', minio_load, main_view, main_filters)
     
     # --- MODIFICATION: Discrepancy Analysis Table (Recalculated) ---
     st.divider()
@@ -175,28 +280,7 @@ with tab2:
     body1.header("Perhitungan ulang dengan kolom 'Total'")
 
     if 'total' in val_df.columns:
-        discrepancy_records = df[df['status'] == 'Discrepancy'].copy()
-
-        if not discrepancy_records.empty:
-
-            # Aggregate the 'total' column from the raw validation file
-            if role_to_process == 'Supply Chain':
-                val_total_agg = val_df.groupby('no_transaksi')['total'].sum().reset_index()
-                recalc_df = pd.merge(discrepancy_records, val_total_agg, left_on='transaction_code', right_on='no_transaksi', how='left')
-            else:  # Accountant role
-                val_total_agg = val_df.groupby('document_id')['total'].sum().reset_index()
-                recalc_df = pd.merge(discrepancy_records, val_total_agg, on='document_id', how='left')
-
-            # Calculate absolute difference
-            recalc_df['recalculated_difference'] = (recalc_df['target_col_value'] - recalc_df['total'].fillna(0)).abs()
-
-            # Set status based on recalculated difference
-            recalc_df['status'] = recalc_df['recalculated_difference'].apply(lambda x: 'Discrepancy' if x >= 10 else 'Matched')
-
-            # Define display columns
-            id_col = 'transaction_code' if role_to_process == 'Supply Chain' else 'document_id'
-            recalc_display_order = [id_col, 'outlet_code', 'date', 'target_col_value', 'total', 'recalculated_difference', 'status']
-
+        if recalc_view.count() > 0:
             # --- FILTERS ---
             filter_cols = st.columns(4)
 
@@ -204,71 +288,35 @@ with tab2:
                 selected_status = st.multiselect("Status", options=['Matched', 'Discrepancy'], default=[], key="recalc_status_filter")
 
             with filter_cols[1]:
-                selected_outlets = st.multiselect("Outlet Code", options=sorted(recalc_df['outlet_code'].unique()), default=[], key="recalc_outlet_filter")
+                selected_outlets = st.multiselect("Outlet Code", options=recalc_view.options('outlet_code'), default=[], key="recalc_outlet_filter")
 
             with filter_cols[2]:
-                min_date, max_date = recalc_df['date'].min().date(), recalc_df['date'].max().date()
+                min_date, max_date = recalc_view.date_bounds()
                 selected_date_range = st.date_input("Date Range", value=(), min_value=min_date, max_value=max_date, key="recalc_date_filter")
 
-            # Discrepancy Category based on recalculated_difference
-            bins = [0, 2001, 10001, 100001, float('inf')]
-            labels = ["Rounding (< 2k)", "Small (2k-10k)", "Medium (10k-100k)", "Big (> 100k)"]
-            # Hitung Discrepancy_category
-            recalc_df['Discrepancy_category'] = pd.cut(
-                recalc_df['recalculated_difference'],
-                bins=bins,
-                labels=labels,
-                right=False
-            )
-
-            # Tambahkan kategori 'Missing'
-            if pd.api.types.is_categorical_dtype(recalc_df['Discrepancy_category']):
-                recalc_df['Discrepancy_category'] = recalc_df['Discrepancy_category'].cat.add_categories(['Valid', 'Missing'])
-            else:
-                recalc_df['Discrepancy_category'] = recalc_df['Discrepancy_category'].fillna('Valid')
-
-            # Assign 'Valid' untuk nilai recalculated_difference == 0
-            recalc_df.loc[recalc_df['recalculated_difference'] == 0, 'Discrepancy_category'] = 'Valid'
-
-            # Assign 'Missing' jika ada nilai NaN di baris mana pun
-            recalc_df.loc[recalc_df.isnull().any(axis=1), 'Discrepancy_category'] = 'Missing'
-
             with filter_cols[3]:
-                selected_discrepancy = st.multiselect("Discrepancy Category", options=sorted(recalc_df['Discrepancy_category'].unique()), default=[], key="recalc_discrepancy_cat")
+                selected_discrepancy = st.multiselect("Discrepancy Category", options=recalc_view.options('Discrepancy_category'), default=[], key="recalc_discrepancy_cat")
 
             # Apply filters
-            filtered_recalc_df = recalc_df.copy()
-            if selected_status:
-                filtered_recalc_df = filtered_recalc_df[filtered_recalc_df['status'].isin(selected_status)]
-            if selected_outlets:
-                filtered_recalc_df = filtered_recalc_df[filtered_recalc_df['outlet_code'].isin(selected_outlets)]
-            if len(selected_date_range) == 2:
-                start_date, end_date = pd.to_datetime(selected_date_range[0]), pd.to_datetime(selected_date_range[1])
-                filtered_recalc_df = filtered_recalc_df[(filtered_recalc_df['date'] >= start_date) & (filtered_recalc_df['date'] <= end_date)]
-            if selected_discrepancy:
-                filtered_recalc_df = filtered_recalc_df[filtered_recalc_df['Discrepancy_category'].isin(selected_discrepancy)]
+            recalc_filters = (
+                {'status': selected_status, 'outlet_code': selected_outlets, 'Discrepancy_category': selected_discrepancy},
+                selected_date_range if len(selected_date_range) == 2 else None,
+            )
 
             # Display filtered table
-            total_discre = (recalc_df['status'] == 'Discrepancy').sum()
             st.info(f"**{total_discre}** data tidak sesuai setelah menghitung ulang dengan kolom 'Total'.")
 
-            st.dataframe(filtered_recalc_df[recalc_display_order + ['Discrepancy_category']].rename(columns={
-                'total': 'validation_raw_total'
-            }), use_container_width=True, column_config={
+            filtered_count = recalc_view.count(*recalc_filters)
+            if filtered_count > analytics.DISPLAY_ROWS:
+                st.caption(f"Menampilkan {analytics.DISPLAY_ROWS:,} dari {filtered_count:,} baris, gunakan Download Recalculated Data untuk semua baris.")
+            st.dataframe(recalc_view.select(*recalc_filters, limit=analytics.DISPLAY_ROWS), use_container_width=True, column_config={
                 'target_col_value': st.column_config.NumberColumn(format="localized"),
                 'validation_raw_total': st.column_config.NumberColumn(format="localized"),
                 'recalculated_difference': st.column_config.NumberColumn(format="localized"),
             })
             with body2:
                 st.markdown(" ")
-                st.download_button("Download Recalculated Data", 
-                    data=filtered_recalc_df.to_csv(index=False).encode('utf-8'), 
-                    file_name='recalculated_validation_results.csv', 
-                    mime='text/csv',
-                    use_container_width=True,
-                    type="primary",
-                    icon=":material/download:"
-                )
+                csv_download('recalc_csv', "Download Recalculated Data", 'recalculated_validation_results.csv', minio_load, recalc_view, recalc_filters)
         else:
             st.success("No discrepancies in the current filtered view to analyze.")
     else:
@@ -277,23 +325,32 @@ with tab2:
     # --- Drill-Down Feature ---
     st.divider()
     st.header("Search Data by ID")
-    drill_down_id = st.text_input(f"Enter a specific {id_col.replace('_', ' ')} to see its raw data:")
+    drill_down_ids = parse_ids(st.text_area(
+        f"Enter one or more {id_col.replace('_', ' ')} (separated by comma / new line) to see the raw data:",
+        height=80
+    ))
 
-    if drill_down_id:
+    if drill_down_ids:
         drill_col1, drill_col2 = st.columns(2)
         if role_to_process == 'Supply Chain' and sc_df is not None:
+            sc_index = session_id_index('sc_index', 'sc_df', sc_df, SC_GROUP_COL.get(st.session_state.get('file_type'), 'no_penerimaan'))
+            val_index = load_reference_id_index('no_transaksi')
             with drill_col1:
                 st.subheader(f"Source Data (SC)")
-                source_drill = sc_df[sc_df['no_penerimaan'].astype(str) == drill_down_id]
+                source_drill = sc_index.lookup(sc_df, drill_down_ids)
                 sum_source = source_drill['jml_neto'].sum() if not source_drill.empty else 0
                 st.write(f"Sum dari :green[Kolom Target] SC: :green-background[**{abs(sum_source):,}**]")
-                st.markdown(" ")
+                not_found = sc_index.missing(drill_down_ids)
+                if not_found:
+                    st.caption(f"Tidak ditemukan di SC: {', '.join(not_found[:20])}{' ...' if len(not_found) > 20 else ''}")
+                else:
+                    st.markdown(" ")
                 st.markdown(" ")
                 st.markdown(" ")
                 st.dataframe(source_drill)
             with drill_col2:
                 st.subheader(f"Validation Data (VAL)")
-                val_drill = val_df[val_df['no_transaksi'].astype(str) == drill_down_id]
+                val_drill = val_index.lookup(val_df, drill_down_ids)
                 # Bug Fix: Sum 'total' as it's the reliably available column
                 sum_val_tot = val_drill['total'].sum() if not val_drill.empty else 0
                 sum_val_dpp = val_drill['dpp'].sum() if 'dpp' in val_drill.columns else 0
@@ -302,15 +359,20 @@ with tab2:
                 st.write(f"Sum kolom :blue[dpp] dari data Validation: :blue-background[**{sum_val_dpp:,}**]")
                 st.dataframe(val_drill)
         elif role_to_process == 'Accountant' and sap_df is not None:
+            sap_index = session_id_index('sap_index', 'sap_df', sap_df, 'doc_id')
+            val_index = load_reference_id_index('document_id')
             with drill_col1:
                 st.subheader(f"Source Data (SAP)")
-                source_drill = sap_df[sap_df['doc_id'].astype(str) == drill_down_id]
+                source_drill = sap_index.lookup(sap_df, drill_down_ids)
                 sum_source = source_drill['kredit'].sum() if not source_drill.empty else 0
                 st.write(f"Sum dari :green[Kolom Target] SC: :green-background[**{abs(sum_source):,}**]")
+                not_found = sap_index.missing(drill_down_ids)
+                if not_found:
+                    st.caption(f"Tidak ditemukan di SAP: {', '.join(not_found[:20])}{' ...' if len(not_found) > 20 else ''}")
                 st.dataframe(source_drill)
             with drill_col2:
                 st.subheader(f"Validation Data (VAL)")
-                val_drill = val_df[val_df['document_id'].astype(str) == drill_down_id]
+                val_drill = val_index.lookup(val_df, drill_down_ids)
                 # Bug Fix: Sum 'total' as it's the reliably available column
                 sum_val_tot = val_drill['total'].sum() if not val_drill.empty else 0
                 sum_val_dpp = val_drill['dpp'].sum() if 'dpp' in val_drill.columns else 0
@@ -322,14 +384,13 @@ with tab2:
 # --- Tab 1: Dashboard Insights ---
 with tab1:
     st.header("File Validation Summary")
-    total_count = len(df)
+    total_count = summary_totals['total_count']
     matched_count = total_count - total_discre
     validation_pct = (matched_count / total_count * 100) if total_count > 0 else 0
-    discrepancy_insights_df = recalc_df[recalc_df['status'] == 'Discrepancy'].copy()
     
     bigc1, bigc2 = st.columns(2)
     with bigc1:
-        if discrepancy_insights_df.empty:
+        if total_discre == 0:
             val_status = "Valid"
             st.markdown(
                 """
@@ -379,23 +440,19 @@ with tab1:
     st.divider()
 
     # --- Discrepancy Category Insights ---
-    if discrepancy_insights_df.empty:
+    if total_discre == 0:
         st.success("🎉 No discrepancies found in the entire dataset!")
     else:
         # --- SELECT BOX UNTUK MEMILIH INSIGHT ---
         section = st.selectbox("Select Section", options=["Insights", "Discrepancy Category"], index=0)
         # --- SELECT BOX JIKA DISCREPANCY CATEGORY ---
         if section == "Discrepancy Category":
-                category_counts = discrepancy_insights_df['Discrepancy_category'].value_counts().reset_index()
-                category_counts = category_counts[category_counts['Discrepancy_category'] != 'Valid']
+                category_counts = summary.category_counts(summary_df)
 
                 st.subheader("📌 Jumlah per Kategori Discrepancy")
-                metric_cols = st.columns(len(category_counts))
 
                 # --- Jumlah Discrepancy per Kategori ---
-                total_rounding_df = (df['Discrepancy_category'] == "Rounding (< 2k)").sum()
-                total_rounding_recalc = (recalc_df['Discrepancy_category'] == "Rounding (< 2k)").sum()
-                total_rounding_all = total_rounding_df + total_rounding_recalc
+                total_rounding_all = summary.rounding_count(summary_df)
 
                 all_categories = ["Rounding (< 2k)", "Small (2k-10k)", "Medium (10k-100k)", "Big (> 100k)", "Missing"]
                 category_dict = dict(zip(category_counts['Discrepancy_category'], category_counts['count']))
@@ -456,14 +513,8 @@ with tab1:
         if section == "Insights":
             tabcol = st.columns(2)
             with tabcol[0]:
-                df['month'] = df['date'].dt.to_period('M')
-                monthly_report = (df.groupby('month')
-                                .agg({
-                                    'target_col_value': 'sum',
-                                    'validation_total': 'sum'
-                                }).reset_index())
-                monthly_report['selisih'] = monthly_report['target_col_value'] - monthly_report['validation_total']
-                monthly_report['month'] = monthly_report['month'].dt.to_timestamp().dt.strftime('%B %Y')
+                monthly_report = summary.monthly_report(summary_df)
+                monthly_report['month'] = monthly_report['month'].dt.strftime('%B %Y')
                 # Buat row total
                 total_row = pd.DataFrame({
                     'month': ['Total'],
@@ -487,20 +538,19 @@ with tab1:
                 'selisih': st.column_config.NumberColumn(format="localized"),
                 })
             
-            outlet_prob = discrepancy_insights_df['outlet_code'].value_counts().idxmax()
-            top_outlet_count = discrepancy_insights_df['outlet_code'].value_counts().max()
-            all_target = df['target_col_value'].sum()
-            all_val = df['validation_total'].sum()
+            outlet_prob, top_outlet_count = summary.top_outlet(summary_df)
+            all_target = summary_totals['target_total']
+            all_val = summary_totals['validation_total']
             selisih_all = abs(all_target - all_val)
             
             # --- Hitung Unique Code Berdasarkan Role ---
             if role_to_process == "Supply Chain":
-                unique_id = df['transaction_code'].nunique()
-                unique_val = val_df['no_transaksi'].nunique()
+                unique_id = summary_totals['unique_ids']
+                unique_val = len(load_reference_index('no_transaksi'))
                 unique_label = "Unique Kode Transaksi"
             elif role_to_process == "Accountant":
-                unique_id = df['document_id'].nunique()
-                unique_val = val_df['document_id'].nunique()
+                unique_id = summary_totals['unique_ids']
+                unique_val = len(load_reference_index('document_id'))
                 unique_label = "Unique Document ID"
 
             
@@ -538,12 +588,21 @@ if not st.session_state.data_sent:
         "file_name": file_name
     }
 
+    # Dikirim di latar belakang supaya render dashboard tidak menunggu n8n
+    st.session_state['insert_process'] = webhooks.post_in_background("insert-process", payload)
+    st.session_state.data_sent = True  # Set flag agar tidak mengirim lagi
+
+# Hasil pengiriman ditampilkan pada rerun setelah request selesai
+insert_process = st.session_state.get('insert_process')
+if insert_process is not None and insert_process.done():
+    del st.session_state['insert_process']
     try:
-        response = requests.post("http://localhost:5678/webhook/insert-process", json=payload)
+        response = insert_process.result()
         if response.status_code == 200:
             st.toast("Data berhasil dikirim ke Database.")
-            st.session_state.data_sent = True  # Set flag agar tidak mengirim lagi
         else:
+            st.session_state.data_sent = False  # Kirim ulang pada rerun berikutnya
             st.warning(f"Gagal kirim data. Status code: {response.status_code}")
     except Exception as e:
+        st.session_state.data_sent = False
         st.error(f"Error saat mengirim data ke API: {e}")
@@ -1,21 +1,19 @@
 import streamlit as st
 import requests
+from validation import webhooks
 from streamlit.errors import StreamlitAPIException
 
 def login_user(username, password):
     """
     Sends credentials to the n8n backend API and returns the response.
     """
-    # IMPORTANT: Replace this with your actual n8n webhook URL
-    api_url = "http://localhost:5678/webhook/login"
-    
     payload = {
         "username": username,
         "password": password
     }
     
     try:
-        response = requests.post(api_url, json=payload, timeout=5)
+        response = webhooks.post("login", payload)
         response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
         return response.json()
     except requests.exceptions.RequestException as e:
@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
 import requests
-from streamlit_extras.add_vertical_space import add_vertical_space
+from validation import process_log
+from validation.session_store import SESSION_STORE
 
 st.set_page_config(page_title="Process Log", layout="wide", initial_sidebar_state="expanded")
 role = st.session_state.get('role')
@@ -26,6 +27,7 @@ with st.sidebar:
     st.divider()
     st.header("Controls")
     if st.button("Logout", use_container_width=True, type="primary"):
+        SESSION_STORE.drop_session(st.session_state.get('session_id'))
         for key in list(st.session_state.keys()):
             del st.session_state[key]
         st.switch_page("pages/login.py")
@@ -38,87 +40,98 @@ if not st.session_state.get('logged_in'):
 
 st.title("🗂️ Log Proses Validasi")
 
-# --- Inisialisasi kolom tabel ---
-expected_columns = ['user', 'file_type', 'role', 'uploaded_at', 'val_score', 'val_status']
-df = pd.DataFrame(columns=expected_columns)
+ROLE_OPTIONS = ["Semua Role", "Supply Chain", "Accountant", "Admin"]
 
-# --- Ambil data dari Supabase via REST API ---
-try:
-    response = requests.get("http://localhost:5678/webhook/get-process")
-    if response.status_code == 200:
-        process_data = response.json()
-        if process_data:
-            df = pd.DataFrame(process_data)
-            df['uploaded_at'] = pd.to_datetime(df['uploaded_at'], errors='coerce') if 'uploaded_at' in df.columns else pd.Timestamp.now()
-            # 🔹 Filter berdasarkan role
-            if role != "Admin":  
-                df = df[df['role'] == role]
-    else:
-        st.warning(f"Gagal mengambil data. Status code: {response.status_code}")
-except Exception as e:
-    st.error(f"Database Kosong")
+def load_first_page(filters: tuple) -> dict:
+    """
+    Halaman pertama log untuk kombinasi filter (role, date_from, date_to)
+    """
+    df, cursor = process_log.fetch_page(*filters)
+    return {
+        'filters': filters,
+        'df': df,
+        'cursor': cursor,
+        'newest': process_log.make_cursor(df.iloc[0]) if not df.empty else None,
+    }
 
 # --- UI Section ---
 col1, col2, col3 = st.columns([7, 1, 1])
 col1.markdown("### Riwayat Validasi Dokumen")
-with col2:
-    if st.button("Refresh", use_container_width=True, type="secondary"):
-        st.rerun()
+refresh = col2.button("Refresh", use_container_width=True, type="secondary")
 with col3:
     if st.button("Add Process", type="primary"):
         st.session_state['selected_log'] = None
         st.session_state.data_sent = False
         st.switch_page("pages/retur.py")
 
-# --- Table Header ---
-with st.container(border=True):
-    header_cols = st.columns([1.5, 1.5, 2, 1.5, 2, 2, 2.2, 1.5])
-    header_cols[0].markdown("**👤 User**")
-    header_cols[1].markdown("**🧾 File Type**")
-    header_cols[2].markdown("**🔰 File Name**")
-    header_cols[3].markdown("**🔐 Role**")
-    header_cols[4].markdown("**📅 Upload Time**")
-    header_cols[5].markdown("**📊 Validation Score**")
-    header_cols[6].markdown("**✅ Validation Status**")
-    header_cols[7].markdown("**🔍 Action**")
-    add_vertical_space(1)
+# --- Filter (dikirim ke server) ---
+filter_cols = st.columns([2, 2, 3])
+if role == "Admin":
+    selected_role = filter_cols[0].selectbox("Role", options=ROLE_OPTIONS)
+    role_filter = None if selected_role == ROLE_OPTIONS[0] else selected_role
+else:
+    role_filter = role
+selected_dates = filter_cols[1].date_input("Upload Date", value=())
+date_from, date_to = selected_dates if len(selected_dates) == 2 else (None, None)
+filters = (role_filter, date_from, date_to)
 
-    # Tambahkan CSS supaya tombol Detail sejajar ke atas
-    st.markdown("""
-        <style>
-        div[data-testid="stButton"] > button {
-            padding-top: 0.25rem;
-            padding-bottom: 0.25rem;
-            margin-top: -6px; /* geser tombol ke atas */
-        }
-        </style>
-    """, unsafe_allow_html=True)
+# --- Ambil data log per halaman, refresh hanya mengambil log yang lebih baru ---
+log_state = st.session_state.get('process_log')
+try:
+    if log_state is None or log_state['filters'] != filters or (refresh and log_state['newest'] is None):
+        log_state = st.session_state['process_log'] = load_first_page(filters)
+    elif refresh:
+        newer = process_log.fetch_newer(log_state['newest'], *filters)
+        if not newer.empty:
+            log_state['df'] = pd.concat([newer, log_state['df']], ignore_index=True).drop_duplicates(process_log.ROW_KEY)
+            log_state['newest'] = process_log.make_cursor(log_state['df'].iloc[0])
+except requests.exceptions.RequestException as e:
+    st.warning(f"Gagal mengambil data log: {e}")
 
-    # --- Table Rows ---
-    for i, row in df.iterrows():
-        row_cols = st.columns([1.5, 1.5, 2, 1.5, 2, 2, 2.2, 1.5])
-        st.markdown(" ")
-        row_cols[0].write(row.get('user', ''))
-        row_cols[1].write(row.get('file_type', ''))
-        row_cols[2].write(row.get('file_name', ''))
-        row_cols[3].write(row.get('role', ''))
+if log_state is None:
+    st.stop()
 
-        uploaded_at = row.get('uploaded_at')
-        row_cols[4].write(uploaded_at.strftime('%Y-%m-%d %H:%M:%S') if pd.notna(uploaded_at) else "N/A")
+log_df = log_state['df']
 
-        row_cols[5].write(f"{row['val_score']}%" if pd.notna(row.get('val_score')) else "N/A")
+# --- Table: satu tabel dengan pilihan baris, bukan satu baris widget per log ---
+display_df = log_df[['user', 'file_type', 'file_name', 'role', 'uploaded_at', 'val_score', 'val_status']].assign(
+    val_status=log_df['val_status'].map({'Valid': '✅ Valid', 'Invalid': '❌ Invalid'}).fillna(log_df['val_status'])
+)
+event = st.dataframe(
+    display_df,
+    hide_index=True,
+    use_container_width=True,
+    on_select="rerun",
+    selection_mode="single-row",
+    key="process_log_table",
+    column_config={
+        'user': st.column_config.TextColumn("👤 User"),
+        'file_type': st.column_config.TextColumn("🧾 File Type"),
+        'file_name': st.column_config.TextColumn("🔰 File Name"),
+        'role': st.column_config.TextColumn("🔐 Role"),
+        'uploaded_at': st.column_config.DatetimeColumn("📅 Upload Time", format="YYYY-MM-DD HH:mm:ss"),
+        'val_score': st.column_config.NumberColumn("📊 Validation Score", format="%.2f%%"),
+        'val_status': st.column_config.TextColumn("✅ Validation Status"),
+    },
+)
 
-        val_status = row.get('val_status', '')
-        if val_status == 'Valid':
-            row_cols[6].markdown(f":green-background[✅ Valid]")
-        elif val_status == 'Invalid':
-            row_cols[6].markdown(f":red-background[❌ Invalid]")
-        else:
-            row_cols[6].write(val_status)
+action_cols = st.columns([7, 1, 1])
+action_cols[0].caption(f"{len(log_df)} log ditampilkan. Pilih satu baris lalu klik Detail untuk membuka dashboard.")
+with action_cols[1]:
+    if st.button("Load More", use_container_width=True, disabled=log_state['cursor'] is None):
+        try:
+            more_df, log_state['cursor'] = process_log.fetch_page(*filters, before=log_state['cursor'])
+            log_state['df'] = pd.concat([log_df, more_df], ignore_index=True).drop_duplicates(process_log.ROW_KEY)
+            st.rerun()
+        except requests.exceptions.RequestException as e:
+            st.warning(f"Gagal mengambil data log: {e}")
 
-        # Tombol Detail
-        if row_cols[7].button("Detail", key=f"detail_{i}"):
-            st.session_state['minio_path'] = row.get('id', '')
-            st.session_state['role_to_process'] = row.get('role_to_process', '')
-            st.session_state['file_name'] = row.get('file_name', 'Unknown File')
-            st.switch_page("pages/dashboard.py")
+# Tombol Detail
+selected_rows = event.selection.rows
+with action_cols[2]:
+    if st.button("Detail", use_container_width=True, type="primary", disabled=not selected_rows):
+        row = log_df.iloc[selected_rows[0]]
+        st.session_state['minio_path'] = row.get('id', '')
+        st.session_state['role_to_process'] = row.get('role_to_process', '')
+        st.session_state['file_name'] = row.get('file_name', 'Unknown File')
+        st.switch_page("pages/dashboard.py")
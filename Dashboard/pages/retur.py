@@ -1,12 +1,14 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import time
 import os
 from minio import Minio
-from io import BytesIO
 from dotenv import load_dotenv
-import uuid
+from validation import engine, ingest, storage
+from validation.id_index import IdIndex
+from validation.session_store import SESSION_STORE, new_session_id
+from validation.reference import load_reference, load_reference_index, reference_version
+from validation.summary import build_summary
+from validation.upload_memo import UploadMemo, mapping_key
 
 
 
@@ -32,29 +34,30 @@ with st.sidebar:
         st.switch_page("pages/process.py")
     st.header("Controls")
     if st.button("Logout", use_container_width=True, type="primary"):
+        SESSION_STORE.drop_session(st.session_state.get('session_id'))
         for key in list(st.session_state.keys()): del st.session_state[key]
         st.switch_page("pages/login.py")
         st.stop()
 # --- Helper Functions ---
-def load_dataframe(uploaded_file):
+def load_dataframe(source, name, column_map, dtypes):
     try:
-        # Baca file sesuai ekstensi
-        if uploaded_file.name.endswith('.csv'):
-            return pd.read_csv(uploaded_file)
-        elif uploaded_file.name.endswith(('.xls', '.xlsx')):
-            return pd.read_excel(uploaded_file)
+        # Baca hanya kolom hasil mapping, sesuai ekstensi file
+        return ingest.read_columns(source, name, column_map, dtypes)
     except Exception as e:
         st.error(f"Error reading file: {e}")
     
     return None
 
-def map_columns(df, required_cols_map, file_type):
-    original_cols, required_keys = set(df.columns), set(required_cols_map.keys())
+def map_columns(columns, required_cols_map, file_type):
+    """
+    Kembalikan mapping {kolom file: kolom wajib}, atau None jika kolom belum lengkap
+    """
+    original_cols, required_keys = set(columns), set(required_cols_map.keys())
     missing_keys = required_keys - original_cols
     if len(missing_keys) == len(required_keys):
         st.error(f"Error: Kolom dalam dokumen anda tidak sesuai! Pastikan dokumen yang anda kirim sesuai dengan role Anda!", icon="🚨")
         return None
-    if not missing_keys: return df
+    if not missing_keys: return {key: key for key in required_keys}
     st.write("---"); st.subheader(f"Terdapat kolom yang tidak sesuai pada file {file_type}")
     st.write("Silahkan pilih kolom yang sesuai untuk melanjutkan proses validasi.")
     mappings, all_mapped = {}, True
@@ -67,7 +70,23 @@ def map_columns(df, required_cols_map, file_type):
             else: all_mapped = False
     if not all_mapped:
         st.warning("Tolong lengkapi seluruh kolom."); return None
-    return df.rename(columns=mappings)
+    return mappings
+
+def load_prepared(source, name, column_map, dtypes, role_to_process):
+    data_df = load_dataframe(source, name, column_map, dtypes)
+    return None if data_df is None else engine.prepare(data_df, role_to_process)
+
+def result_stored(object_name):
+    """
+    True jika validasi identik (file, role, jenis dokumen dan versi referensi sama) sudah
+    tersimpan di MinIO; cukup stat_object, hasilnya dibaca dashboard lewat RESULT_CACHE.
+    None jika MinIO gagal dicek (tidak disimpan di memo, dicek lagi saat rerun)
+    """
+    try:
+        return storage.result_exists(minio_client, os.getenv("BUCKET_NAME"), object_name)
+    except Exception as e:
+        st.warning(f"Gagal mengecek hasil validasi di MinIO, validasi dihitung ulang: {e}")
+        return None
 
 
 
@@ -80,6 +99,8 @@ if 'login_time' not in st.session_state:
     st.session_state['login_time'] = pd.Timestamp.now()
 
 login_time = st.session_state['login_time']
+# DataFrame session (hasil, file upload) disimpan di SESSION_STORE dengan key session_id, bukan di session_state
+session_id = st.session_state.setdefault('session_id', new_session_id())
 
 
 role = st.session_state.get('role')
@@ -117,7 +138,7 @@ with col2:
 
 # --- Load Validation File ---
 try:
-    val_df_raw = pd.read_csv("./im_purchases_and_return.csv")
+    val_df_raw = load_reference()
     VAL_FILE_LOADED = True
 except FileNotFoundError:
     st.error("Validation file not found: `im_purchases_and_return.csv` must be in the root directory."); st.stop()
@@ -159,123 +180,90 @@ else:
     role_to_process = role
 
 if data_file and VAL_FILE_LOADED:
-    data_df = load_dataframe(data_file)
+    # Hasil parse per upload disimpan per session (key: hash isi file), rerun karena klik widget tidak membaca file lagi
+    memo = st.session_state.setdefault('upload_memo', UploadMemo(store=SESSION_STORE, session_id=session_id))
+    try:
+        digest = memo.file_hash(data_file)
+        sheet = 0
+        if ingest.is_excel(data_file.name):
+            sheets = memo.get(("sheets", digest), lambda: ingest.list_sheets(data_file))
+            if len(sheets) > 1:
+                sheet = st.selectbox("Pilih sheet yang berisi data:", sheets, key="excel_sheet")
+        upload_key = (digest, data_file.name, sheet)
+        # Excel dikonversi sekali ke Parquet (key: hash isi file + sheet), rerun berikutnya membaca cache
+        source, source_name = ingest.open_upload(data_file, data_file.name, sheet, digest)
+        header, preview_df = memo.get(("header",) + upload_key, lambda: (
+            ingest.read_header(source, source_name, sheet),
+            ingest.read_preview(source, source_name, sheet=sheet),
+        ))
+    except Exception as e:
+        st.error(f"Error reading file: {e}"); st.stop()
     # Simpan nama file ke dalam session_state
-    if data_df is None: st.stop()
     st.session_state['file_name'] = data_file.name
 
     # --- CORE LOGIC ---
-    val_required_cols = {"kode_outlet": "Outlet", "document_id": "Doc ID", "no_transaksi": "Trans Num", "dpp": "DPP", "total": "Total"}
-    val_df = map_columns(val_df_raw.copy(), val_required_cols, "VAL")
-    if val_df is None: st.stop()
-        
-    val_df['dpp'] = pd.to_numeric(val_df['dpp'], errors='coerce').fillna(0)
-    val_df['total'] = pd.to_numeric(val_df['total'], errors='coerce').fillna(0)
+    # val_df_raw dipakai bersama antar session (read-only), kolom dpp/total sudah numerik dari loader
+    val_mapping = map_columns(val_df_raw.columns, engine.VAL_REQUIRED, "VAL")
+    if val_mapping is None: st.stop()
+    val_key = (reference_version(), mapping_key(val_mapping))
+    if all(src == dst for src, dst in val_mapping.items()):
+        val_df = val_df_raw
+    else:
+        val_df = memo.get(("reference",) + val_key, lambda: val_df_raw.rename(columns=val_mapping))
 
-    result_df = None
+    object_name, result_df, stored = None, None, False
     sc_df_mapped, sap_df_mapped = None, None
 
     with st.spinner("Validating Column..."):
-        time.sleep(0.5)
-        if role_to_process == "Supply Chain":
-            st.markdown("File yang diupload:")
-            st.dataframe(data_df.head())
-            
-            # Tentukan kolom berdasarkan pilihan file_type
-            if file_type == "Retur":
-                sc_required = {
-                    "kode_outlet": "Outlet Code",
-                    "no_retur": "Nomor Retur",
-                    "tgl_penerimaan": "Tanggal Penerimaan",
-                    "jml_neto": "Jumlah Neto"
-                }
-                group_col = "no_retur"
-            else:
-                sc_required = {
-                    "kode_outlet": "Outlet Code",
-                    "no_penerimaan": "Nomor Penerimaan",
-                    "tgl_penerimaan": "Tanggal Penerimaan",
-                    "jml_neto": "Jumlah Neto"
-                }
-                group_col = "no_penerimaan"
+        st.markdown("File yang diupload:")
+        st.dataframe(preview_df)
+        required = engine.required_columns(role_to_process, file_type)
+        dtypes = ingest.column_dtypes(role_to_process, file_type)
+        # Agregat referensi yang sudah dihitung hanya valid jika kolom VAL tidak di-mapping ulang
+        val_agg = load_reference_index(engine.ID_COLUMNS[role_to_process][1]) if val_df is val_df_raw else None
 
-            sc_df_mapped = map_columns(data_df, sc_required, "SC")
-            if sc_df_mapped is not None:
-                sc_df_mapped['jml_neto'] = pd.to_numeric(sc_df_mapped['jml_neto'], errors='coerce').fillna(0)
-                sc_df_mapped['tgl_penerimaan'] = pd.to_datetime(sc_df_mapped['tgl_penerimaan'], errors='coerce')
-                
-                source_agg = sc_df_mapped.groupby(group_col).agg(
-                    target_col_value=('jml_neto', 'sum'),
-                    outlet_code=('kode_outlet', 'first'),
-                    date=('tgl_penerimaan', 'first')
-                ).reset_index().rename(columns={group_col: 'transaction_code'})
-                
-                id_col, val_id_col = 'transaction_code', 'no_transaksi'
-
-        elif role_to_process == "Accountant":
-            st.markdown("File yang diupload:")
-            st.dataframe(data_df.head())
-            sap_required = {"profit_center": "Profit Center", "doc_id": "Document ID", "posting_date": "Posting Date", "kredit": "Credit Amount"}
-            sap_df_mapped = map_columns(data_df, sap_required, "SAP")
-            if sap_df_mapped is not None:
-                sap_df_mapped['kredit'] = pd.to_numeric(sap_df_mapped['kredit'], errors='coerce').fillna(0)
-                sap_df_mapped['posting_date'] = pd.to_datetime(sap_df_mapped['posting_date'], errors='coerce')
-                source_agg = sap_df_mapped.rename(columns={
-                    'doc_id': 'document_id', 'profit_center': 'outlet_code',
-                    'posting_date': 'date', 'kredit': 'target_col_value'
-                })
-                source_agg['target_col_value'] = abs(source_agg['target_col_value'])
-                id_col, val_id_col = 'document_id', 'document_id'
-
-
-        if 'source_agg' in locals():
-            val_agg_dpp = val_df.groupby(val_id_col)['dpp'].sum().reset_index()
-            val_agg_total = val_df.groupby(val_id_col)['total'].sum().reset_index()
-            
-            merged = pd.merge(source_agg, val_agg_dpp, left_on=id_col, right_on=val_id_col, how='left')
-            merged['dpp'] = merged['dpp'].fillna(0)
-            initial_diff = merged['target_col_value'] - merged['dpp']
-            merged['status'] = np.where(abs(initial_diff) > 0.01, 'Discrepancy', 'Matched')
-            
-            merged = pd.merge(merged, val_agg_total, left_on=id_col, right_on=val_id_col, how='left', suffixes=('', '_y'))
-            if val_id_col+'_y' in merged.columns: merged = merged.drop(columns=[val_id_col+'_y'])
-            merged['dpp'] = merged['dpp'].fillna(0)
-            
-            merged['difference'] = np.where(
-                merged['status'] == 'Discrepancy',
-                merged['target_col_value'] - merged['dpp'],
-                initial_diff
-            )
-            
-            result_df = merged.rename(columns={'dpp': 'validation_total'})
-            final_cols = [id_col, 'outlet_code', 'date', 'target_col_value', 'validation_total', 'difference', 'status']
-            result_df = result_df[final_cols]
+        column_map = map_columns(header, required, "SC" if role_to_process == "Supply Chain" else "SAP")
+        if column_map is not None:
+            data_key = upload_key + (role_to_process, file_type, mapping_key(column_map))
+            data_df = memo.get(("data",) + data_key, lambda: load_prepared(source, source_name, column_map, dtypes, role_to_process))
+            if data_df is None: st.stop()
+            object_name = storage.result_object_name(digest, role_to_process, file_type, *val_key, mapping_key(column_map), sheet)
+            stored = memo.get(("stored", object_name), lambda: result_stored(object_name))
+            if not stored:
+                # Belum ada: hitung, upload saat View Results
+                result_df = memo.get(("result", object_name), lambda: engine.validate(data_df, val_df, role_to_process, file_type, val_agg))
+            if role_to_process == "Supply Chain":
+                sc_df_mapped = data_df
+            else:
+                sap_df_mapped = data_df
 
-    
-    if result_df is not None:
-        st.session_state['result_df'] = result_df
-        st.session_state['val_df'] = val_df_raw
-    
+    if object_name is not None:
+        # result_df yang baru dihitung ada di SESSION_STORE lewat memo sampai di-upload; hasil yang sudah
+        # tersimpan dibaca dashboard dari MinIO lewat RESULT_CACHE, referensi lewat load_reference()
         if role == "Admin":
             st.session_state['role_to_process'] = role_to_process
         else:
             st.session_state['role'] = role
         
-        st.session_state['sc_df'] = sc_df_mapped
-        st.session_state['sap_df'] = sap_df_mapped
+        SESSION_STORE.put(session_id, 'sc_df', sc_df_mapped)
+        SESSION_STORE.put(session_id, 'sap_df', sap_df_mapped)
         st.session_state['file_type'] = file_type
         
         st.success("Kolom sudah sesuai! Hasil sudah siap.")
+        if stored:
+            st.caption("File ini sudah pernah divalidasi dengan data referensi yang sama, hasil tersimpan dipakai ulang.")
         if st.button("View Results", use_container_width=True, type="primary"):
-            # --- Insert Result into MinIO ---
-            unique_id = str(uuid.uuid4())
-            minio_path = f"{unique_id}.csv"
-            minio_client.put_object(
-                os.getenv("BUCKET_NAME"),
-                minio_path,
-                BytesIO(result_df.to_csv(index=False).encode('utf-8')),
-                len(result_df.to_csv(index=False).encode('utf-8')),
-                content_type="application/csv"
-            )
-            st.session_state['minio_path'] = minio_path
+            # --- Insert Result into MinIO (sekali per validasi identik) ---
+            if not stored and not storage.result_exists(minio_client, os.getenv("BUCKET_NAME"), object_name):
+                # Ringkasan (cube) untuk KPI dan grafik dashboard di-upload lebih dulu,
+                # jadi object hasil yang sudah ada selalu punya ringkasan
+                summary_df = build_summary(result_df, engine.ID_COLUMNS[role_to_process][0])
+                storage.upload_result(minio_client, os.getenv("BUCKET_NAME"), summary_df, object_name=storage.summary_object_name(object_name))
+                storage.upload_result(minio_client, os.getenv("BUCKET_NAME"), result_df, object_name=object_name)
+            st.session_state['minio_path'] = object_name
+            # --- Index ID untuk fitur Search Data by ID di dashboard (key: token frame di SESSION_STORE) ---
+            if sc_df_mapped is not None:
+                st.session_state['sc_index'] = (SESSION_STORE.token(session_id, 'sc_df'), IdIndex(sc_df_mapped, engine.SC_GROUP_COL[file_type]))
+            if sap_df_mapped is not None:
+                st.session_state['sap_index'] = (SESSION_STORE.token(session_id, 'sap_df'), IdIndex(sap_df_mapped, 'doc_id'))
             st.switch_page("pages/dashboard.py")
@@ -1,4 +1,8 @@
 import streamlit as st
+from dotenv import load_dotenv
+
+# .env dimuat sebelum halaman mana pun meng-import modul validation
+load_dotenv()
 
 pages = {
     "Main Menus":
@@ -0,0 +1,3 @@
+"""
+Shared, Streamlit-free helpers for the SC / SAP validation app.
+"""
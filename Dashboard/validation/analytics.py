@@ -0,0 +1,234 @@
+"""
+Query engine kolumnar (DuckDB, opsional) untuk tab "Validation Summary" dan
+"Dashboard Insights".
+
+ParquetView membaca object hasil langsung dari file cache disk
+(RESULT_CACHE.local_path) dengan SQL: hanya kolom dan baris yang dibutuhkan
+yang dibaca (projection / predicate pushdown ke Parquet), query berjalan
+multi-thread, dan hasil tidak pernah dimuat utuh ke memory. Yang dikirim ke
+browser dibatasi DISPLAY_ROWS baris.
+
+FrameView memberi antarmuka yang sama di atas DataFrame di memory (FilterIndex),
+dipakai jika duckdb tidak terpasang, QUERY_ENGINE=pandas, atau hasil lama yang
+belum menyimpan kolom perhitungan ulang.
+"""
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from validation.filters import FilterIndex
+from validation.reference import CACHE_DIR
+from validation.summary import DIMENSIONS, MEASURES
+
+try:
+    import duckdb
+except ImportError:  # tanpa duckdb dashboard memakai FrameView
+    duckdb = None
+
+
+QUERY_ENGINE = os.getenv("QUERY_ENGINE", "duckdb")
+DUCKDB_THREADS = int(os.getenv("DUCKDB_THREADS", "0"))  # 0 = semua core
+DUCKDB_MEMORY_LIMIT = os.getenv("DUCKDB_MEMORY_LIMIT", "1GB")
+DISPLAY_ROWS = int(os.getenv("DASHBOARD_DISPLAY_ROWS", "10000"))
+RECALC_COLUMNS = {
+    "status": "recalculated_status",
+    "Discrepancy_category": "recalculated_category",
+}
+
+_database = None
+_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return duckdb is not None and QUERY_ENGINE == "duckdb"
+
+
+def _cursor():
+    """
+    Cursor ke satu database DuckDB in-memory per proses. Thread pool, batas memory
+    dan folder spill ke disk dipakai bersama oleh semua session.
+    """
+    global _database
+    with _lock:
+        if _database is None:
+            spill_dir = os.path.join(CACHE_DIR, "duckdb")
+            os.makedirs(spill_dir, exist_ok=True)
+            config = {"memory_limit": DUCKDB_MEMORY_LIMIT, "temp_directory": spill_dir}
+            if DUCKDB_THREADS:
+                config["threads"] = DUCKDB_THREADS
+            _database = duckdb.connect(config=config)
+        return _database.cursor()
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _literal(text: str) -> str:
+    return "'" + text.replace("'", "''") + "'"
+
+
+class FrameView:
+    """Filter di atas DataFrame di memory lewat FilterIndex."""
+
+    def __init__(self, df: pd.DataFrame, filter_index: FilterIndex):
+        self.df = df
+        self.index = filter_index
+
+    def options(self, col: str) -> list:
+        return self.index.options(col)
+
+    def date_bounds(self):
+        return self.index.date_bounds()
+
+    def count(self, selections: dict = None, date_range=None) -> int:
+        return int(self.index.mask(selections, date_range).sum()) if selections or date_range else len(self.df)
+
+    def select(self, selections: dict = None, date_range=None, columns: list = None, limit: int = None) -> pd.DataFrame:
+        positions = self.index.select(selections, date_range)
+        if limit is not None:
+            positions = positions[:limit]
+        return self.df.iloc[positions] if columns is None else self.df.iloc[positions][columns]
+
+    def to_csv(self, selections: dict = None, date_range=None, columns: list = None) -> bytes:
+        return self.select(selections, date_range, columns).to_csv(index=False).encode('utf-8')
+
+
+class ParquetView:
+    """
+    Filter dan agregasi di atas file hasil (Parquet / CSV) lewat DuckDB.
+    renames: {nama kolom di view: kolom di file}, where: filter dasar SQL.
+    """
+
+    def __init__(self, path: str, columns: list = None, renames: dict = None, where: str = None, date_col: str = "date"):
+        reader = "read_parquet" if path.endswith(".parquet") else "read_csv_auto"
+        self.path = path
+        self.source = f"{reader}({_literal(path)})"
+        self.renames = renames or {}
+        self.where = where
+        self.date_col = date_col
+        self._options = {}
+        self._bounds = None
+        cursor = _cursor()
+        try:
+            self.file_types = {row[0]: row[1] for row in cursor.execute(f"DESCRIBE SELECT * FROM {self.source}").fetchall()}
+        finally:
+            cursor.close()
+        self.file_columns = list(self.file_types)
+        self.columns = columns or self.file_columns
+
+    def has_column(self, col: str) -> bool:
+        return col in self.file_columns
+
+    def view(self, columns: list = None, renames: dict = None, where: str = None) -> "ParquetView":
+        """View turunan di atas file yang sama, mis. baris Discrepancy dengan kolom perhitungan ulang."""
+        return ParquetView(self.path, columns, renames, where, self.date_col)
+
+    def _expr(self, col: str) -> str:
+        return _quote(self.renames.get(col, col))
+
+    def _query(self, sql: str, params: list = None) -> pd.DataFrame:
+        cursor = _cursor()
+        try:
+            return cursor.execute(sql, params or []).df()
+        finally:
+            cursor.close()
+
+    def _filter(self, selections: dict = None, date_range=None):
+        clauses, params = [], []
+        if self.where:
+            clauses.append(f"({self.where})")
+        for col, selected in (selections or {}).items():
+            if selected:
+                clauses.append(f"CAST({self._expr(col)} AS VARCHAR) IN ({', '.join('?' for _ in selected)})")
+                params += [str(value) for value in selected]
+        if date_range is not None:
+            clauses.append(f"{self._expr(self.date_col)} BETWEEN ? AND ?")
+            params += [pd.Timestamp(date_range[0]).to_pydatetime(), pd.Timestamp(date_range[1]).to_pydatetime()]
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _projection(self, columns: list = None) -> str:
+        columns = columns or self.columns
+        return ", ".join(f"{self._expr(col)} AS {_quote(col)}" for col in columns)
+
+    def options(self, col: str) -> list:
+        if col not in self._options:
+            where, params = self._filter()
+            expr = self._expr(col)
+            not_null = f"{' AND' if where else ' WHERE'} {expr} IS NOT NULL"
+            df = self._query(f"SELECT DISTINCT CAST({expr} AS VARCHAR) AS v FROM {self.source}{where}{not_null} ORDER BY 1", params)
+            self._options[col] = df['v'].tolist()
+        return self._options[col]
+
+    def date_bounds(self):
+        if self._bounds is None:
+            where, params = self._filter()
+            expr = self._expr(self.date_col)
+            row = self._query(f"SELECT MIN({expr}) AS lo, MAX({expr}) AS hi FROM {self.source}{where}", params).iloc[0]
+            self._bounds = (None, None) if pd.isna(row['lo']) else (pd.Timestamp(row['lo']), pd.Timestamp(row['hi']))
+        return self._bounds
+
+    def count(self, selections: dict = None, date_range=None) -> int:
+        where, params = self._filter(selections, date_range)
+        return int(self._query(f"SELECT COUNT(*) AS n FROM {self.source}{where}", params)['n'].iloc[0])
+
+    def select(self, selections: dict = None, date_range=None, columns: list = None, limit: int = None) -> pd.DataFrame:
+        where, params = self._filter(selections, date_range)
+        sql = f"SELECT {self._projection(columns)} FROM {self.source}{where}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return self._query(sql, params)
+
+    def to_csv(self, selections: dict = None, date_range=None, columns: list = None) -> bytes:
+        """CSV baris terfilter, ditulis DuckDB ke file sementara (tanpa DataFrame). Tanggal hasil selalu tanpa jam."""
+        where, params = self._filter(selections, date_range)
+        with tempfile.TemporaryDirectory(dir=os.path.join(CACHE_DIR, "duckdb")) as tmp:
+            path = os.path.join(tmp, "export.csv")
+            cursor = _cursor()
+            try:
+                cursor.execute(f"COPY (SELECT {self._projection(columns)} FROM {self.source}{where}) TO {_literal(path)} (HEADER, TIMESTAMPFORMAT '%Y-%m-%d')", params)
+            finally:
+                cursor.close()
+            with open(path, "rb") as file:
+                return file.read()
+
+    def _sum(self, col: str) -> str:
+        # SUM BIGINT di DuckDB menjadi HUGEINT; kembalikan ke tipe kolom di file seperti groupby pandas
+        return f"CAST(SUM({_quote(col)}) AS {self.file_types.get(self.renames.get(col, col), 'DOUBLE')}) AS {_quote(col)}"
+
+    def summary(self, id_col: str) -> pd.DataFrame:
+        """
+        Cube ringkasan (sama dengan summary.build_summary) dihitung dengan SQL,
+        untuk hasil yang belum punya object sidecar ringkasan.
+        """
+        where, params = self._filter()
+        dims = [f"{self._expr(col)} AS {_quote(col)}" for col in DIMENSIONS if col != "month"]
+        dims.append(f"CAST(date_trunc('month', {self._expr('date')}) AS TIMESTAMP) AS month")
+        id_expr = self._expr(id_col)
+        first_seen = f"CASE WHEN {id_expr} IS NOT NULL AND row_number() OVER (PARTITION BY {id_expr}) = 1 THEN 1 ELSE 0 END"
+        sql = (
+            f"WITH rows AS (SELECT {', '.join(dims)}, {', '.join(self._expr(col) + ' AS ' + _quote(col) for col in MEASURES)}, "
+            f"{first_seen} AS unique_ids FROM {self.source}{where}) "
+            f"SELECT {', '.join(_quote(col) for col in DIMENSIONS)}, "
+            f"{', '.join(self._sum(col) for col in MEASURES)}, "
+            f"COUNT(*) AS rows, SUM(unique_ids) AS unique_ids FROM rows GROUP BY ALL"
+        )
+        cube = self._query(sql, params)
+        cube['month'] = cube['month'].to_numpy(dtype='datetime64[ns]')
+        for col in ('rows', 'unique_ids'):
+            cube[col] = cube[col].astype(np.int64)
+        return cube
+
+
+def open_result(path: str) -> ParquetView:
+    """View DuckDB atas file hasil di path (biasanya dari RESULT_CACHE.local_path)."""
+    return ParquetView(path)
+
+
+def recalc_view(result_view: ParquetView, id_col: str) -> ParquetView:
+    """Baris Discrepancy dengan status / kategori hasil perhitungan ulang, seperti recalc_df di dashboard."""
+    columns = [id_col, 'outlet_code', 'date', 'target_col_value', 'validation_raw_total', 'recalculated_difference', *RECALC_COLUMNS]
+    return result_view.view(columns, RECALC_COLUMNS, "status = 'Discrepancy'")
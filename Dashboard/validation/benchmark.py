@@ -0,0 +1,192 @@
+"""
+Benchmark per tahap jalur validasi Reguler, Retur dan SAP di atas data sintetis
+(validation.synthetic), dengan laporan JSON untuk memantau regresi.
+
+Contoh:
+    python -m validation.benchmark --rows 100000 1000000 --output bench.json
+    python -m validation.benchmark --rows 1000000 --compare bench.json --threshold 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from validation import engine, ingest, schema, storage, summary, synthetic
+
+
+PATHS = {
+    "Reguler": (engine.SUPPLY_CHAIN, "Reguler"),
+    "Retur": (engine.SUPPLY_CHAIN, "Retur"),
+    "SAP": (engine.ACCOUNTANT, "Reguler"),
+}
+
+
+def legacy_reconcile(source_agg, val_df, id_col, val_id_col):
+    """Salinan logika lama di retur.py sebelum dipindah ke engine, sebagai pembanding."""
+    val_agg_dpp = val_df.groupby(val_id_col)['dpp'].sum().reset_index()
+    val_agg_total = val_df.groupby(val_id_col)['total'].sum().reset_index()
+
+    merged = pd.merge(source_agg, val_agg_dpp, left_on=id_col, right_on=val_id_col, how='left')
+    merged['dpp'] = merged['dpp'].fillna(0)
+    initial_diff = merged['target_col_value'] - merged['dpp']
+    merged['status'] = np.where(abs(initial_diff) > 0.01, 'Discrepancy', 'Matched')
+
+    merged = pd.merge(merged, val_agg_total, left_on=id_col, right_on=val_id_col, how='left', suffixes=('', '_y'))
+    if val_id_col+'_y' in merged.columns: merged = merged.drop(columns=[val_id_col+'_y'])
+    merged['dpp'] = merged['dpp'].fillna(0)
+
+    merged['difference'] = np.where(
+        merged['status'] == 'Discrepancy',
+        merged['target_col_value'] - merged['dpp'],
+        initial_diff
+    )
+
+    result_df = merged.rename(columns={'dpp': 'validation_total'})
+    return result_df[[id_col, 'outlet_code', 'date', 'target_col_value', 'validation_total', 'difference', 'status']]
+
+
+def measure(func, *args):
+    """
+    Jalankan func dua kali: wall time tanpa tracing, lalu peak memory Python/numpy
+    (tracemalloc). Mengembalikan (hasil, {"wall_s", "peak_mb"}).
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    wall = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {"wall_s": round(wall, 3), "peak_mb": round(peak / 2**20, 1)}
+
+
+def _write_parquet(df: pd.DataFrame) -> int:
+    with tempfile.TemporaryFile() as file:
+        storage.write_result(df, file, "parquet")
+        return file.tell()
+
+
+def run_path(path_name: str, rows: int, io: bool = False, **data_kwargs) -> list:
+    """Ukur setiap tahap satu jalur validasi. Mengembalikan list record laporan."""
+    role_to_process, file_type = PATHS[path_name]
+    id_col, val_id_col = engine.ID_COLUMNS[role_to_process]
+    source_df, val_df = synthetic.make_dataset(role_to_process, file_type, rows, **data_kwargs)
+    columns = list(engine.required_columns(role_to_process, file_type))
+
+    records = []
+
+    def stage(name, func, *args):
+        result, stats = measure(func, *args)
+        records.append({
+            "path": path_name, "rows": rows, "stage": name,
+            "rows_out": len(result) if hasattr(result, "__len__") else None,
+            "frame_mb": round(schema.memory_bytes(result) / 2**20, 1) if isinstance(result, pd.DataFrame) else None,
+            **stats,
+        })
+        return result
+
+    if io:
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, "source.csv")
+            source_df.to_csv(csv_path, index=False)
+            column_map = {col: col for col in columns}
+            dtypes = ingest.column_dtypes(role_to_process, file_type)
+            data_df = stage("read_csv (ingest.read_columns)", ingest.read_columns, csv_path, csv_path, column_map, dtypes)
+    else:
+        data_df = source_df[columns]
+
+    data_df = stage("prepare", engine.prepare, data_df, role_to_process)
+    if role_to_process == engine.SUPPLY_CHAIN:
+        source_agg = stage("aggregate_sc", engine.aggregate_sc, data_df, file_type)
+    else:
+        source_agg = stage("aggregate_sap", engine.aggregate_sap, data_df)
+    val_agg = stage("aggregate_reference", engine.aggregate_reference, val_df, val_id_col)
+    stage("legacy_reconcile", legacy_reconcile, source_agg, val_df, id_col, val_id_col)
+    result_df = stage("reconcile (join + classify)", engine.reconcile, source_agg, val_agg, id_col)
+    stage("build_summary", summary.build_summary, result_df, id_col)
+    size, stats = measure(_write_parquet, result_df)
+    records.append({"path": path_name, "rows": rows, "stage": "write_result (parquet)", "rows_out": len(result_df), "bytes": size, **stats})
+    return records
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    """Tahap yang wall time atau peak memory-nya naik lebih dari threshold (rasio) dibanding baseline."""
+    previous = {(r["path"], r["rows"], r["stage"]): r for r in baseline["results"]}
+    regressions = []
+    for record in report["results"]:
+        old = previous.get((record["path"], record["rows"], record["stage"]))
+        if old is None:
+            continue
+        for metric in ("wall_s", "peak_mb"):
+            if old[metric] and record[metric] > old[metric] * (1 + threshold):
+                regressions.append({**record, "metric": metric, "baseline": old[metric], "ratio": round(record[metric] / old[metric], 2)})
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m validation.benchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000], help="Jumlah baris file sumber sintetis")
+    parser.add_argument("--paths", nargs="+", default=list(PATHS), choices=list(PATHS))
+    parser.add_argument("--discrepancy-rate", type=float, default=0.1)
+    parser.add_argument("--outlets", type=int, default=500)
+    parser.add_argument("--duplicate-rate", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--io", action="store_true", help="Ikut ukur pembacaan CSV lewat ingest")
+    parser.add_argument("--output", help="Simpan laporan JSON ke file ini")
+    parser.add_argument("--compare", help="Laporan JSON sebelumnya sebagai baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Batas kenaikan (rasio) untuk dianggap regresi")
+    args = parser.parse_args(argv)
+
+    data_kwargs = {"discrepancy_rate": args.discrepancy_rate, "outlets": args.outlets, "duplicate_rate": args.duplicate_rate, "seed": args.seed}
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "parameters": {**data_kwargs, "io": args.io},
+        "results": [],
+    }
+    for rows in args.rows:
+        for path_name in args.paths:
+            print(f"--- {path_name}: {rows:,} baris")
+            for record in run_path(path_name, rows, args.io, **data_kwargs):
+                report["results"].append(record)
+                frame_mb = f"   frame {record['frame_mb']:>8.1f} MB" if record.get('frame_mb') is not None else ""
+                print(f"{record['stage']:<34} wall {record['wall_s']:>8.3f} s   peak {record['peak_mb']:>9.1f} MB{frame_mb}")
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            regressions = compare(report, json.load(file), args.threshold)
+        report["regressions"] = regressions
+        for r in regressions:
+            print(f"❌ {r['path']} {r['rows']:,} {r['stage']}: {r['metric']} {r['baseline']} -> {r[r['metric']]} ({r['ratio']}x)")
+        exit_code = 1 if regressions else 0
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"✅ Laporan disimpan ke {args.output}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,139 @@
+"""
+Batch CLI untuk menjalankan validasi tanpa Streamlit.
+
+Contoh:
+    python -m validation --role "Supply Chain" --file-type Retur sc_april.csv sc_mei.xlsx
+    python -m validation --role Accountant minio://uploads/sap_april.csv --output-dir hasil/
+"""
+import argparse
+import os
+import sys
+from io import BytesIO
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from validation import engine, exports, ingest, schema
+from validation.reference import REFERENCE_PATH, load_reference_index
+from validation.summary import build_summary
+
+
+MINIO_PREFIX = "minio://"
+
+
+def _minio_client():
+    from minio import Minio
+
+    load_dotenv()
+    return Minio(
+        os.getenv("MINIO_ENDPOINT"),
+        access_key=os.getenv("MINIO_ACCESS_KEY"),
+        secret_key=os.getenv("MINIO_SECRET_KEY"),
+        secure=False
+    )
+
+
+def open_source(location: str):
+    """File dari disk atau dari MinIO (minio://bucket/object), beserta nama file-nya."""
+    if not location.startswith(MINIO_PREFIX):
+        return location, location
+
+    bucket, _, object_name = location[len(MINIO_PREFIX):].partition("/")
+    obj = _minio_client().get_object(bucket, object_name)
+    try:
+        return BytesIO(obj.read()), object_name
+    finally:
+        obj.close()
+        obj.release_conn()
+
+
+def _parse_renames(pairs):
+    renames = {}
+    for pair in pairs or []:
+        src, sep, dst = pair.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"Format --rename harus kolom_asal=kolom_tujuan: {pair}")
+        renames[src] = dst
+    return renames
+
+
+def resolve_column_map(header: list, required: dict, renames: dict) -> dict:
+    """Mapping {kolom file: kolom wajib} dari header file dan opsi --rename."""
+    renamed_to = {dst: src for src, dst in renames.items()}
+    column_map, missing = {}, []
+    for key in required:
+        if key in renamed_to and renamed_to[key] in header:
+            column_map[renamed_to[key]] = key
+        elif key in header:
+            column_map[key] = key
+        else:
+            missing.append(key)
+    if missing:
+        raise ValueError(f"Kolom tidak ditemukan: {', '.join(sorted(missing))}")
+    return column_map
+
+
+def run_file(location: str, val_agg: pd.DataFrame, role_to_process: str, file_type: str, renames: dict, sheet=0) -> pd.DataFrame:
+    if exports.is_dataset(location):
+        # Folder hasil export incremental DB/export.py, dibaca sebagai satu dataset
+        column_map = resolve_column_map(exports.dataset_columns(location), engine.required_columns(role_to_process, file_type), renames)
+        chunks = [exports.read_dataset(location, list(column_map)).rename(columns=column_map)]
+        return engine.validate_chunks(chunks, None, role_to_process, file_type, val_agg)
+
+    source, name = open_source(location)
+    if not (name.endswith('.csv') or ingest.is_excel(name)):
+        raise ValueError(f"Format file tidak didukung: {location}")
+    source, name = ingest.open_upload(source, name, sheet)
+    header = ingest.read_header(source, name, sheet)
+    column_map = resolve_column_map(header, engine.required_columns(role_to_process, file_type), renames)
+    chunks = ingest.iter_column_chunks(source, name, column_map, ingest.column_dtypes(role_to_process, file_type), sheet=sheet)
+    return engine.validate_chunks(chunks, None, role_to_process, file_type, val_agg)
+
+
+def _sheet(value):
+    return int(value) if str(value).isdigit() else value
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m validation", description="Validasi file SC / SAP terhadap data referensi.")
+    parser.add_argument("inputs", nargs="+", help="Path file, folder dataset export incremental, atau minio://bucket/object")
+    parser.add_argument("--role", required=True, choices=[engine.SUPPLY_CHAIN, engine.ACCOUNTANT])
+    parser.add_argument("--file-type", default="Reguler", choices=list(engine.SC_REQUIRED))
+    parser.add_argument("--reference", default=REFERENCE_PATH, help="File (atau folder dataset export) referensi im_purchases_and_return")
+    parser.add_argument("--output-dir", default=".", help="Folder untuk menyimpan hasil validasi")
+    parser.add_argument("--sheet", default=0, help="Nama atau nomor sheet untuk file Excel")
+    parser.add_argument("--rename", action="append", metavar="ASAL=TUJUAN", help="Mapping kolom, bisa diulang")
+    parser.add_argument("--memory-report", action="store_true", help="Tampilkan memory footprint referensi dan hasil per file")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    renames = _parse_renames(args.rename)
+    val_agg = load_reference_index(engine.ID_COLUMNS[args.role][1], args.reference)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    exit_code = 0
+    frames = {"referensi (agregat)": val_agg}
+    for location in args.inputs:
+        try:
+            result_df = run_file(location, val_agg, args.role, args.file_type, renames, _sheet(args.sheet))
+        except Exception as e:
+            print(f"❌ {location}: {e}", file=sys.stderr)
+            exit_code = 1
+            continue
+
+        base_name = os.path.splitext(os.path.basename(os.path.normpath(location)))[0]
+        output_path = os.path.join(args.output_dir, f"{base_name}_validation.csv")
+        result_df.to_csv(output_path, index=False)
+        build_summary(result_df, engine.ID_COLUMNS[args.role][0]).to_csv(
+            os.path.join(args.output_dir, f"{base_name}_summary.csv"), index=False
+        )
+        discrepancy = (result_df['status'] == 'Discrepancy').sum()
+        print(f"✅ {location}: {len(result_df)} data, {discrepancy} discrepancy -> {output_path}")
+        if args.memory_report:
+            frames[base_name] = result_df
+
+    if args.memory_report:
+        print(schema.memory_report(frames).to_string(index=False))
+    return exit_code
@@ -0,0 +1,235 @@
+"""
+Core rekonsiliasi SC / SAP terhadap file referensi (im_purchases_and_return).
+
+Semua fungsi di sini murni bekerja di atas DataFrame, tanpa Streamlit,
+sehingga bisa dipakai dari halaman retur.py maupun dari CLI batch.
+"""
+import numpy as np
+import pandas as pd
+
+from validation import schema
+
+
+SUPPLY_CHAIN = "Supply Chain"
+ACCOUNTANT = "Accountant"
+
+VAL_REQUIRED = {"kode_outlet": "Outlet", "document_id": "Doc ID", "no_transaksi": "Trans Num", "dpp": "DPP", "total": "Total"}
+SC_REQUIRED = {
+    "Retur": {
+        "kode_outlet": "Outlet Code",
+        "no_retur": "Nomor Retur",
+        "tgl_penerimaan": "Tanggal Penerimaan",
+        "jml_neto": "Jumlah Neto"
+    },
+    "Reguler": {
+        "kode_outlet": "Outlet Code",
+        "no_penerimaan": "Nomor Penerimaan",
+        "tgl_penerimaan": "Tanggal Penerimaan",
+        "jml_neto": "Jumlah Neto"
+    },
+}
+SC_GROUP_COL = {"Retur": "no_retur", "Reguler": "no_penerimaan"}
+SAP_REQUIRED = {"profit_center": "Profit Center", "doc_id": "Document ID", "posting_date": "Posting Date", "kredit": "Credit Amount"}
+
+# role -> (kolom id di hasil, kolom id di file referensi)
+ID_COLUMNS = {SUPPLY_CHAIN: ("transaction_code", "no_transaksi"), ACCOUNTANT: ("document_id", "document_id")}
+RESULT_COLUMNS = [
+    "outlet_code", "date", "target_col_value", "validation_total", "validation_raw_total", "difference", "status", "Discrepancy_category",
+    "recalculated_difference", "recalculated_status", "recalculated_category",
+]
+# Nominal int64 rupiah (lihat validation.schema): selisih 1 rupiah pun dihitung
+MATCH_TOLERANCE = 0
+# Batas selisih untuk perhitungan ulang dengan kolom 'total'
+RECALC_TOLERANCE = 10
+
+# Batas kategori selisih (abs difference), sama dengan pd.cut(..., right=False)
+DISCREPANCY_BINS = [2001, 10001, 100001]
+DISCREPANCY_LABELS = ["Rounding (< 2k)", "Small (2k-10k)", "Medium (10k-100k)", "Big (> 100k)"]
+ROUNDING_CATEGORY = DISCREPANCY_LABELS[0]
+VALID_CATEGORY = "Valid"
+MISSING_CATEGORY = "Missing"
+CATEGORIES = DISCREPANCY_LABELS + [VALID_CATEGORY, MISSING_CATEGORY]
+
+
+def required_columns(role_to_process: str, file_type: str) -> dict:
+    """Kolom wajib file upload untuk role dan jenis dokumen tertentu."""
+    if role_to_process == SUPPLY_CHAIN:
+        return SC_REQUIRED[file_type]
+    return SAP_REQUIRED
+
+
+def prepare_sc(sc_df: pd.DataFrame) -> pd.DataFrame:
+    """Konversi tipe kolom SC yang sudah di-mapping."""
+    return sc_df.assign(
+        kode_outlet=schema.to_category(sc_df['kode_outlet']),
+        jml_neto=schema.to_amount(sc_df['jml_neto']),
+        tgl_penerimaan=pd.to_datetime(sc_df['tgl_penerimaan'], errors='coerce'),
+    )
+
+
+def prepare_sap(sap_df: pd.DataFrame) -> pd.DataFrame:
+    """Konversi tipe kolom SAP yang sudah di-mapping."""
+    return sap_df.assign(
+        profit_center=schema.to_category(sap_df['profit_center']),
+        doc_id=schema.to_doc_id(sap_df['doc_id']),
+        kredit=schema.to_amount(sap_df['kredit']),
+        posting_date=pd.to_datetime(sap_df['posting_date'], errors='coerce'),
+    )
+
+
+def prepare(data_df: pd.DataFrame, role_to_process: str) -> pd.DataFrame:
+    """Konversi tipe kolom file upload sesuai role."""
+    if role_to_process == SUPPLY_CHAIN:
+        return prepare_sc(data_df)
+    return prepare_sap(data_df)
+
+
+def _sum_sc(sc_df: pd.DataFrame, file_type: str) -> pd.DataFrame:
+    group_col = SC_GROUP_COL[file_type]
+    return sc_df.groupby(group_col).agg(
+        target_col_value=('jml_neto', 'sum'),
+        outlet_code=('kode_outlet', 'first'),
+        date=('tgl_penerimaan', 'first')
+    ).reset_index().rename(columns={group_col: 'transaction_code'})
+
+
+def aggregate_sc(sc_df: pd.DataFrame, file_type: str) -> pd.DataFrame:
+    """Agregasi SC per nomor transaksi (no_penerimaan / no_retur), total dibulatkan setelah dijumlahkan."""
+    source_agg = _sum_sc(sc_df, file_type)
+    source_agg['target_col_value'] = schema.to_rupiah(source_agg['target_col_value'])
+    return source_agg
+
+
+def aggregate_sc_chunks(chunks, file_type: str) -> pd.DataFrame:
+    """
+    Agregasi SC streaming: setiap potongan (hasil mapping, belum prepare) diagregasi
+    sendiri, lalu agregat parsial digabung. Hasilnya sama dengan aggregate_sc()
+    atas seluruh file, tanpa pernah menyimpan semua baris di memory.
+    """
+    partials = [_sum_sc(prepare_sc(chunk), file_type) for chunk in chunks]
+    combined = pd.concat(partials, ignore_index=True)
+    source_agg = combined.groupby('transaction_code').agg(
+        target_col_value=('target_col_value', 'sum'),
+        outlet_code=('outlet_code', 'first'),
+        date=('date', 'first')
+    ).reset_index()
+    source_agg['target_col_value'] = schema.to_rupiah(source_agg['target_col_value'])
+    # Kategori outlet tiap potongan bisa berbeda, concat mengembalikannya ke string
+    source_agg['outlet_code'] = schema.to_category(source_agg['outlet_code'])
+    return source_agg
+
+
+def aggregate_sap(sap_df: pd.DataFrame) -> pd.DataFrame:
+    """Ubah nama kolom SAP ke skema hasil dan ambil nilai absolut kredit."""
+    source_agg = pd.DataFrame({
+        'document_id': sap_df['doc_id'],
+        'outlet_code': sap_df['profit_center'],
+        'date': sap_df['posting_date'],
+        'target_col_value': schema.to_rupiah(sap_df['kredit'].abs()),
+    })
+    return source_agg
+
+
+def aggregate_reference(val_df: pd.DataFrame, key_col: str) -> pd.DataFrame:
+    """
+    Agregat file referensi per key: sum dpp / ppn / total (int64 rupiah, dibulatkan
+    setelah dijumlahkan) dan jumlah baris. Index hasil adalah key_col, sehingga bisa
+    langsung dipakai untuk join.
+    """
+    amount_cols = [col for col in ('dpp', 'ppn', 'total') if col in val_df.columns]
+    grouped = val_df.groupby(key_col)
+    val_agg = grouped[amount_cols].sum()
+    for col in amount_cols:
+        val_agg[col] = schema.to_rupiah(val_agg[col])
+    val_agg['row_count'] = grouped.size()
+    return val_agg
+
+
+def _category_codes(abs_difference: np.ndarray) -> np.ndarray:
+    """Kode kategori selisih (indeks di CATEGORIES) untuk abs difference."""
+    return np.searchsorted(DISCREPANCY_BINS, abs_difference, side='right')
+
+
+def classify(result_df: pd.DataFrame, id_col: str) -> pd.DataFrame:
+    """
+    Tambahkan status, Discrepancy_category dan kolom perhitungan ulang ke result_df
+    (kolom target_col_value, validation_total, validation_raw_total dan difference
+    harus sudah ada). Semua kolom dihitung sekali di sini supaya dashboard hanya
+    membaca hasilnya:
+
+    - status / Discrepancy_category: berdasarkan 'dpp'. Selisih pembulatan
+      (< 2k) tetap diberi kategori Rounding tetapi berstatus Matched.
+    - recalculated_*: hanya untuk baris Discrepancy, berdasarkan sum 'total'.
+      Kategori 'Valid' jika selisih 0, 'Missing' jika ada nilai kosong
+      (misalnya id tidak ada di referensi).
+    """
+    abs_difference = result_df['difference'].abs().to_numpy()
+    codes = _category_codes(abs_difference)
+    discrepancy = (abs_difference > MATCH_TOLERANCE) & (codes != 0)
+    codes = np.where(abs_difference > MATCH_TOLERANCE, codes, CATEGORIES.index(VALID_CATEGORY))
+    result_df['status'] = pd.Categorical.from_codes(discrepancy.astype(np.int8), categories=schema.STATUS_CATEGORIES)
+    result_df['Discrepancy_category'] = pd.Categorical.from_codes(codes, categories=CATEGORIES)
+
+    recalc_difference = schema.to_rupiah(result_df['target_col_value'] - result_df['validation_raw_total'].fillna(0)).abs().to_numpy()
+    missing = result_df[[id_col, 'outlet_code', 'date', 'target_col_value', 'validation_raw_total']].isna().any(axis=1).to_numpy()
+    recalc_codes = np.select(
+        [~discrepancy, missing, recalc_difference == 0],
+        [-1, CATEGORIES.index(MISSING_CATEGORY), CATEGORIES.index(VALID_CATEGORY)],
+        _category_codes(recalc_difference),
+    )
+    result_df['recalculated_difference'] = pd.Series(recalc_difference, index=result_df.index, dtype="Int64").where(discrepancy)
+    result_df['recalculated_status'] = pd.Categorical.from_codes(
+        np.where(discrepancy, recalc_difference >= RECALC_TOLERANCE, -1).astype(np.int8), categories=schema.STATUS_CATEGORIES
+    )
+    result_df['recalculated_category'] = pd.Categorical.from_codes(recalc_codes, categories=CATEGORIES)
+    return result_df
+
+
+def reconcile(source_agg: pd.DataFrame, val_agg: pd.DataFrame, id_col: str) -> pd.DataFrame:
+    """
+    Bandingkan agregat sumber dengan agregat referensi (hasil aggregate_reference)
+    dalam satu join. Status dan difference dihitung dari 'dpp'; sum 'total'
+    ikut dibawa sebagai validation_raw_total (NaN jika id tidak ada di referensi)
+    untuk perhitungan ulang di classify().
+    """
+    val_cols = val_agg[['dpp', 'total']].rename(columns={'dpp': 'validation_total', 'total': 'validation_raw_total'})
+    keys, val_cols.index = schema.align_keys(source_agg[id_col], val_cols.index)
+    result_df = source_agg[[id_col, 'outlet_code', 'date', 'target_col_value']].join(val_cols, on=keys)
+
+    # Nominal tetap int64 rupiah; validation_raw_total kosong (<NA>) jika id tidak ada di referensi
+    result_df['validation_total'] = schema.to_rupiah(result_df['validation_total'])
+    result_df['validation_raw_total'] = result_df['validation_raw_total'].astype("Int64")
+    result_df['difference'] = result_df['target_col_value'] - result_df['validation_total']
+    return classify(result_df, id_col)[[id_col] + RESULT_COLUMNS]
+
+
+def validate(data_df: pd.DataFrame, val_df: pd.DataFrame, role_to_process: str, file_type: str, val_agg: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Jalankan validasi untuk file yang sudah di-mapping dan melalui prepare().
+    val_agg adalah agregat referensi yang sudah dihitung sebelumnya
+    (lihat reference.load_reference_index); jika kosong dihitung dari val_df.
+    Mengembalikan result_df dengan kolom id dan RESULT_COLUMNS.
+    """
+    id_col, val_id_col = ID_COLUMNS[role_to_process]
+    if role_to_process == SUPPLY_CHAIN:
+        source_agg = aggregate_sc(data_df, file_type)
+    else:
+        source_agg = aggregate_sap(data_df)
+    if val_agg is None:
+        val_agg = aggregate_reference(val_df, val_id_col)
+    return reconcile(source_agg, val_agg, id_col)
+
+
+def validate_chunks(chunks, val_df: pd.DataFrame, role_to_process: str, file_type: str, val_agg: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Seperti validate(), untuk potongan file yang sudah di-mapping tetapi belum
+    melalui prepare() (lihat ingest.iter_column_chunks).
+    """
+    id_col, val_id_col = ID_COLUMNS[role_to_process]
+    if role_to_process == SUPPLY_CHAIN:
+        source_agg = aggregate_sc_chunks(chunks, file_type)
+    else:
+        source_agg = pd.concat([aggregate_sap(prepare_sap(chunk)) for chunk in chunks], ignore_index=True)
+    if val_agg is None:
+        val_agg = aggregate_reference(val_df, val_id_col)
+    return reconcile(source_agg, val_agg, id_col)
@@ -0,0 +1,93 @@
+"""
+Pembaca dataset hasil export incremental DB/export.py (--incremental).
+
+Satu dataset adalah folder per tabel berisi file partisi (CSV / CSV gzip /
+CSV zstd / Parquet) dan _manifest.json yang mencatat partisi, schema dan
+watermark. read_dataset menggabungkan semua partisi menjadi satu DataFrame
+dan menyimpan versi terbaru untuk baris yang terexport lebih dari sekali.
+
+Export memakai watermark inklusif (>=): setiap partisi mengulang semua baris
+dengan nilai watermark sama dengan watermark sebelumnya (batas). Baris batas
+di partisi lama diganti seluruhnya oleh partisi baru; baris lain tidak
+dibandingkan. Watermark berupa tanggal (tanggal, posting_date) tidak
+menangkap baris lama yang diubah belakangan: baris dengan tanggal sebelum
+batas tidak pernah diexport ulang, perlu export penuh untuk memperbaruinya.
+"""
+import json
+import os
+
+import pandas as pd
+
+
+MANIFEST_NAME = "_manifest.json"
+
+
+def is_dataset(path: str) -> bool:
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, MANIFEST_NAME))
+
+
+def manifest_path(path: str) -> str:
+    return os.path.join(path, MANIFEST_NAME)
+
+
+def read_manifest(path: str) -> dict:
+    with open(manifest_path(path), encoding="utf-8") as file:
+        return json.load(file)
+
+
+def dataset_columns(path: str) -> list:
+    """Nama kolom dataset dari schema di manifest, tanpa membaca partisi."""
+    return [col["name"] for col in read_manifest(path)["schema"] or []]
+
+
+def _read_partition(file_path: str, fmt: str, columns: list = None) -> pd.DataFrame:
+    if fmt == "parquet":
+        return pd.read_parquet(file_path, columns=columns)
+    # Kompresi gzip / zstd dikenali pandas dari ekstensi file
+    return pd.read_csv(file_path, usecols=columns)
+
+
+def _at_watermark(values: pd.Series, watermark) -> pd.Series:
+    """Mask baris dengan nilai watermark sama dengan watermark manifest (angka atau tanggal ISO)."""
+    if isinstance(watermark, (int, float)):
+        return pd.to_numeric(values, errors="coerce") == watermark
+    return pd.to_datetime(values, format="mixed", errors="coerce") == pd.Timestamp(watermark)
+
+
+def read_dataset(path: str, columns: list = None) -> pd.DataFrame:
+    """
+    Semua partisi dataset sebagai satu DataFrame, urut sesuai manifest.
+    Baris di batas watermark diambil dari partisi yang mengexport ulang batas
+    tersebut; baris dengan primary key sama hanya disimpan versi terbarunya.
+    Tabel tanpa primary key tidak di-dedup di luar batas watermark, sehingga
+    baris identik yang memang ada di tabel tetap terhitung.
+    """
+    manifest = read_manifest(path)
+    partitions = manifest["partitions"]
+    key_columns = manifest.get("key_columns") or []
+    watermark_column = manifest.get("watermark_column")
+    read_columns = columns
+    if columns is not None and len(partitions) > 1:
+        # Primary key dan kolom watermark ikut dibaca untuk mengganti baris lama
+        read_columns = list(dict.fromkeys(list(columns) + key_columns + ([watermark_column] if watermark_column else [])))
+
+    frames, boundary = [], None
+    for partition in partitions:
+        df = _read_partition(os.path.join(path, partition["file"]), manifest["format"], read_columns)
+        if frames and boundary is not None and watermark_column:
+            # Partisi ini berisi ulang semua baris dengan watermark == boundary: buang versi lamanya
+            frames = [
+                (frame[~_at_watermark(frame[watermark_column], boundary).to_numpy()], to) if to == boundary else (frame, to)
+                for frame, to in frames
+            ]
+        frames.append((df, partition.get("watermark_to")))
+        # Sama seperti export: watermark berikutnya adalah nilai maksimum partisi terakhir
+        if partition.get("watermark_to") is not None:
+            boundary = partition["watermark_to"]
+    if not frames:
+        return pd.DataFrame(columns=columns or dataset_columns(path))
+    df = pd.concat([frame for frame, _ in frames], ignore_index=True)
+
+    if len(frames) > 1 and key_columns:
+        df = df.drop_duplicates(subset=key_columns, keep="last").reset_index(drop=True)
+    return df if columns is None else df[list(columns)]
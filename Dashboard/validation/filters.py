@@ -0,0 +1,74 @@
+"""
+Index filter untuk tabel hasil validasi di dashboard.
+
+Kolom kategori disimpan sebagai kode integer dan kolom tanggal sebagai urutan
+terindeks, dibangun sekali per hasil. Setiap kombinasi filter dijawab dengan
+lookup table + irisan mask boolean, tanpa menyalin DataFrame.
+"""
+import numpy as np
+import pandas as pd
+
+
+class FilterIndex:
+    """
+    Index filter untuk satu DataFrame hasil.
+
+    categorical_cols: kolom yang difilter dengan isin (status, outlet_code, ...).
+    date_col: kolom tanggal yang difilter dengan rentang inklusif.
+    """
+
+    def __init__(self, df: pd.DataFrame, categorical_cols, date_col: str = None):
+        self.n_rows = len(df)
+        self._codes = {}
+        self._values = {}
+        for col in categorical_cols:
+            codes, uniques = pd.factorize(df[col], sort=True)
+            self._codes[col] = codes.astype(np.int32)
+            self._values[col] = pd.Index(uniques)
+
+        self.date_col = date_col
+        if date_col is not None:
+            dates = df[date_col].to_numpy(dtype="datetime64[ns]")
+            valid = np.flatnonzero(~np.isnat(dates))
+            order = np.argsort(dates[valid], kind="stable")
+            self._date_positions = valid[order]
+            self._sorted_dates = dates[self._date_positions]
+
+    def options(self, col: str) -> list:
+        """Nilai unik (terurut) sebuah kolom kategori, untuk pilihan multiselect."""
+        return list(self._values[col])
+
+    def date_bounds(self):
+        """(min, max) kolom tanggal, atau (None, None) jika semua kosong."""
+        if self.date_col is None or len(self._sorted_dates) == 0:
+            return None, None
+        return pd.Timestamp(self._sorted_dates[0]), pd.Timestamp(self._sorted_dates[-1])
+
+    def mask(self, selections: dict = None, date_range=None) -> np.ndarray:
+        """
+        Mask boolean untuk kombinasi filter. selections: {kolom: [nilai terpilih]},
+        list kosong berarti kolom tersebut tidak difilter. date_range: (awal, akhir).
+        """
+        mask = np.ones(self.n_rows, dtype=bool)
+        for col, selected in (selections or {}).items():
+            if not selected:
+                continue
+            lookup = np.zeros(len(self._values[col]) + 1, dtype=bool)
+            selected_codes = self._values[col].get_indexer(pd.Index(list(selected)))
+            lookup[selected_codes[selected_codes >= 0]] = True
+            # Kode -1 (NaN) jatuh ke slot terakhir yang selalu False
+            mask &= lookup[self._codes[col]]
+
+        if date_range is not None and self.date_col is not None:
+            start = np.datetime64(pd.Timestamp(date_range[0]), "ns")
+            end = np.datetime64(pd.Timestamp(date_range[1]), "ns")
+            lo = np.searchsorted(self._sorted_dates, start, side="left")
+            hi = np.searchsorted(self._sorted_dates, end, side="right")
+            in_range = np.zeros(self.n_rows, dtype=bool)
+            in_range[self._date_positions[lo:hi]] = True
+            mask &= in_range
+        return mask
+
+    def select(self, selections: dict = None, date_range=None) -> np.ndarray:
+        """Posisi baris (iloc) yang lolos semua filter."""
+        return np.flatnonzero(self.mask(selections, date_range))
@@ -0,0 +1,53 @@
+"""
+Index hash ID -> posisi baris untuk fitur "Search Data by ID" di dashboard.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+
+class IdIndex:
+    """
+    Index satu kolom ID dari sebuah DataFrame.
+
+    ID dibandingkan sebagai string (sama seperti pencarian lama yang memakai
+    astype(str)), tetapi konversi dan pengelompokan hanya dilakukan sekali saat
+    index dibangun. Setiap lookup cukup hash lookup + slicing array posisi.
+    """
+
+    def __init__(self, df: pd.DataFrame, col: str):
+        codes, uniques = pd.factorize(df[col].astype(str))
+        self.col = col
+        self._keys = pd.Index(uniques)
+        # Posisi baris diurutkan per kode ID, offsets[k]:offsets[k+1] adalah baris milik ID ke-k
+        self._positions = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        self._offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def positions(self, ids) -> np.ndarray:
+        """Posisi baris (iloc) untuk semua ID yang diberikan, dalam satu batch."""
+        key_idx = self._keys.get_indexer(pd.Index([str(i) for i in ids]))
+        key_idx = key_idx[key_idx >= 0]
+        starts = self._offsets[key_idx]
+        lengths = self._offsets[key_idx + 1] - starts
+        run_starts = np.cumsum(lengths) - lengths
+        flat = np.arange(lengths.sum()) - np.repeat(run_starts - starts, lengths)
+        return self._positions[flat]
+
+    def missing(self, ids) -> list:
+        """ID yang tidak ditemukan di index."""
+        ids = [str(i) for i in ids]
+        return [i for i, k in zip(ids, self._keys.get_indexer(pd.Index(ids))) if k < 0]
+
+    def lookup(self, df: pd.DataFrame, ids) -> pd.DataFrame:
+        """Baris df (yang sama dengan df saat index dibangun) untuk daftar ID."""
+        return df.iloc[self.positions(ids)]
+
+
+def parse_ids(text: str) -> list:
+    """Pecah input pengguna (dipisah koma, spasi, titik koma atau baris baru) menjadi daftar ID unik."""
+    return list(dict.fromkeys(part for part in re.split(r"[\s,;]+", text or "") if part))
@@ -0,0 +1,220 @@
+"""
+Pembacaan file upload SC / SAP: hanya kolom yang dibutuhkan, dengan dtype ringkas.
+
+Header dibaca lebih dulu (read_header) supaya mapping kolom bisa diselesaikan
+tanpa mem-parse seluruh file, lalu read_columns / iter_column_chunks hanya
+membaca kolom hasil mapping.
+
+File Excel dikonversi sekali ke Parquet (cache_excel) dengan key hash isi file
+dan nama sheet, sehingga rerun berikutnya tidak membuka workbook lagi.
+"""
+import glob
+import hashlib
+import os
+
+import pandas as pd
+
+from validation.engine import SC_GROUP_COL, SUPPLY_CHAIN
+from validation.reference import CACHE_DIR
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # tanpa pyarrow, Excel dibaca langsung setiap kali
+    pq = None
+
+try:
+    import python_calamine  # engine Excel berbasis Rust, didukung pandas >= 2.2
+    EXCEL_ENGINE = "calamine"
+except ImportError:  # tanpa calamine pandas memilih engine sesuai ekstensi (openpyxl untuk .xlsx, xlrd untuk .xls)
+    EXCEL_ENGINE = None
+
+
+CHUNK_ROWS = 500_000
+PREVIEW_ROWS = 5
+EXCEL_CACHE_DIR = os.path.join(CACHE_DIR, "uploads")
+EXCEL_CACHE_MAX_FILES = int(os.getenv("EXCEL_CACHE_MAX_FILES", "50"))
+HASH_BLOCK = 1 << 20
+
+
+def is_excel(name: str) -> bool:
+    return name.endswith(('.xls', '.xlsx'))
+
+
+def is_parquet(name: str) -> bool:
+    return name.endswith('.parquet')
+
+
+def _rewind(source) -> None:
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+def content_hash(source) -> str:
+    """SHA-1 isi file (path atau file-like), dibaca per blok."""
+    digest = hashlib.sha1()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as file:
+            for block in iter(lambda: file.read(HASH_BLOCK), b""):
+                digest.update(block)
+    else:
+        _rewind(source)
+        for block in iter(lambda: source.read(HASH_BLOCK), b""):
+            digest.update(block)
+        _rewind(source)
+    return digest.hexdigest()
+
+
+def list_sheets(source) -> list:
+    """Nama semua sheet di workbook."""
+    _rewind(source)
+    if EXCEL_ENGINE == "calamine":
+        sheets = python_calamine.CalamineWorkbook.from_object(source).sheet_names
+    else:
+        with pd.ExcelFile(source) as workbook:
+            sheets = workbook.sheet_names
+    _rewind(source)
+    return list(sheets)
+
+
+def _prune_excel_cache() -> None:
+    cached = sorted(glob.glob(os.path.join(EXCEL_CACHE_DIR, "*.parquet")), key=os.path.getmtime)
+    for old in cached[:-EXCEL_CACHE_MAX_FILES]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+
+
+def cache_excel(source, sheet=0, digest: str = None) -> str:
+    """
+    Konversi satu sheet Excel ke Parquet di EXCEL_CACHE_DIR dan kembalikan path-nya.
+    Key cache adalah hash isi file + sheet, jadi file yang sama hanya di-parse sekali.
+    digest: content_hash(source) yang sudah dihitung sebelumnya, jika ada.
+    """
+    sheet_key = hashlib.sha1(str(sheet).encode("utf-8")).hexdigest()[:8]
+    path = os.path.join(EXCEL_CACHE_DIR, f"{digest or content_hash(source)}.{sheet_key}.parquet")
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+
+    _rewind(source)
+    df = pd.read_excel(source, sheet_name=sheet, engine=EXCEL_ENGINE)
+    _rewind(source)
+    # Kolom object di Excel sering berisi campuran angka dan teks, simpan sebagai string
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].astype("string")
+    df.columns = [str(col) for col in df.columns]
+
+    os.makedirs(EXCEL_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    _prune_excel_cache()
+    return path
+
+
+def open_upload(source, name: str, sheet=0, digest: str = None):
+    """
+    Sumber yang siap dibaca fungsi lain di modul ini: Excel diganti dengan cache
+    Parquet-nya (jika pyarrow tersedia), CSV dikembalikan apa adanya.
+    Mengembalikan (source, name).
+    """
+    if is_excel(name) and pq is not None:
+        path = cache_excel(source, sheet, digest)
+        return path, path
+    return source, name
+
+
+def column_dtypes(role_to_process: str, file_type: str) -> dict:
+    """
+    Dtype eksplisit untuk kolom wajib (nama kolom setelah mapping).
+    Kolom nominal dan tanggal tetap dikonversi di engine.prepare()
+    supaya nilai yang tidak valid menjadi 0 / NaT, bukan error parsing.
+    """
+    if role_to_process == SUPPLY_CHAIN:
+        return {'kode_outlet': 'category', SC_GROUP_COL[file_type]: str}
+    return {'profit_center': 'category'}
+
+
+def _apply_dtypes(df: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    for col, dtype in dtypes.items():
+        if dtype is str:
+            df[col] = df[col].astype(str).mask(df[col].isna())
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def read_header(source, name: str, sheet=0) -> list:
+    """Nama kolom file tanpa membaca isi file."""
+    if is_parquet(name):
+        return list(pq.read_schema(source).names)
+    _rewind(source)
+    if is_excel(name):
+        columns = pd.read_excel(source, sheet_name=sheet, nrows=0, engine=EXCEL_ENGINE).columns
+    else:
+        columns = pd.read_csv(source, nrows=0).columns
+    _rewind(source)
+    return list(columns)
+
+
+def read_preview(source, name: str, rows: int = PREVIEW_ROWS, sheet=0) -> pd.DataFrame:
+    """Beberapa baris pertama file, semua kolom, untuk ditampilkan ke pengguna."""
+    if is_parquet(name):
+        batch = next(pq.ParquetFile(source).iter_batches(batch_size=rows), None)
+        return batch.to_pandas() if batch is not None else pd.DataFrame(columns=read_header(source, name))
+    _rewind(source)
+    if is_excel(name):
+        df = pd.read_excel(source, sheet_name=sheet, nrows=rows, engine=EXCEL_ENGINE)
+    else:
+        df = pd.read_csv(source, nrows=rows)
+    _rewind(source)
+    return df
+
+
+def _read_kwargs(column_map: dict, dtypes: dict) -> dict:
+    dtypes = dtypes or {}
+    return {
+        'usecols': list(column_map),
+        'dtype': {src: dtypes[dst] for src, dst in column_map.items() if dst in dtypes},
+    }
+
+
+def read_columns(source, name: str, column_map: dict, dtypes: dict = None, sheet=0) -> pd.DataFrame:
+    """
+    Baca hanya kolom di column_map ({kolom file: kolom wajib}) lalu rename
+    ke nama kolom wajib. dtypes memakai nama kolom wajib.
+    """
+    if is_parquet(name):
+        df = pd.read_parquet(source, columns=list(column_map)).rename(columns=column_map)
+        return _apply_dtypes(df, {col: dtype for col, dtype in (dtypes or {}).items() if col in df.columns})
+
+    _rewind(source)
+    kwargs = _read_kwargs(column_map, dtypes)
+    if is_excel(name):
+        df = pd.read_excel(source, sheet_name=sheet, engine=EXCEL_ENGINE, **kwargs)
+    else:
+        df = pd.read_csv(source, **kwargs)
+    return df.rename(columns=column_map)
+
+
+def iter_column_chunks(source, name: str, column_map: dict, dtypes: dict = None, chunksize: int = CHUNK_ROWS, sheet=0):
+    """
+    Sama seperti read_columns tetapi menghasilkan potongan DataFrame berukuran
+    chunksize baris, untuk agregasi streaming file besar. Excel yang tidak
+    di-cache ke Parquet dikembalikan sebagai satu potongan.
+    """
+    if is_parquet(name):
+        dtypes = {col: dtype for col, dtype in (dtypes or {}).items() if col in column_map.values()}
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize, columns=list(column_map)):
+            yield _apply_dtypes(batch.to_pandas().rename(columns=column_map), dtypes)
+        return
+
+    if is_excel(name):
+        yield read_columns(source, name, column_map, dtypes, sheet)
+        return
+
+    _rewind(source)
+    with pd.read_csv(source, chunksize=chunksize, **_read_kwargs(column_map, dtypes)) as reader:
+        for chunk in reader:
+            yield chunk.rename(columns=column_map)
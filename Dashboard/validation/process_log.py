@@ -0,0 +1,112 @@
+"""
+Client untuk log proses validasi (webhook n8n get-process), per halaman.
+
+Parameter query yang dikirim ke webhook:
+    role       filter role pengguna (kosong = semua role)
+    date_from  / date_to   filter tanggal uploaded_at (YYYY-MM-DD, inklusif)
+    limit      jumlah baris per halaman
+    before     cursor halaman berikutnya: baris yang lebih lama dari cursor
+    after      cursor refresh: hanya baris yang lebih baru dari cursor (terlama lebih dulu)
+
+Cursor adalah "<uploaded_at ISO>|<id>", urutan log uploaded_at lalu id,
+terbaru lebih dulu. Respons boleh berupa list baris atau
+{"items": [...], "next_cursor": "..."}. Workflow lama yang mengabaikan
+parameter dan mengembalikan seluruh log tetap didukung: filter, cursor dan
+limit juga diterapkan di sisi client.
+
+id adalah nama object hasil di MinIO. Validasi yang identik memakai object
+yang sama (lihat storage.result_object_name), jadi satu baris log dikenali
+dari ROW_KEY, bukan dari id saja.
+"""
+import pandas as pd
+
+from validation import webhooks
+
+
+PAGE_SIZE = 200
+ROW_KEY = ['uploaded_at', 'id']
+LOG_COLUMNS = ['id', 'user', 'file_type', 'file_name', 'role', 'role_to_process', 'uploaded_at', 'val_score', 'val_status']
+
+
+def make_cursor(row) -> str:
+    """Cursor untuk satu baris log (Series / dict dengan uploaded_at dan id)."""
+    return f"{pd.Timestamp(row['uploaded_at']).isoformat()}|{row['id']}"
+
+
+def _parse_cursor(cursor: str):
+    uploaded_at, _, row_id = cursor.partition("|")
+    return pd.Timestamp(uploaded_at), row_id
+
+
+def _to_frame(items) -> pd.DataFrame:
+    df = pd.DataFrame(items or [])
+    for col in LOG_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    df['uploaded_at'] = pd.to_datetime(df['uploaded_at'], errors='coerce')
+    if df['uploaded_at'].dt.tz is not None:
+        # Cursor dan filter tanggal memakai waktu lokal tanpa zona waktu
+        df['uploaded_at'] = df['uploaded_at'].dt.tz_localize(None)
+    df['id'] = df['id'].astype(str).mask(df['id'].isna())
+    return df
+
+
+def _filter(df: pd.DataFrame, role=None, date_from=None, date_to=None, before=None, after=None) -> pd.DataFrame:
+    mask = pd.Series(True, index=df.index)
+    if role:
+        mask &= df['role'] == role
+    if date_from is not None:
+        mask &= df['uploaded_at'] >= pd.Timestamp(date_from)
+    if date_to is not None:
+        mask &= df['uploaded_at'] < pd.Timestamp(date_to) + pd.Timedelta(days=1)
+    if before:
+        ts, row_id = _parse_cursor(before)
+        mask &= (df['uploaded_at'] < ts) | ((df['uploaded_at'] == ts) & (df['id'] < row_id))
+    if after:
+        ts, row_id = _parse_cursor(after)
+        mask &= (df['uploaded_at'] > ts) | ((df['uploaded_at'] == ts) & (df['id'] > row_id))
+    return df[mask.to_numpy()]
+
+
+def fetch_page(role=None, date_from=None, date_to=None, before=None, after=None, limit: int = PAGE_SIZE):
+    """
+    Satu halaman log. Tanpa after: terbaru lebih dulu, mulai dari cursor before.
+    Dengan after: terlama lebih dulu, yaitu baris tepat setelah cursor after.
+    Mengembalikan (df, next_cursor); next_cursor None jika tidak ada halaman
+    berikutnya. Error koneksi / status code diteruskan sebagai requests.RequestException.
+    """
+    params = {'limit': limit}
+    for key, value in (('role', role), ('before', before), ('after', after)):
+        if value:
+            params[key] = value
+    for key, value in (('date_from', date_from), ('date_to', date_to)):
+        if value is not None:
+            params[key] = pd.Timestamp(value).strftime('%Y-%m-%d')
+
+    response = webhooks.get("get-process", params=params)
+    response.raise_for_status()
+    payload = response.json()
+    items = payload.get('items', []) if isinstance(payload, dict) else payload
+    next_cursor = payload.get('next_cursor') if isinstance(payload, dict) else None
+
+    df = _filter(_to_frame(items), role, date_from, date_to, before, after)
+    df = df.sort_values(ROW_KEY, ascending=bool(after), na_position='last')
+    if len(df) > limit:
+        df = df.iloc[:limit]
+        next_cursor = next_cursor or make_cursor(df.iloc[-1])
+    elif not isinstance(payload, dict) and len(df) == limit:
+        next_cursor = make_cursor(df.iloc[-1])
+    return df.reset_index(drop=True), next_cursor
+
+
+def fetch_newer(newest: str, role=None, date_from=None, date_to=None, limit: int = PAGE_SIZE) -> pd.DataFrame:
+    """Semua log yang lebih baru dari cursor newest (baris terbaru yang sudah dimiliki client), terbaru lebih dulu."""
+    pages = []
+    after = newest
+    while True:
+        df, _ = fetch_page(role, date_from, date_to, after=after, limit=limit)
+        pages.append(df)
+        if len(df) < limit:
+            break
+        after = make_cursor(df.iloc[-1])
+    return pd.concat(pages, ignore_index=True).sort_values(ROW_KEY, ascending=False, na_position='last')
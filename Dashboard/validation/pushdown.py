@@ -0,0 +1,364 @@
+"""
+Mode pushdown: agregasi dan join validasi dijalankan di database sumber
+(MySQL / PostgreSQL), bukan dari CSV export yang diagregasi di pandas.
+
+SQL dibentuk dari definisi yang sama dengan jalur pandas:
+- id_query: validasi per nomor transaksi / document_id terhadap
+  im_purchases_and_return (engine.reconcile), klasifikasi tetap di engine.classify.
+- recon_query: rekonsiliasi SAP vs SC per outlet × periode dari recon.SPECS.
+
+Yang dikirim balik hanya baris hasil agregasi (atau hanya baris yang selisih
+dengan --discrepant-only), dibaca per batch dengan fetchmany. SQLite dipakai
+sebagai pengganti lokal: --load-exports mengisi database SQLite dari DB/exports.
+
+Contoh:
+    python -m validation.pushdown --dialect mysql ids --role Accountant --file-type Reguler
+    python -m validation.pushdown --dialect sqlite --sqlite-path local.db --load-exports ../DB/exports recon --types Retur
+"""
+import argparse
+import os
+import sqlite3
+import sys
+from decimal import Decimal
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from validation import engine, recon, schema
+from validation.summary import build_summary
+
+try:
+    import mysql.connector
+except ImportError:  # dialect mysql hanya tersedia jika mysql-connector-python terpasang
+    mysql = None
+
+try:
+    import psycopg
+except ImportError:  # dialect postgres hanya tersedia jika psycopg terpasang
+    psycopg = None
+
+
+BATCH_SIZE = 50_000
+SQLITE_PATH = os.getenv("PUSHDOWN_SQLITE_PATH", "./.cache/pushdown.db")
+REFERENCE_TABLE = "im_purchases_and_return"
+# Tabel sumber per (role, jenis dokumen)
+SOURCE_TABLES = {
+    (engine.SUPPLY_CHAIN, "Reguler"): "beli_reg_sc",
+    (engine.SUPPLY_CHAIN, "Retur"): "beli_retur_sc",
+    (engine.ACCOUNTANT, "Reguler"): "beli_reg_sap",
+    (engine.ACCOUNTANT, "Retur"): "beli_retur_sap",
+}
+# Kolom tabel yang namanya berbeda dari kolom wajib engine; None = tidak ada di tabel
+SOURCE_COLUMNS = {
+    "beli_retur_sc": {"jml_neto": "jml_retur", "tgl_penerimaan": None},
+}
+# Kolom tanggal yang dikonversi ke ISO saat mengisi SQLite dari export CSV
+DATE_COLUMNS = ["posting_date", "document_date", "tgl_penerimaan", "liph_date", "tanggal"]
+MODES = ("all", "discrepant", "count")
+
+# round: pembulatan total ke rupiah, 0.5 menjauhi nol seperti schema.to_rupiah
+# (ROUND pada DOUBLE MySQL / PostgreSQL membulatkan ke genap, jadi dihitung sebagai DECIMAL / NUMERIC)
+DIALECTS = {
+    "mysql": {"quote": "`", "text": "CHAR", "day": "DATE({})", "month": "MONTH({})", "integer": "CAST({} AS SIGNED)",
+              "round": "ROUND(CAST({} AS DECIMAL(65, 30)))"},
+    "postgres": {"quote": '"', "text": "TEXT", "day": "CAST({} AS DATE)", "month": "CAST(EXTRACT(MONTH FROM {}) AS INTEGER)", "integer": "CAST({} AS INTEGER)",
+                 "round": "ROUND(CAST({} AS NUMERIC))"},
+    "sqlite": {"quote": '"', "text": "TEXT", "day": "DATE({})", "month": "CAST(STRFTIME('%m', {}) AS INTEGER)", "integer": "CAST({} AS INTEGER)",
+               "round": "ROUND({})"},
+}
+
+
+def _q(dialect: str, name: str) -> str:
+    quote = DIALECTS[dialect]["quote"]
+    return f"{quote}{name}{quote}"
+
+
+def _column(dialect: str, table: str, name: str) -> str:
+    """Kolom tabel sumber untuk kolom wajib engine, atau NULL jika tabel tidak punya kolom itu."""
+    actual = SOURCE_COLUMNS.get(table, {}).get(name, name)
+    return "NULL" if actual is None else _q(dialect, actual)
+
+
+# --- Validasi per id (engine) ---
+def id_query(dialect: str, role_to_process: str, file_type: str, mode: str = "all",
+             source_table: str = None, reference_table: str = REFERENCE_TABLE) -> str:
+    """
+    SQL validasi per id untuk satu tabel sumber. mode "all" mengembalikan semua id,
+    "discrepant" hanya id berstatus Discrepancy (abs selisih dpp >= batas Rounding),
+    "count" hanya jumlah baris dan jumlah discrepancy.
+    """
+    q = lambda name: _q(dialect, name)
+    # Total dibulatkan sekali setelah SUM, sama dengan engine (lihat validation.schema)
+    rupiah = DIALECTS[dialect]["round"].format
+    table = source_table or SOURCE_TABLES[(role_to_process, file_type)]
+    col = lambda name: _column(dialect, table, name)
+    id_col, val_id_col = engine.ID_COLUMNS[role_to_process]
+
+    if role_to_process == engine.SUPPLY_CHAIN:
+        group_col = col(engine.SC_GROUP_COL[file_type])
+        source = (
+            f"SELECT {group_col} AS {q(id_col)}, {rupiah('COALESCE(SUM(' + col('jml_neto') + '), 0)')} AS {q('target_col_value')}, "
+            f"MIN({col('kode_outlet')}) AS {q('outlet_code')}, MIN({col('tgl_penerimaan')}) AS {q('date')} "
+            f"FROM {q(table)} WHERE {group_col} IS NOT NULL GROUP BY {group_col}"
+        )
+    else:
+        # aggregate_sap tidak mengelompokkan: satu baris per baris SAP
+        source = (
+            f"SELECT {col('doc_id')} AS {q(id_col)}, {col('profit_center')} AS {q('outlet_code')}, "
+            f"{col('posting_date')} AS {q('date')}, {rupiah('ABS(COALESCE(' + col('kredit') + ', 0))')} AS {q('target_col_value')} "
+            f"FROM {q(table)}"
+        )
+    reference = (
+        f"SELECT {q(val_id_col)} AS {q('ref_key')}, {rupiah('SUM(' + q('dpp') + ')')} AS {q('validation_total')}, "
+        f"{rupiah('SUM(' + q('total') + ')')} AS {q('validation_raw_total')} "
+        f"FROM {q(reference_table)} WHERE {q(val_id_col)} IS NOT NULL GROUP BY {q(val_id_col)}"
+    )
+    difference = f"s.{q('target_col_value')} - COALESCE(r.{q('validation_total')}, 0)"
+    discrepant = f"ABS({difference}) >= {engine.DISCREPANCY_BINS[0]}"
+    joined = f"FROM source s LEFT JOIN reference r ON r.{q('ref_key')} = s.{q(id_col)}"
+
+    if mode == "count":
+        select = f"SELECT COUNT(*) AS {q('rows')}, SUM(CASE WHEN {discrepant} THEN 1 ELSE 0 END) AS {q('discrepancy')} {joined}"
+    else:
+        select = (
+            f"SELECT s.{q(id_col)}, s.{q('outlet_code')}, s.{q('date')}, s.{q('target_col_value')}, "
+            f"COALESCE(r.{q('validation_total')}, 0) AS {q('validation_total')}, r.{q('validation_raw_total')}, "
+            f"{difference} AS {q('difference')} {joined}"
+        )
+        if mode == "discrepant":
+            select += f" WHERE {discrepant}"
+    return f"WITH source AS ({source}), reference AS ({reference}) {select}"
+
+
+# --- Rekonsiliasi outlet × periode (recon.SPECS) ---
+def _side_query(dialect: str, side: dict, granularity: str) -> str:
+    q = lambda name: _q(dialect, name)
+    syntax = DIALECTS[dialect]
+    amount = f"COALESCE({q(side['amount'])}, 0)"
+    if side.get("sign") == "negative":
+        amount = f"-ABS({amount})"
+    if "month" in side:
+        period = syntax["integer"].format(q(side["month"]))
+    else:
+        period = syntax["month" if granularity == "month" else "day"].format(q(side["date"]))
+    outlet = f"CAST({q(side['outlet'])} AS {syntax['text']})"
+    return (
+        f"SELECT {outlet} AS {q('outlet')}, {period} AS {q('period')}, {syntax['round'].format(f'SUM({amount})')} AS {q('total')} "
+        f"FROM {q(side['table'])} GROUP BY {outlet}, {period}"
+    )
+
+
+def recon_query(dialect: str, doc_type: str, mode: str = "all") -> str:
+    """
+    SQL rekonsiliasi satu jenis dokumen di recon.SPECS. Full outer join dibentuk
+    dari UNION key kedua sisi (MySQL tidak punya FULL OUTER JOIN).
+    mode "discrepant" hanya mengembalikan baris TIDAK VALID.
+    """
+    q = lambda name: _q(dialect, name)
+    spec = recon.SPECS[doc_type]
+    period_col = recon.PERIOD_COLUMNS[spec["granularity"]]
+    totals = {"sap": f"COALESCE(sap.{q('total')}, 0)", "sc": f"COALESCE(sc.{q('total')}, 0)"}
+    first, second = spec["difference"]
+    on = lambda side: f"{side}.{q('outlet')} = k.{q('outlet')} AND {side}.{q('period')} = k.{q('period')}"
+
+    sql = (
+        f"WITH sap AS ({_side_query(dialect, spec['sap'], spec['granularity'])}), "
+        f"sc AS ({_side_query(dialect, spec['sc'], spec['granularity'])}), "
+        f"k AS (SELECT {q('outlet')}, {q('period')} FROM sap UNION SELECT {q('outlet')}, {q('period')} FROM sc) "
+        f"SELECT k.{q('outlet')}, k.{q('period')} AS {q(period_col)}, "
+        f"sap.{q('total')} AS {q('total_sap')}, sc.{q('total')} AS {q('total_sc')}, "
+        f"CASE WHEN sap.{q('total')} IS NULL THEN 'sc_only' WHEN sc.{q('total')} IS NULL THEN 'sap_only' ELSE 'both' END AS {q('presence')} "
+        f"FROM k LEFT JOIN sap ON {on('sap')} LEFT JOIN sc ON {on('sc')}"
+    )
+    if mode == "discrepant":
+        sql += f" WHERE ABS({totals[first]} - {totals[second]}) >= {recon.TOLERANCE}"
+    return sql
+
+
+# --- Eksekusi ---
+def dialect_of(conn) -> str:
+    """Dialect SQL dari object koneksi DB-API."""
+    module = type(conn).__module__
+    if isinstance(conn, sqlite3.Connection):
+        return "sqlite"
+    if module.startswith("mysql"):
+        return "mysql"
+    if module.startswith("psycopg"):
+        return "postgres"
+    raise ValueError(f"Koneksi tidak dikenal: {type(conn)}")
+
+
+def connect(dialect: str, sqlite_path: str = SQLITE_PATH):
+    """Koneksi ke database sumber. Konfigurasi MySQL sama dengan DB/db.py (DB_*), PostgreSQL lewat PG_*."""
+    load_dotenv()
+    if dialect == "sqlite":
+        os.makedirs(os.path.dirname(os.path.abspath(sqlite_path)), exist_ok=True)
+        return sqlite3.connect(sqlite_path)
+    if dialect == "mysql":
+        if mysql is None:
+            raise ImportError("mysql-connector-python dibutuhkan untuk dialect mysql")
+        return mysql.connector.connect(
+            host=os.getenv("DB_HOST"), user=os.getenv("DB_USER"),
+            password=os.getenv("DB_PASSWORD"), database=os.getenv("DB_DATABASE"),
+        )
+    if psycopg is None:
+        raise ImportError("psycopg dibutuhkan untuk dialect postgres")
+    return psycopg.connect(
+        host=os.getenv("PG_HOST", "localhost"), port=os.getenv("PG_PORT", "9201"),
+        user=os.getenv("PG_USER", "postgres"), password=os.getenv("PG_PASSWORD"), dbname=os.getenv("PG_DATABASE", "postgres"),
+    )
+
+
+def read_query(conn, sql: str, batch_size: int = BATCH_SIZE) -> pd.DataFrame:
+    """Jalankan SQL dan baca hasilnya per batch (fetchmany) menjadi satu DataFrame."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql)
+        columns = [desc[0] for desc in cursor.description]
+        frames = []
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            frames.append(pd.DataFrame.from_records(rows, columns=columns))
+    finally:
+        cursor.close()
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+
+def _to_rupiah(df: pd.DataFrame, columns: list, nullable: list = ()) -> pd.DataFrame:
+    # DECIMAL dari MySQL / PostgreSQL dibaca sebagai Decimal; kolom nullable tetap <NA> jika kosong
+    for col in columns:
+        df[col] = schema.to_rupiah(df[col])
+    for col in nullable:
+        df[col] = pd.to_numeric(df[col], errors="coerce").round().astype("Int64")
+    return df
+
+
+def validate_ids(conn, role_to_process: str, file_type: str, discrepant_only: bool = False, source_table: str = None) -> pd.DataFrame:
+    """result_df dengan kolom id dan engine.RESULT_COLUMNS, dihitung di database."""
+    mode = "discrepant" if discrepant_only else "all"
+    df = read_query(conn, id_query(dialect_of(conn), role_to_process, file_type, mode, source_table))
+    df = schema.compact(_to_rupiah(df, ["target_col_value", "validation_total", "difference"], ["validation_raw_total"]))
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    id_col = engine.ID_COLUMNS[role_to_process][0]
+    return engine.classify(df, id_col)[[id_col] + engine.RESULT_COLUMNS]
+
+
+def count_ids(conn, role_to_process: str, file_type: str, source_table: str = None) -> dict:
+    """Jumlah id dan jumlah discrepancy tanpa mengirim baris hasil."""
+    df = read_query(conn, id_query(dialect_of(conn), role_to_process, file_type, "count", source_table))
+    return {"rows": int(df.iloc[0, 0] or 0), "discrepancy": int(df.iloc[0, 1] or 0)}
+
+
+def reconcile(conn, doc_type: str, discrepant_only: bool = False) -> pd.DataFrame:
+    """Hasil rekonsiliasi outlet × periode (sama dengan recon.reconcile) yang dihitung di database."""
+    spec = recon.SPECS[doc_type]
+    period_col = recon.PERIOD_COLUMNS[spec["granularity"]]
+    df = read_query(conn, recon_query(dialect_of(conn), doc_type, "discrepant" if discrepant_only else "all"))
+    df = _to_rupiah(df, [], ["total_sap", "total_sc"])
+    df["outlet"] = df["outlet"].astype(str)
+    if spec["granularity"] == "day":
+        df[period_col] = pd.to_datetime(df[period_col], errors="coerce")
+    return recon.build_result(df, spec)
+
+
+def load_exports(conn, exports_dir: str, tables: list) -> list:
+    """
+    Isi database lokal (SQLite) dari export DB/export.py sebagai pengganti database
+    sumber. Kolom tanggal disimpan sebagai teks ISO supaya fungsi DATE() bisa dipakai.
+    """
+    loaded = []
+    for table in tables:
+        try:
+            path = recon.find_table(exports_dir, table)
+        except FileNotFoundError:
+            continue
+        df = recon.read_side(path, None)
+        for col in df.columns[df.dtypes == object]:
+            # Kolom DECIMAL dari export Parquet terbaca sebagai Decimal, tipe yang tidak dikenal SQLite
+            values = df[col].dropna()
+            if len(values) and isinstance(values.iloc[0], Decimal):
+                df[col] = pd.to_numeric(df[col])
+        for col in DATE_COLUMNS:
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col], format="mixed", errors="coerce").dt.strftime("%Y-%m-%d %H:%M:%S")
+        df.to_sql(table, conn, if_exists="replace", index=False, chunksize=BATCH_SIZE)
+        loaded.append(table)
+    conn.commit()
+    return loaded
+
+
+def _all_tables() -> list:
+    tables = list(SOURCE_TABLES.values()) + [REFERENCE_TABLE]
+    for spec in recon.SPECS.values():
+        tables += [spec["sap"]["table"], spec["sc"]["table"]]
+    return list(dict.fromkeys(tables))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m validation.pushdown", description="Validasi dengan agregasi dan join di database.")
+    parser.add_argument("--dialect", default="mysql", choices=list(DIALECTS))
+    parser.add_argument("--sqlite-path", default=SQLITE_PATH)
+    parser.add_argument("--load-exports", metavar="DIR", help="Isi database SQLite dari folder export sebelum validasi")
+    parser.add_argument("--output-dir", default=".", help="Folder untuk menyimpan hasil")
+    parser.add_argument("--discrepant-only", action="store_true", help="Hanya kirim baris yang selisih")
+    parser.add_argument("--print-sql", action="store_true", help="Tampilkan SQL tanpa menjalankannya")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ids = commands.add_parser("ids", help="Validasi per id terhadap im_purchases_and_return")
+    ids.add_argument("--role", required=True, choices=[engine.SUPPLY_CHAIN, engine.ACCOUNTANT])
+    ids.add_argument("--file-type", default="Reguler", choices=list(engine.SC_REQUIRED))
+    ids.add_argument("--table", help="Tabel sumber, default dari SOURCE_TABLES")
+    recon_cmd = commands.add_parser("recon", help="Rekonsiliasi SAP vs SC per outlet × periode")
+    recon_cmd.add_argument("--types", nargs="+", default=list(recon.SPECS), choices=list(recon.SPECS))
+    args = parser.parse_args(argv)
+
+    mode = "discrepant" if args.discrepant_only else "all"
+    if args.print_sql:
+        if args.command == "ids":
+            print(id_query(args.dialect, args.role, args.file_type, mode, args.table))
+        else:
+            for doc_type in args.types:
+                print(f"-- {doc_type}\n{recon_query(args.dialect, doc_type, mode)}")
+        return 0
+
+    if args.load_exports and args.dialect != "sqlite":
+        parser.error("--load-exports hanya untuk --dialect sqlite")
+    conn = connect(args.dialect, args.sqlite_path)
+    os.makedirs(args.output_dir, exist_ok=True)
+    exit_code = 0
+    try:
+        if args.load_exports:
+            print(f"✅ SQLite {args.sqlite_path}: {', '.join(load_exports(conn, args.load_exports, _all_tables()))}")
+
+        if args.command == "ids":
+            table = args.table or SOURCE_TABLES[(args.role, args.file_type)]
+            result_df = validate_ids(conn, args.role, args.file_type, args.discrepant_only, table)
+            output_path = os.path.join(args.output_dir, f"{table}_pushdown_validation.csv")
+            result_df.to_csv(output_path, index=False)
+            counts = count_ids(conn, args.role, args.file_type, table) if args.discrepant_only else None
+            if counts is None:
+                build_summary(result_df, engine.ID_COLUMNS[args.role][0]).to_csv(
+                    os.path.join(args.output_dir, f"{table}_pushdown_summary.csv"), index=False
+                )
+                counts = {"rows": len(result_df), "discrepancy": int((result_df['status'] == 'Discrepancy').sum())}
+            print(f"✅ {table}: {counts['rows']} data, {counts['discrepancy']} discrepancy -> {output_path} ({len(result_df)} baris dikirim)")
+        else:
+            for doc_type in args.types:
+                try:
+                    result = reconcile(conn, doc_type, args.discrepant_only)
+                except Exception as e:
+                    print(f"❌ {doc_type}: {e}", file=sys.stderr)
+                    exit_code = 1
+                    continue
+                output_path = os.path.join(args.output_dir, f"validasi_{doc_type.lower()}_pushdown.csv")
+                result.to_csv(output_path, index=False)
+                invalid = (result["status"] == recon.INVALID).sum()
+                print(f"✅ {doc_type}: {len(result)} baris dikirim, {invalid} tidak valid -> {output_path}")
+    finally:
+        conn.close()
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
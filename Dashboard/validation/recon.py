@@ -0,0 +1,218 @@
+"""
+Rekonsiliasi SAP vs SC per outlet × periode untuk data export DB (DB/exports),
+pengganti notebook Validations/validasi_reg, validasi_retur dan validasi_konsi.
+
+Setiap jenis dokumen dijelaskan di SPECS: tabel dan kolom outlet / tanggal /
+nominal tiap sisi, konvensi tanda, granularitas periode dan arah selisih.
+Semua jenis dokumen dijalankan paralel di process pool; setiap worker membaca
+kolom yang dibutuhkan saja dan langsung menulis hasilnya sekali ke output_dir.
+
+Contoh:
+    python -m validation.recon --exports ../DB/exports --output-dir hasil/
+    python -m validation.recon --types Retur Konsinyasi --format csv
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from validation import exports, schema
+from validation.storage import write_result
+
+
+EXPORTS_DIR = os.getenv("EXPORTS_DIR", "../DB/exports")
+TOLERANCE = 1
+VALID, INVALID = "VALID", "TIDAK VALID"
+# Nilai kolom presence, sama dengan indicator pd.merge
+PRESENCE_LABELS = {"both": "both", "left_only": "sap_only", "right_only": "sc_only"}
+TABLE_EXTENSIONS = (".parquet", ".csv", ".csv.gz", ".csv.zst")
+
+# Per sisi: table, outlet, lalu date (dan date_format opsional) atau month jika
+# periode sudah berupa nomor bulan. sign "negative" = nominal dipaksa negatif (-abs).
+# granularity "day" = outlet × tanggal, "month" = outlet × nomor bulan.
+# difference (a, b) = selisih dihitung sebagai total a - total b.
+SPECS = {
+    "Reguler": {
+        "sap": {"table": "beli_reg_sap", "outlet": "profit_center", "date": "posting_date", "amount": "debit"},
+        "sc": {"table": "beli_reg_sc", "outlet": "kode_outlet", "date": "tgl_penerimaan", "amount": "jml_neto"},
+        "granularity": "day",
+        "difference": ("sap", "sc"),
+    },
+    "Retur": {
+        "sap": {"table": "beli_retur_sap", "outlet": "profit_center", "date": "posting_date", "amount": "kredit"},
+        "sc": {"table": "beli_retur_sc", "outlet": "kode_outlet", "month": "bulan", "amount": "jml_retur", "sign": "negative"},
+        "granularity": "month",
+        "difference": ("sap", "sc"),
+    },
+    "Konsinyasi": {
+        "sap": {"table": "beli_konsi_sap", "outlet": "profit_center", "date": "document_date", "amount": "amount"},
+        "sc": {"table": "beli_konsi_sc", "outlet": "kode_outlet", "date": "liph_date", "amount": "total_bayar"},
+        "granularity": "day",
+        "difference": ("sc", "sap"),
+    },
+}
+PERIOD_COLUMNS = {"day": "tanggal", "month": "bulan"}
+
+
+def find_table(exports_dir: str, table: str) -> str:
+    """Path export sebuah tabel: folder dataset incremental, Parquet, atau CSV (gzip / zstd)."""
+    base = os.path.join(exports_dir, table)
+    if exports.is_dataset(base):
+        return base
+    for ext in TABLE_EXTENSIONS:
+        if os.path.exists(base + ext):
+            return base + ext
+    raise FileNotFoundError(f"Export tabel {table} tidak ditemukan di {exports_dir}")
+
+
+def read_side(path: str, columns: list) -> pd.DataFrame:
+    """Baca hanya kolom yang dibutuhkan dari satu export tabel."""
+    if exports.is_dataset(path):
+        return exports.read_dataset(path, columns)
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+def aggregate_side(df: pd.DataFrame, side: dict, granularity: str) -> pd.DataFrame:
+    """Total nominal per (outlet, periode) satu sisi, kolom outlet / periode / total."""
+    period_col = PERIOD_COLUMNS[granularity]
+    amount = schema.to_amount(df[side["amount"]])
+    if side.get("sign") == "negative":
+        amount = -amount.abs()
+
+    if "month" in side:
+        period = pd.to_numeric(df[side["month"]], errors="coerce")
+    else:
+        dates = pd.to_datetime(df[side["date"]], format=side.get("date_format"), errors="coerce")
+        period = dates.dt.month if granularity == "month" else dates.dt.normalize()
+
+    keyed = pd.DataFrame({"outlet": df[side["outlet"]].astype(str).astype("category"), period_col: period, "total": amount})
+    grouped = keyed.groupby(["outlet", period_col], observed=True, sort=False)["total"].sum().reset_index()
+    # Dibulatkan sekali per total, bukan per baris
+    grouped["total"] = schema.to_rupiah(grouped["total"])
+    grouped["outlet"] = grouped["outlet"].astype(str)
+    return grouped
+
+
+def build_result(merged: pd.DataFrame, spec: dict) -> pd.DataFrame:
+    """
+    Hasil rekonsiliasi dari total kedua sisi per (outlet, periode): kolom outlet,
+    periode, total_sap, total_sc (kosong jika sisi itu tidak punya baris) dan
+    presence. Total dan selisih int64 rupiah; outlet, status dan presence
+    categorical. Dipakai juga oleh validation.pushdown untuk hasil join di
+    database.
+    """
+    period_col = PERIOD_COLUMNS[spec["granularity"]]
+    totals = {
+        "sap": merged["total_sap"].fillna(0).to_numpy(dtype=np.int64),
+        "sc": merged["total_sc"].fillna(0).to_numpy(dtype=np.int64),
+    }
+    first, second = spec["difference"]
+    difference = totals[first] - totals[second]
+
+    result = pd.DataFrame({
+        "outlet": merged["outlet"],
+        period_col: merged[period_col],
+        "sap_total": totals["sap"],
+        "sc_total": totals["sc"],
+        "selisih": difference,
+        "status": np.where(np.abs(difference) < TOLERANCE, VALID, INVALID),
+        "presence": merged["presence"],
+    })
+    # Urutan sama dengan notebook: status menurun, lalu outlet dan periode
+    result = result.sort_values(["status", "outlet", period_col], ascending=[False, True, True], ignore_index=True)
+    result["status"] = pd.Categorical(result["status"], categories=[VALID, INVALID])
+    result["presence"] = pd.Categorical(result["presence"], categories=list(PRESENCE_LABELS.values()))
+    return schema.compact(result)
+
+
+def reconcile(sap_agg: pd.DataFrame, sc_agg: pd.DataFrame, spec: dict) -> pd.DataFrame:
+    """
+    Outer join kedua sisi. Sisi yang tidak punya baris untuk (outlet, periode)
+    dihitung 0, sehingga baris yang hanya ada di satu sisi ikut TIDAK VALID
+    (kecuali totalnya di bawah TOLERANCE), dan ditandai di kolom presence.
+    """
+    period_col = PERIOD_COLUMNS[spec["granularity"]]
+    merged = pd.merge(sap_agg, sc_agg, on=["outlet", period_col], how="outer", suffixes=("_sap", "_sc"), indicator="presence")
+    merged["presence"] = merged["presence"].astype(str).map(PRESENCE_LABELS)
+    return build_result(merged, spec)
+
+
+def run_doc_type(doc_type: str, exports_dir: str, output_dir: str, fmt: str) -> dict:
+    """Jalankan satu jenis dokumen dan tulis hasilnya. Dijalankan di worker process pool."""
+    start = time.perf_counter()
+    spec = SPECS[doc_type]
+    aggregates = {}
+    for side_name in ("sap", "sc"):
+        side = spec[side_name]
+        columns = [side["outlet"], side.get("month") or side["date"], side["amount"]]
+        df = read_side(find_table(exports_dir, side["table"]), columns)
+        aggregates[side_name] = aggregate_side(df, side, spec["granularity"])
+        del df
+
+    result = reconcile(aggregates["sap"], aggregates["sc"], spec)
+    output_path = os.path.join(output_dir, f"validasi_{doc_type.lower()}.{fmt}")
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    write_result(result, tmp_path, fmt)
+    os.replace(tmp_path, output_path)
+
+    invalid = result["status"] == INVALID
+    return {
+        "doc_type": doc_type,
+        "rows": len(result),
+        "tidak_valid": int(invalid.sum()),
+        "sap_only": int((result["presence"] == "sap_only").sum()),
+        "sc_only": int((result["presence"] == "sc_only").sum()),
+        "total_selisih": float(result.loc[invalid, "selisih"].abs().sum()),
+        "seconds": round(time.perf_counter() - start, 3),
+        "output": output_path,
+    }
+
+
+def run(doc_types: list, exports_dir: str = EXPORTS_DIR, output_dir: str = ".", fmt: str = "parquet", workers: int = None):
+    """
+    Jalankan beberapa jenis dokumen paralel. Menghasilkan (doc_type, ringkasan, error)
+    per jenis dokumen sesuai urutan selesai; error None jika berhasil.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or len(doc_types)
+    with ProcessPoolExecutor(max_workers=min(workers, len(doc_types))) as pool:
+        futures = {pool.submit(run_doc_type, doc_type, exports_dir, output_dir, fmt): doc_type for doc_type in doc_types}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m validation.recon", description="Rekonsiliasi SAP vs SC per outlet × periode dari export DB.")
+    parser.add_argument("--types", nargs="+", default=list(SPECS), choices=list(SPECS), help="Jenis dokumen yang dijalankan")
+    parser.add_argument("--exports", default=EXPORTS_DIR, help="Folder export DB/export.py")
+    parser.add_argument("--output-dir", default=".", help="Folder untuk menyimpan hasil")
+    parser.add_argument("--format", default="parquet", choices=["parquet", "csv"])
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah worker process (default: satu per jenis dokumen)")
+    args = parser.parse_args(argv)
+
+    exit_code = 0
+    summaries = []
+    for doc_type, summary, error in run(args.types, args.exports, args.output_dir, args.format, args.workers):
+        if error is not None:
+            print(f"❌ {doc_type}: {error}", file=sys.stderr)
+            exit_code = 1
+            continue
+        summaries.append(summary)
+        print(f"✅ {doc_type}: {summary['rows']} outlet × periode, {summary['tidak_valid']} tidak valid "
+              f"({summary['sap_only']} hanya SAP, {summary['sc_only']} hanya SC) -> {summary['output']} [{summary['seconds']} s]")
+    if summaries:
+        pd.DataFrame(summaries).to_csv(os.path.join(args.output_dir, "ringkasan_rekonsiliasi.csv"), index=False)
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,132 @@
+import glob
+import hashlib
+import os
+import threading
+
+import pandas as pd
+
+from validation import exports, schema
+from validation.engine import aggregate_reference
+from validation.id_index import IdIndex
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, tanpa pyarrow tidak ada sidecar parquet
+    pq = None
+
+
+REFERENCE_PATH = "./im_purchases_and_return.csv"
+CACHE_DIR = os.getenv("VALIDATION_CACHE_DIR", "./.cache")
+
+# path -> (version, DataFrame). Dipakai bersama oleh semua session dalam satu proses.
+_REFERENCE_CACHE = {}
+_LOCK = threading.RLock()
+
+
+def reference_version(path: str = REFERENCE_PATH) -> str:
+    """
+    Versi file referensi berdasarkan path, mtime dan ukuran file.
+    Berubah setiap kali file referensi diganti atau schema.SCHEMA_VERSION naik.
+    Untuk folder dataset export incremental (lihat validation.exports) yang
+    dipakai adalah manifest-nya.
+    """
+    stat = os.stat(exports.manifest_path(path) if exports.is_dataset(path) else path)
+    key = f"{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}:{schema.SCHEMA_VERSION}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _sidecar_path(path: str, version: str, suffix: str = "") -> str:
+    name = os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+    return os.path.join(CACHE_DIR, f"{name}.{version}{suffix}.parquet")
+
+
+def _remove_stale_sidecars(path: str, version: str) -> None:
+    name = os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+    for old in glob.glob(os.path.join(CACHE_DIR, f"{name}.*.parquet")):
+        if not os.path.basename(old).startswith(f"{name}.{version}"):
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+def _write_sidecar(df: pd.DataFrame, sidecar: str, index: bool) -> None:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{sidecar}.{os.getpid()}.tmp"
+    df.to_parquet(tmp_path, index=index)
+    os.replace(tmp_path, sidecar)
+
+
+def _parse_reference(path: str) -> pd.DataFrame:
+    df = exports.read_dataset(path) if exports.is_dataset(path) else pd.read_csv(path)
+    # Nominal numerik tanpa pembulatan per baris, kode_outlet categorical, document_id integer
+    return schema.compact(df)
+
+
+def _read_reference(path: str, version: str) -> pd.DataFrame:
+    if pq is None:
+        return _parse_reference(path)
+
+    sidecar = _sidecar_path(path, version)
+    if os.path.exists(sidecar):
+        return pq.read_table(sidecar, memory_map=True).to_pandas()
+
+    df = _parse_reference(path)
+    _write_sidecar(df, sidecar, index=False)
+    _remove_stale_sidecars(path, version)
+    return df
+
+
+def _read_index(path: str, version: str, key_col: str) -> pd.DataFrame:
+    sidecar = _sidecar_path(path, version, f".by_{key_col}")
+    if pq is not None and os.path.exists(sidecar):
+        return pq.read_table(sidecar, memory_map=True).to_pandas()
+
+    index_df = aggregate_reference(load_reference(path), key_col)
+    if pq is not None:
+        _write_sidecar(index_df, sidecar, index=True)
+    return index_df
+
+
+def _cached(cache_key, version: str, builder):
+    cached = _REFERENCE_CACHE.get(cache_key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with _LOCK:
+        cached = _REFERENCE_CACHE.get(cache_key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        value = builder()
+        _REFERENCE_CACHE[cache_key] = (version, value)
+        return value
+
+
+def load_reference(path: str = REFERENCE_PATH) -> pd.DataFrame:
+    """
+    Load file referensi (im_purchases_and_return) sekali per proses.
+
+    Hasil parse disimpan di memory dan di sidecar Parquet pada CACHE_DIR,
+    lalu dipakai ulang sampai mtime / ukuran file berubah. DataFrame yang
+    dikembalikan dipakai bersama oleh semua session: jangan diubah in-place.
+    """
+    version = reference_version(path)
+    return _cached(path, version, lambda: _read_reference(path, version))
+
+
+def load_reference_index(key_col: str, path: str = REFERENCE_PATH) -> pd.DataFrame:
+    """
+    Agregat per key_col ('no_transaksi' atau 'document_id') dari file referensi.
+
+    Dihitung sekali setiap versi file referensi berubah dan disimpan sebagai
+    sidecar Parquet, sehingga validasi cukup melakukan join ke tabel kecil ini
+    tanpa groupby ulang. Sama seperti load_reference(): read-only.
+    """
+    version = reference_version(path)
+    return _cached((path, key_col), version, lambda: _read_index(path, version, key_col))
+
+
+def load_reference_id_index(key_col: str, path: str = REFERENCE_PATH) -> IdIndex:
+    """IdIndex atas kolom key_col file referensi, dibangun sekali per versi file."""
+    version = reference_version(path)
+    return _cached((path, "ids", key_col), version, lambda: IdIndex(load_reference(path), key_col))
@@ -0,0 +1,144 @@
+"""
+Cache LRU (memory + disk) untuk object hasil validasi di MinIO.
+
+Dipakai bersama oleh semua session dalam satu proses Streamlit. Setiap akses
+hanya melakukan stat_object untuk mengecek ETag; download dan parse ulang
+hanya terjadi jika object berubah atau belum pernah di-cache.
+
+Object di-download langsung ke file cache disk (tanpa menyalin seluruh isi ke
+memory). local_path mengembalikan file itu tanpa membaca DataFrame, untuk
+query engine yang membaca file secara langsung (lihat validation.analytics).
+"""
+import glob
+import hashlib
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from validation.reference import CACHE_DIR
+from validation.storage import read_result
+
+
+RESULT_CACHE_DIR = os.path.join(CACHE_DIR, "results")
+RESULT_CACHE_MEMORY_MB = int(os.getenv("RESULT_CACHE_MEMORY_MB", "512"))
+RESULT_CACHE_DISK_MB = int(os.getenv("RESULT_CACHE_DISK_MB", "2048"))
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class ResultCache:
+    """
+    LRU dua tingkat dengan key (bucket, object_name) dan validasi ETag.
+    DataFrame yang dikembalikan dipakai bersama: jangan diubah in-place.
+    """
+
+    def __init__(self, max_memory_bytes: int, max_disk_bytes: int, disk_dir: str = RESULT_CACHE_DIR):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_dir = disk_dir
+        self._memory = OrderedDict()  # (bucket, object_name) -> (etag, df, nbytes)
+        self._memory_bytes = 0
+        self._lock = threading.RLock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    def _disk_path(self, bucket: str, object_name: str, etag: str) -> str:
+        key = hashlib.sha1(f"{bucket}/{object_name}".encode("utf-8")).hexdigest()
+        ext = os.path.splitext(object_name)[1]
+        return os.path.join(self.disk_dir, f"{key}.{etag}{ext}")
+
+    def _remember(self, key, etag: str, df: pd.DataFrame) -> None:
+        nbytes = int(df.memory_usage(deep=True).sum())
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key)[2]
+        if nbytes > self.max_memory_bytes:
+            return
+        self._memory[key] = (etag, df, nbytes)
+        self._memory_bytes += nbytes
+        while self._memory_bytes > self.max_memory_bytes:
+            _, (_, _, old_bytes) = self._memory.popitem(last=False)
+            self._memory_bytes -= old_bytes
+            self.stats["evictions"] += 1
+
+    def _download(self, client, bucket: str, object_name: str, path: str) -> None:
+        os.makedirs(self.disk_dir, exist_ok=True)
+        prefix = os.path.basename(path).split(".")[0]
+        for stale in glob.glob(os.path.join(self.disk_dir, f"{prefix}.*")):
+            _remove(stale)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        obj = client.get_object(bucket, object_name)
+        try:
+            with open(tmp_path, "wb") as file:
+                shutil.copyfileobj(obj, file, 1 << 20)
+        finally:
+            obj.close()
+            obj.release_conn()
+        os.replace(tmp_path, path)
+
+        files = []
+        for cached in glob.glob(os.path.join(self.disk_dir, "*")):
+            try:
+                stat = os.stat(cached)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, cached))
+        total = sum(size for _, size, _ in files)
+        for _, size, old in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            if old != path:
+                total -= size
+                _remove(old)
+
+    def _fetch(self, client, bucket: str, object_name: str, etag: str):
+        """Path file cache disk untuk object versi etag, di-download jika belum ada."""
+        path = self._disk_path(bucket, object_name, etag)
+        if os.path.exists(path):
+            os.utime(path)
+            return path, "disk_hits"
+        self._download(client, bucket, object_name, path)
+        return path, "misses"
+
+    def get(self, client, bucket: str, object_name: str) -> pd.DataFrame:
+        """Hasil validasi dari cache, atau dari MinIO jika belum ada / ETag berubah."""
+        etag = client.stat_object(bucket, object_name).etag
+        key = (bucket, object_name)
+
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None and cached[0] == etag:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return cached[1]
+
+        # Baca disk / download dilakukan di luar lock supaya session lain tidak ikut menunggu
+        path, counter = self._fetch(client, bucket, object_name, etag)
+        df = read_result(path, object_name)
+
+        with self._lock:
+            self.stats[counter] += 1
+            self._remember(key, etag, df)
+        return df
+
+    def local_path(self, client, bucket: str, object_name: str) -> str:
+        """Path file cache disk untuk object terbaru, tanpa membaca isinya ke memory."""
+        etag = client.stat_object(bucket, object_name).etag
+        path, counter = self._fetch(client, bucket, object_name, etag)
+        with self._lock:
+            self.stats[counter] += 1
+        return path
+
+    def info(self) -> dict:
+        """Counter hit / miss dan ukuran cache saat ini."""
+        with self._lock:
+            return {**self.stats, "memory_entries": len(self._memory), "memory_bytes": self._memory_bytes}
+
+
+RESULT_CACHE = ResultCache(RESULT_CACHE_MEMORY_MB * 2**20, RESULT_CACHE_DISK_MB * 2**20)
@@ -0,0 +1,126 @@
+"""
+Skema tipe kolom yang ringkas untuk seluruh pipeline validasi: file upload,
+referensi, hasil validasi dan rekonsiliasi export DB.
+
+- Nominal per baris (jml_neto, kredit, dpp, total, ...) tetap nilai asli
+  (to_amount), nilai kosong / tidak valid menjadi 0. Total hasil penjumlahan
+  baru dibulatkan sekali ke int64 rupiah (to_rupiah), sama seperti ROUND(SUM())
+  di validation.pushdown; selisih antar total int64 jadi eksak.
+- Kode outlet, status dan kategori sebagai categorical.
+- ID dokumen SAP (document_id, doc_id) sebagai integer jika seluruh nilainya
+  angka. Nomor transaksi SC (no_transaksi, no_penerimaan, no_retur) tetap string.
+
+memory_report() mencatat memory footprint per DataFrame.
+"""
+import numpy as np
+import pandas as pd
+
+
+# Naikkan jika tipe kolom berubah: ikut versi referensi, sehingga sidecar
+# Parquet dan hasil validasi tersimpan dibuat ulang dengan skema baru
+SCHEMA_VERSION = "3"
+
+AMOUNT_COLUMNS = ("jml_neto", "jml_retur", "kredit", "debit", "amount", "total_bayar", "dpp", "ppn", "total")
+CATEGORY_COLUMNS = (
+    "kode_outlet", "profit_center", "outlet_code", "outlet",
+    # Kolom deskriptif referensi / SAP dengan sedikit nilai unik
+    "nama_outlet", "nama_bm", "kode_doc_type", "deskripsi_kode_type", "doc_type", "gl_acct_long_text",
+    "status", "Discrepancy_category", "recalculated_status", "recalculated_category", "presence",
+)
+DOC_ID_COLUMNS = ("document_id", "doc_id")
+STATUS_CATEGORIES = ["Matched", "Discrepancy"]
+
+
+def to_amount(values: pd.Series) -> pd.Series:
+    """
+    Nominal per baris sebelum dijumlahkan: int64 jika sudah bilangan bulat, selain
+    itu float64 tanpa pembulatan. Nilai kosong, tidak valid atau tak hingga menjadi 0.
+    """
+    amounts = pd.to_numeric(values, errors="coerce")
+    if pd.api.types.is_integer_dtype(amounts) and not amounts.hasnans:
+        return amounts.astype(np.int64, copy=False)
+    amounts = amounts.to_numpy(dtype="float64", na_value=np.nan)
+    return pd.Series(np.where(np.isfinite(amounts), amounts, 0.0), index=values.index, name=values.name)
+
+
+def to_rupiah(values: pd.Series) -> pd.Series:
+    """
+    Total nominal sebagai int64 rupiah, dibulatkan sekali: 0.5 menjauhi nol seperti
+    ROUND pada DECIMAL di database. Nilai kosong, tidak valid atau tak hingga menjadi 0.
+    """
+    amounts = to_amount(values)
+    if amounts.dtype == np.int64:
+        return amounts
+    amounts = amounts.to_numpy()
+    whole = np.trunc(amounts)
+    rupiah = whole + np.where(np.abs(amounts - whole) >= 0.5, np.sign(amounts), 0)
+    return pd.Series(rupiah.astype(np.int64), index=values.index, name=values.name)
+
+
+def to_doc_id(values: pd.Series) -> pd.Series:
+    """
+    ID dokumen sebagai int64 (Int64 jika ada yang kosong) bila semua nilai yang
+    terisi berupa bilangan bulat. Jika ada yang berupa teks, semua tetap string.
+    """
+    if pd.api.types.is_integer_dtype(values) and not values.hasnans:
+        return values.astype(np.int64, copy=False)
+    filled = values.notna().to_numpy()
+    numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    if np.isfinite(numbers[filled]).all() and (numbers[filled] % 1 == 0).all():
+        if filled.all():
+            return pd.Series(numbers.astype(np.int64), index=values.index, name=values.name)
+        return pd.Series(pd.array(np.where(filled, numbers, 0).astype(np.int64), dtype="Int64"), index=values.index, name=values.name).where(filled)
+    return values.astype(str).mask(values.isna())
+
+
+def to_category(values: pd.Series) -> pd.Series:
+    return values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype("category")
+
+
+def compact(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Terapkan skema ke kolom df yang dikenal (in-place). Kolom lain tidak diubah.
+    Nominal per baris tidak dibulatkan, lihat to_amount.
+    """
+    for col in df.columns:
+        if col in AMOUNT_COLUMNS:
+            df[col] = to_amount(df[col])
+        elif col in CATEGORY_COLUMNS:
+            df[col] = to_category(df[col])
+        elif col in DOC_ID_COLUMNS:
+            df[col] = to_doc_id(df[col])
+    return df
+
+
+def align_keys(keys: pd.Series, index: pd.Index):
+    """
+    Samakan tipe key join dengan index agregat referensi. Jika satu sisi angka
+    dan sisi lain teks (mis. doc_id dari Excel berisi teks), keduanya
+    dibandingkan sebagai string. Mengembalikan (keys, index).
+    """
+    if pd.api.types.is_numeric_dtype(keys) == pd.api.types.is_numeric_dtype(index):
+        return keys, index
+    as_text = lambda values: values.astype(str).where(values.notna().to_numpy())
+    return as_text(keys), pd.Index(as_text(index.to_series()), name=index.name)
+
+
+def memory_bytes(df: pd.DataFrame) -> int:
+    """Memory footprint df termasuk isi string (deep) dan index."""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def memory_report(frames: dict) -> pd.DataFrame:
+    """Footprint per DataFrame ({nama: df}): jumlah baris, kolom, MB dan byte per baris."""
+    records = []
+    for name, df in frames.items():
+        if df is None:
+            continue
+        size = memory_bytes(df)
+        records.append({
+            "frame": name,
+            "rows": len(df),
+            "columns": df.shape[1],
+            "mb": round(size / 2**20, 2),
+            "bytes_per_row": round(size / len(df), 1) if len(df) else 0,
+        })
+    return pd.DataFrame(records, columns=["frame", "rows", "columns", "mb", "bytes_per_row"])
@@ -0,0 +1,261 @@
+"""
+Penyimpanan DataFrame per session (hasil validasi, file upload yang sudah
+di-mapping) dengan batas memory, pengganti menyimpan DataFrame langsung di
+st.session_state.
+
+- Dedup per object: DataFrame yang sama (mis. hasil dari RESULT_CACHE yang
+  dibuka beberapa user, atau frame yang sama di memo upload dan 'sc_df')
+  disimpan dan dihitung sekali.
+- Byte per session dan total proses dicatat. Jika melewati SESSION_MEMORY_MB
+  (per session) atau SESSION_STORE_MEMORY_MB (total), frame yang paling lama
+  tidak dipakai di-spill ke file Arrow lokal dan dibaca ulang ke memory saat
+  dibutuhkan (frame hasil reload adalah salinan biasa, bukan memory-mapped).
+- Session dihapus saat logout (drop_session) atau setelah tidak aktif selama
+  SESSION_TIMEOUT_MINUTES, beserta file spill-nya.
+
+Dipakai bersama oleh semua session dalam satu proses Streamlit. DataFrame yang
+dikembalikan bisa dipakai session lain: jangan diubah in-place.
+"""
+import glob
+import itertools
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import pandas as pd
+
+from validation.reference import CACHE_DIR
+from validation.schema import memory_bytes
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow is optional, tanpa pyarrow frame tidak pernah di-spill
+    pa = None
+
+
+SESSION_STORE_DIR = os.path.join(CACHE_DIR, "sessions")
+SESSION_MEMORY_MB = int(os.getenv("SESSION_MEMORY_MB", "256"))
+SESSION_STORE_MEMORY_MB = int(os.getenv("SESSION_STORE_MEMORY_MB", "1024"))
+SESSION_TIMEOUT_MINUTES = int(os.getenv("SESSION_TIMEOUT_MINUTES", "60"))
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class SessionStore:
+    """
+    Frame disimpan sebagai entry {frame, nbytes, path, names}: frame None berarti
+    sudah di-spill ke path. names berisi (session_id, name) yang menunjuk entry ini.
+    """
+
+    def __init__(self, max_session_bytes: int, max_total_bytes: int, timeout_seconds: float, spill_dir: str = SESSION_STORE_DIR):
+        self.max_session_bytes = max_session_bytes
+        self.max_total_bytes = max_total_bytes
+        self.timeout_seconds = timeout_seconds
+        self.spill_dir = spill_dir
+        self._entries = OrderedDict()  # entry id -> entry, urutan LRU
+        self._by_object = {}           # id(frame) -> entry id, hanya untuk frame yang ada di memory
+        self._sessions = {}            # session_id -> {"names": {name: entry id}, "seen": waktu akses terakhir}
+        self._ids = itertools.count(1)
+        self._resident_bytes = 0
+        self._lock = threading.RLock()
+        self.stats = {"dedup_hits": 0, "spills": 0, "reloads": 0, "expired_sessions": 0}
+        self._remove_orphan_files()
+
+    # --- Spill ke disk ---
+
+    def _remove_orphan_files(self) -> None:
+        """File spill milik proses yang sudah berhenti (mis. setelah restart server)."""
+        for path in glob.glob(os.path.join(self.spill_dir, "*.arrow")):
+            pid = os.path.basename(path).split("-")[0]
+            if pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+                _remove(path)
+
+    def _spill(self, entry_id: int) -> None:
+        entry = self._entries[entry_id]
+        if entry["frame"] is None or pa is None:
+            return
+        if entry["path"] is None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = os.path.join(self.spill_dir, f"{os.getpid()}-{entry_id}.arrow")
+            table = pa.Table.from_pandas(entry["frame"])
+            with pa.OSFile(f"{path}.tmp", "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(f"{path}.tmp", path)
+            entry["path"] = path
+        # File spill tetap disimpan: spill berikutnya cukup melepas frame dari memory
+        self._by_object.pop(id(entry["frame"]), None)
+        entry["frame"] = None
+        self._resident_bytes -= entry["nbytes"]
+        self.stats["spills"] += 1
+
+    def _reload(self, entry: dict) -> pd.DataFrame:
+        """
+        Baca ulang frame dari file spill. to_pandas menyalin isi file ke memory (tipe
+        categorical / int64 tetap sama seperti sebelum spill); memory map hanya
+        menghindari buffer baca tambahan.
+        """
+        with pa.memory_map(entry["path"], "r") as source:
+            frame = pa.ipc.open_file(source).read_all().to_pandas()
+        self.stats["reloads"] += 1
+        return frame
+
+    # --- Akuntansi memory ---
+
+    def _session_bytes(self, session_id: str, resident_only: bool = False) -> int:
+        session = self._sessions.get(session_id)
+        if session is None:
+            return 0
+        entries = (self._entries[entry_id] for entry_id in set(session["names"].values()))
+        return sum(entry["nbytes"] for entry in entries if not resident_only or entry["frame"] is not None)
+
+    def _enforce(self, session_id: str, keep: int) -> None:
+        """Spill entry LRU sampai batas per session dan total terpenuhi. keep tidak di-spill."""
+        if pa is None:
+            return
+        session_entries = set(self._sessions[session_id]["names"].values())
+        for entry_id in list(self._entries):
+            over_session = self._session_bytes(session_id, resident_only=True) > self.max_session_bytes
+            over_total = self._resident_bytes > self.max_total_bytes
+            if not (over_session or over_total):
+                break
+            if entry_id == keep or self._entries[entry_id]["frame"] is None:
+                continue
+            if over_total or entry_id in session_entries:
+                self._spill(entry_id)
+
+    def _release(self, entry_id: int, owner) -> None:
+        entry = self._entries[entry_id]
+        entry["names"].discard(owner)
+        if entry["names"]:
+            return
+        del self._entries[entry_id]
+        if entry["frame"] is not None:
+            self._by_object.pop(id(entry["frame"]), None)
+            self._resident_bytes -= entry["nbytes"]
+        if entry["path"] is not None:
+            _remove(entry["path"])
+
+    def _session(self, session_id: str) -> dict:
+        session = self._sessions.setdefault(session_id, {"names": {}, "seen": 0.0})
+        session["seen"] = time.monotonic()
+        return session
+
+    def _expire(self) -> None:
+        deadline = time.monotonic() - self.timeout_seconds
+        for session_id in [sid for sid, session in self._sessions.items() if session["seen"] < deadline]:
+            self._drop(session_id)
+            self.stats["expired_sessions"] += 1
+
+    def _drop(self, session_id: str) -> None:
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return
+        for name, entry_id in session["names"].items():
+            self._release(entry_id, (session_id, name))
+
+    # --- API ---
+
+    def put(self, session_id: str, name, df: pd.DataFrame) -> None:
+        """Simpan df sebagai name di session. df None menghapus name."""
+        with self._lock:
+            self._expire()
+            session = self._session(session_id)
+            owner = (session_id, name)
+            old = session["names"].pop(name, None)
+            if df is None:
+                if old is not None:
+                    self._release(old, owner)
+                return
+
+            entry_id = self._by_object.get(id(df))
+            if entry_id is not None:
+                if entry_id != old:
+                    self.stats["dedup_hits"] += 1
+            else:
+                entry_id = next(self._ids)
+                nbytes = memory_bytes(df)
+                self._entries[entry_id] = {"frame": df, "nbytes": nbytes, "path": None, "names": set()}
+                self._by_object[id(df)] = entry_id
+                self._resident_bytes += nbytes
+            self._entries[entry_id]["names"].add(owner)
+            self._entries.move_to_end(entry_id)
+            session["names"][name] = entry_id
+            if old is not None and old != entry_id:
+                self._release(old, owner)
+            self._enforce(session_id, keep=entry_id)
+
+    def get(self, session_id: str, name):
+        """DataFrame name di session, dibaca ulang dari file spill jika perlu. None jika tidak ada."""
+        with self._lock:
+            self._expire()
+            if session_id not in self._sessions:
+                return None
+            entry_id = self._session(session_id)["names"].get(name)
+            if entry_id is None:
+                return None
+            entry = self._entries[entry_id]
+            self._entries.move_to_end(entry_id)
+            if entry["frame"] is None:
+                entry["frame"] = self._reload(entry)
+                self._by_object[id(entry["frame"])] = entry_id
+                self._resident_bytes += entry["nbytes"]
+                self._enforce(session_id, keep=entry_id)
+            return entry["frame"]
+
+    def token(self, session_id: str, name):
+        """
+        Id entry untuk name, tetap sama selama frame-nya tidak diganti (termasuk
+        setelah spill / reload). Dipakai sebagai key cache turunan, mis. IdIndex.
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return None if session is None else session["names"].get(name)
+
+    def delete(self, session_id: str, name) -> None:
+        self.put(session_id, name, None)
+
+    def drop_session(self, session_id: str) -> None:
+        """Hapus semua frame session (dipanggil saat logout)."""
+        if session_id is None:
+            return
+        with self._lock:
+            self._drop(session_id)
+
+    def info(self, session_id: str = None) -> dict:
+        """Jumlah session, byte di memory / di disk dan counter spill, opsional byte satu session."""
+        with self._lock:
+            info = {
+                **self.stats,
+                "sessions": len(self._sessions),
+                "entries": len(self._entries),
+                "resident_bytes": self._resident_bytes,
+                "spilled_bytes": sum(e["nbytes"] for e in self._entries.values() if e["frame"] is None),
+            }
+            if session_id is not None:
+                info["session_bytes"] = self._session_bytes(session_id)
+                info["session_resident_bytes"] = self._session_bytes(session_id, resident_only=True)
+            return info
+
+
+SESSION_STORE = SessionStore(SESSION_MEMORY_MB * 2**20, SESSION_STORE_MEMORY_MB * 2**20, SESSION_TIMEOUT_MINUTES * 60)
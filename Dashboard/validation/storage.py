@@ -0,0 +1,101 @@
+"""
+Penyimpanan hasil validasi di MinIO.
+
+Default-nya Parquet terkompresi zstd (dtype tetap terjaga, ukuran jauh lebih
+kecil dari CSV). CSV tetap bisa dipilih lewat RESULT_FORMAT=csv, dan object
+.csv lama tetap bisa dibaca.
+
+Nama object hasil dibentuk dari hash isi file dan parameter validasi
+(result_object_name), sehingga validasi yang identik memakai object yang sama.
+"""
+import hashlib
+import os
+import tempfile
+import uuid
+from io import BytesIO
+
+import pandas as pd
+
+
+RESULT_FORMAT = os.getenv("RESULT_FORMAT", "parquet")
+PART_SIZE = 16 * 1024 * 1024
+SPOOL_MAX_SIZE = 64 * 1024 * 1024
+CONTENT_TYPES = {"parquet": "application/vnd.apache.parquet", "csv": "application/csv"}
+DATE_COLUMNS = ["date", "month"]
+MISSING_OBJECT_CODES = ("NoSuchKey", "NoSuchObject")
+
+
+def write_result(df: pd.DataFrame, file, fmt: str = RESULT_FORMAT) -> None:
+    """Serialisasi result_df satu kali ke file-like."""
+    if fmt == "parquet":
+        df.to_parquet(file, index=False, compression="zstd")
+    elif fmt == "csv":
+        df.to_csv(file, index=False, encoding="utf-8")
+    else:
+        raise ValueError(f"Format hasil tidak dikenal: {fmt}")
+
+
+def upload_result(client, bucket: str, df: pd.DataFrame, fmt: str = RESULT_FORMAT, object_name: str = None) -> str:
+    """
+    Upload result_df ke MinIO dan kembalikan nama object-nya.
+    Data ditulis ke file sementara (di memory sampai SPOOL_MAX_SIZE, lalu ke disk)
+    dan di-stream dengan multipart upload, tanpa menyalin seluruh isi ke bytes.
+    """
+    object_name = object_name or f"{uuid.uuid4()}.{fmt}"
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as file:
+        write_result(df, file, fmt)
+        file.seek(0)
+        client.put_object(bucket, object_name, file, length=-1, part_size=PART_SIZE, content_type=CONTENT_TYPES[fmt])
+    return object_name
+
+
+def result_object_name(content_hash: str, role_to_process: str, file_type: str, reference_version: str, *extra, fmt: str = RESULT_FORMAT) -> str:
+    """
+    Nama object deterministik untuk satu validasi: file yang sama, role, jenis
+    dokumen dan versi referensi yang sama (plus extra, mis. mapping kolom)
+    selalu menghasilkan nama yang sama.
+    """
+    key = "|".join([content_hash, role_to_process, file_type, reference_version, *map(str, extra)])
+    return f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.{fmt}"
+
+
+def result_exists(client, bucket: str, object_name: str) -> bool:
+    """True jika object hasil sudah ada di bucket."""
+    try:
+        client.stat_object(bucket, object_name)
+    except Exception as e:
+        if getattr(e, "code", None) in MISSING_OBJECT_CODES:
+            return False
+        raise
+    return True
+
+
+def summary_object_name(object_name: str) -> str:
+    """Nama object sidecar ringkasan (lihat validation.summary) untuk sebuah object hasil."""
+    stem, ext = os.path.splitext(object_name)
+    return f"{stem}.summary{ext}"
+
+
+def read_result(data, object_name: str, columns: list = None) -> pd.DataFrame:
+    """Baca hasil validasi dari bytes / file-like berdasarkan ekstensi object."""
+    source = BytesIO(data) if isinstance(data, bytes) else data
+    if object_name.endswith(".parquet"):
+        return pd.read_parquet(source, columns=columns)
+
+    # CSV tidak menyimpan tipe data, tanggal dikonversi ulang
+    df = pd.read_csv(source, usecols=columns)
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    return df
+
+
+def load_result(client, bucket: str, object_name: str, columns: list = None) -> pd.DataFrame:
+    """Download object hasil validasi dari MinIO dan baca menjadi DataFrame."""
+    obj = client.get_object(bucket, object_name)
+    try:
+        data = obj.read()
+    finally:
+        obj.close()
+        obj.release_conn()
+    return read_result(data, object_name, columns)
@@ -0,0 +1,82 @@
+"""
+Ringkasan (cube) hasil validasi: outlet x bulan x status x kategori.
+
+Cube dihitung sekali saat validasi dan disimpan sebagai object sidecar di
+sebelah hasil di MinIO, sehingga KPI, tabel bulanan dan grafik di dashboard
+cukup membaca beberapa ribu baris, berapa pun ukuran hasilnya.
+"""
+import numpy as np
+import pandas as pd
+
+from validation.engine import ROUNDING_CATEGORY, VALID_CATEGORY
+
+
+DIMENSIONS = ["outlet_code", "month", "status", "Discrepancy_category", "recalculated_status", "recalculated_category"]
+MEASURES = ["target_col_value", "validation_total", "difference"]
+
+
+def build_summary(result_df: pd.DataFrame, id_col: str) -> pd.DataFrame:
+    """
+    Cube dari result_df (hasil engine.reconcile). Setiap sel berisi jumlah
+    baris, sum MEASURES, dan unique_ids: jumlah id yang pertama kali muncul
+    di sel tersebut, sehingga sum seluruh cube = jumlah id unik di hasil.
+    """
+    keys = result_df[DIMENSIONS[:1] + DIMENSIONS[2:]].assign(
+        month=result_df['date'].to_numpy(dtype='datetime64[ns]').astype('datetime64[M]').astype('datetime64[ns]'),
+    )
+    values = result_df[MEASURES].assign(
+        rows=1,
+        unique_ids=(~result_df[id_col].duplicated() & result_df[id_col].notna()).to_numpy(dtype=np.int64),
+    )
+    cube = pd.concat([keys, values], axis=1).groupby(DIMENSIONS, dropna=False, observed=True, sort=False).sum()
+    return cube.reset_index()
+
+
+def _rows(cube: pd.DataFrame, mask=None) -> int:
+    return int(cube.loc[mask, 'rows'].sum()) if mask is not None else int(cube['rows'].sum())
+
+
+def totals(cube: pd.DataFrame) -> dict:
+    """KPI utama dashboard dari cube."""
+    recalc_discrepancy = cube['recalculated_status'] == 'Discrepancy'
+    return {
+        'total_count': _rows(cube),
+        'discrepancy_count': _rows(cube, cube['status'] == 'Discrepancy'),
+        'recalc_discrepancy_count': _rows(cube, recalc_discrepancy),
+        'unique_ids': int(cube['unique_ids'].sum()),
+        'target_total': cube['target_col_value'].sum(),
+        'validation_total': cube['validation_total'].sum(),
+    }
+
+
+def category_counts(cube: pd.DataFrame) -> pd.DataFrame:
+    """
+    Jumlah baris Discrepancy (hasil perhitungan ulang) per kategori, tanpa 'Valid'.
+    Kolom: Discrepancy_category, count.
+    """
+    recalc = cube[(cube['recalculated_status'] == 'Discrepancy') & (cube['recalculated_category'] != VALID_CATEGORY)]
+    counts = recalc.groupby('recalculated_category', observed=True)['rows'].sum()
+    counts = counts[counts > 0].sort_values(ascending=False)
+    return pd.DataFrame({'Discrepancy_category': counts.index.astype(str), 'count': counts.to_numpy()})
+
+
+def rounding_count(cube: pd.DataFrame) -> int:
+    """Jumlah baris Rounding (< 2k) dari perhitungan 'dpp' dan perhitungan ulang 'total'."""
+    dpp_rounding = _rows(cube, cube['Discrepancy_category'] == ROUNDING_CATEGORY)
+    recalc_rounding = _rows(cube, (cube['status'] == 'Discrepancy') & (cube['recalculated_category'] == ROUNDING_CATEGORY))
+    return dpp_rounding + recalc_rounding
+
+
+def monthly_report(cube: pd.DataFrame) -> pd.DataFrame:
+    """Sum target_col_value dan validation_total per bulan beserta selisihnya, terurut per bulan."""
+    monthly = cube.groupby('month')[['target_col_value', 'validation_total']].sum().sort_index().reset_index()
+    monthly['selisih'] = monthly['target_col_value'] - monthly['validation_total']
+    return monthly
+
+
+def top_outlet(cube: pd.DataFrame):
+    """(outlet_code, jumlah) dengan Discrepancy terbanyak setelah perhitungan ulang, atau (None, 0)."""
+    per_outlet = cube[cube['recalculated_status'] == 'Discrepancy'].groupby('outlet_code', observed=True)['rows'].sum()
+    if per_outlet.empty:
+        return None, 0
+    return per_outlet.idxmax(), int(per_outlet.max())
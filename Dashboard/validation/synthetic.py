@@ -0,0 +1,212 @@
+"""
+Generator data sintetis SC / SAP / referensi dengan skema yang sama seperti
+file upload dan export DB (lihat DB/exports), untuk benchmark dan uji beban.
+
+Contoh:
+    python -m validation.synthetic --role "Supply Chain" --file-type Retur --rows 10000000 --output-dir data/
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from validation.engine import SC_GROUP_COL, SUPPLY_CHAIN
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # tanpa pyarrow hanya bisa menulis CSV
+    pq = None
+
+
+CHUNK_ROWS = 1_000_000
+START_DATE = pd.Timestamp("2025-01-01")
+PPN_RATE = 0.11
+# Rentang selisih per kategori discrepancy (Rounding, Small, Medium, Big)
+NOISE_RANGES = [(1, 2_000), (2_001, 10_000), (10_001, 100_000), (100_001, 5_000_000)]
+DOC_TYPES = {"Reguler": ("Z5", "Pembelian"), "Retur": ("QS", "Retur Pembelian")}
+ID_PREFIX = {"no_penerimaan": "RC", "no_retur": "RE"}
+
+
+def _codes(prefix: str, values: np.ndarray, width: int) -> np.ndarray:
+    return (prefix + pd.Series(values).astype(str).str.zfill(width)).to_numpy(dtype=object)
+
+
+def _noise(rng, docs: int, discrepancy_rate: float) -> np.ndarray:
+    """Selisih per dokumen: 0 untuk dokumen yang sesuai, kategori acak untuk sisanya."""
+    category = rng.integers(0, len(NOISE_RANGES), docs)
+    low = np.array([r[0] for r in NOISE_RANGES])[category]
+    high = np.array([r[1] for r in NOISE_RANGES])[category]
+    amount = rng.integers(low, high + 1) * rng.choice([-1, 1], docs)
+    return np.where(rng.random(docs) < discrepancy_rate, amount, 0)
+
+
+def iter_dataset(role_to_process: str, file_type: str, rows: int, discrepancy_rate: float = 0.1, outlets: int = 500,
+                 lines_per_doc: int = None, duplicate_rate: float = 0.02, missing_rate: float = 0.01, seed: int = 42,
+                 chunk_rows: int = CHUNK_ROWS):
+    """
+    Hasilkan (source_chunk, reference_chunk) per potongan dokumen, sehingga
+    dataset sampai 100M baris bisa ditulis tanpa menyimpan semuanya di memory.
+
+    discrepancy_rate: porsi dokumen yang dpp referensinya berbeda dari sumber.
+    outlets: jumlah kode outlet unik.
+    lines_per_doc: rata-rata baris sumber per dokumen (id duplikat di sumber),
+        default 5 untuk SC dan 1 untuk SAP (doc_id di file SAP unik).
+    duplicate_rate: porsi dokumen yang dpp-nya dipecah ke dua baris referensi (key duplikat).
+    missing_rate: porsi dokumen yang tidak ada di referensi.
+    """
+    rng = np.random.default_rng(seed)
+    lines_per_doc = lines_per_doc or (5 if role_to_process == SUPPLY_CHAIN else 1)
+    total_docs = max(rows // lines_per_doc, 1)
+    chunk_docs = max(chunk_rows // lines_per_doc, 1)
+    outlet_codes = _codes("BX", np.arange(outlets), 3)
+    doc_type, doc_desc = DOC_TYPES[file_type]
+
+    for first_doc in range(0, total_docs, chunk_docs):
+        docs = min(chunk_docs, total_docs - first_doc)
+        chunk_rows_ = rows * (first_doc + docs) // total_docs - rows * first_doc // total_docs
+        doc_numbers = np.arange(first_doc, first_doc + docs)
+        doc_outlet = rng.integers(0, outlets, docs)
+        doc_date = START_DATE + pd.to_timedelta(rng.integers(0, 365, docs), unit="D")
+        document_id = 600_000_000 + doc_numbers
+
+        if lines_per_doc == 1:
+            doc_of_row = np.arange(docs)
+        else:
+            doc_of_row = np.sort(rng.integers(0, docs, chunk_rows_))
+        amount = rng.integers(1_000, 5_000_000, chunk_rows_)
+        if role_to_process == SUPPLY_CHAIN:
+            group_col = SC_GROUP_COL[file_type]
+            doc_codes = _codes(ID_PREFIX[group_col], doc_numbers, 14)
+            qty = rng.integers(1, 50, chunk_rows_)
+            source = pd.DataFrame({
+                'bulan': doc_date.month.to_numpy()[doc_of_row],
+                'kode_outlet': outlet_codes[doc_outlet[doc_of_row]],
+                'no_penerimaan': _codes("RC", doc_numbers, 14)[doc_of_row],
+                'kode_obat': rng.integers(13_000_000, 13_100_000, chunk_rows_),
+                'kode_kreditur': rng.integers(1_000_000_000, 1_000_010_000, chunk_rows_),
+                'qty': qty,
+                'harga_satuan': amount // qty,
+                'jml_neto': amount,
+                'tgl_penerimaan': doc_date[doc_of_row],
+                'is_konsinyasi': rng.random(chunk_rows_) < 0.05,
+            })
+            if group_col != 'no_penerimaan':
+                source.insert(3, group_col, doc_codes[doc_of_row])
+        else:
+            doc_codes = _codes(doc_type + "BX", doc_numbers, 12)
+            source = pd.DataFrame({
+                'profit_center': outlet_codes[doc_outlet[doc_of_row]],
+                'nama_outlet': "KF." + pd.Series(doc_outlet[doc_of_row]).astype(str).str.zfill(4).to_numpy(dtype=object),
+                'posting_date': doc_date[doc_of_row],
+                'account_no': 1107010301,
+                'gl_acct_long_text': "Persediaan Barang Jadi",
+                'doc_id': document_id[doc_of_row],
+                'doc_type': doc_type,
+                'debit': amount,
+                'kredit': amount,
+            })
+
+        # dpp referensi = sum sumber per dokumen + selisih, sebagian dipecah jadi dua baris
+        dpp = np.bincount(doc_of_row, weights=amount, minlength=docs) + _noise(rng, docs, discrepancy_rate)
+        present = rng.random(docs) >= missing_rate
+        split = present & (rng.random(docs) < duplicate_rate)
+        ref_doc = np.concatenate([np.flatnonzero(present), np.flatnonzero(split)])
+        ref_dpp = dpp[ref_doc]
+        ref_dpp[:present.sum()][split[present]] //= 2
+        ref_dpp[present.sum():] = dpp[split] - dpp[split] // 2
+        ppn = np.round(ref_dpp * PPN_RATE)
+        reference = pd.DataFrame({
+            'nama_outlet': "KF." + pd.Series(doc_outlet[ref_doc]).astype(str).str.zfill(4).to_numpy(dtype=object),
+            'kode_outlet': outlet_codes[doc_outlet[ref_doc]],
+            'nama_bm': "UNIT BISNIS SINTETIS",
+            'kode_bm': 8900 + doc_outlet[ref_doc] % 50,
+            'kode_doc_type': doc_type,
+            'deskripsi_kode_type': doc_desc,
+            'dpp': ref_dpp,
+            'ppn': ppn,
+            'total': ref_dpp + ppn,
+            'document_id': document_id[ref_doc],
+            'no_transaksi': doc_codes[ref_doc],
+            'tanggal': doc_date[ref_doc],
+            'no_referensi': _codes(doc_type, doc_numbers[ref_doc], 14),
+        })
+        yield source, reference
+
+
+def make_dataset(role_to_process: str, file_type: str, rows: int, **kwargs):
+    """Dataset lengkap di memory: (source_df, reference_df). Parameter sama dengan iter_dataset."""
+    sources, references = zip(*iter_dataset(role_to_process, file_type, rows, **kwargs))
+    return pd.concat(sources, ignore_index=True), pd.concat(references, ignore_index=True)
+
+
+class _ChunkWriter:
+    """Tulis potongan DataFrame berurutan ke satu file CSV atau Parquet."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._writer = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.path.endswith(".parquet"):
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema, compression="zstd")
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode="a" if self._writer else "w", header=self._writer is None, index=False)
+            self._writer = True
+
+    def close(self) -> None:
+        if self._writer not in (None, True):
+            self._writer.close()
+
+
+def write_dataset(role_to_process: str, file_type: str, rows: int, output_dir: str, fmt: str = "csv", **kwargs):
+    """Tulis dataset per potongan ke output_dir. Mengembalikan (path sumber, path referensi)."""
+    if fmt == "parquet" and pq is None:
+        raise ImportError("pyarrow dibutuhkan untuk menulis Parquet")
+    os.makedirs(output_dir, exist_ok=True)
+    prefix = "sc" if role_to_process == SUPPLY_CHAIN else "sap"
+    source_path = os.path.join(output_dir, f"{prefix}_{file_type.lower()}_{rows}.{fmt}")
+    reference_path = os.path.join(output_dir, f"im_purchases_and_return_{prefix}_{file_type.lower()}_{rows}.{fmt}")
+
+    source_writer, reference_writer = _ChunkWriter(source_path), _ChunkWriter(reference_path)
+    try:
+        for source, reference in iter_dataset(role_to_process, file_type, rows, **kwargs):
+            source_writer.write(source)
+            reference_writer.write(reference)
+    finally:
+        source_writer.close()
+        reference_writer.close()
+    return source_path, reference_path
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m validation.synthetic", description="Generator data SC / SAP / referensi sintetis.")
+    parser.add_argument("--role", default=SUPPLY_CHAIN, choices=[SUPPLY_CHAIN, "Accountant"])
+    parser.add_argument("--file-type", default="Reguler", choices=list(DOC_TYPES))
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Jumlah baris file sumber (10k - 100M)")
+    parser.add_argument("--discrepancy-rate", type=float, default=0.1)
+    parser.add_argument("--outlets", type=int, default=500)
+    parser.add_argument("--lines-per-doc", type=int, default=None, help="Default 5 untuk SC, 1 untuk SAP")
+    parser.add_argument("--duplicate-rate", type=float, default=0.02)
+    parser.add_argument("--missing-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--format", default="csv", choices=["csv", "parquet"])
+    parser.add_argument("--output-dir", default=".")
+    args = parser.parse_args(argv)
+
+    paths = write_dataset(
+        args.role, args.file_type, args.rows, args.output_dir, args.format,
+        discrepancy_rate=args.discrepancy_rate, outlets=args.outlets, lines_per_doc=args.lines_per_doc,
+        duplicate_rate=args.duplicate_rate, missing_rate=args.missing_rate, seed=args.seed,
+    )
+    for path in paths:
+        print(f"✅ {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,113 @@
+"""
+Memo per session untuk file upload di halaman validasi.
+
+Setiap klik widget Streamlit (termasuk selectbox mapping kolom) menjalankan
+ulang seluruh halaman. Hasil parse, konversi tipe dan validasi disimpan di
+UploadMemo dengan key hash isi file (plus sheet, mapping kolom, role dan versi
+referensi), sehingga rerun dengan input yang sama tidak membaca file lagi.
+
+Dengan store (validation.session_store), DataFrame di dalam nilai memo disimpan
+di SESSION_STORE sehingga ikut dibatasi memory-nya dan bisa di-spill ke disk.
+"""
+import os
+from collections import OrderedDict
+
+import pandas as pd
+
+from validation.ingest import content_hash
+
+
+UPLOAD_MEMO_ENTRIES = int(os.getenv("UPLOAD_MEMO_ENTRIES", "8"))
+
+
+def mapping_key(column_map: dict) -> tuple:
+    """Mapping kolom sebagai bagian key memo (urutan kolom tidak berpengaruh)."""
+    return tuple(sorted(column_map.items()))
+
+
+class _Stored:
+    """Penanda DataFrame di dalam nilai memo yang disimpan di store dengan nama name."""
+
+    def __init__(self, name):
+        self.name = name
+
+
+class UploadMemo:
+    """
+    LRU kecil yang disimpan di st.session_state, jadi ikut terhapus saat logout.
+    Nilai yang dikembalikan dipakai ulang antar rerun: jangan diubah in-place.
+    """
+
+    def __init__(self, max_entries: int = UPLOAD_MEMO_ENTRIES, store=None, session_id: str = None):
+        self.max_entries = max_entries
+        self.store = store
+        self.session_id = session_id
+        self._hashes = OrderedDict()  # file_id upload Streamlit -> hash isi file
+        self._values = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def _pack(self, key: tuple, value, path=()):
+        # DataFrame (juga di dalam tuple) dipindah ke store, memo hanya menyimpan namanya
+        if self.store is None:
+            return value
+        if isinstance(value, pd.DataFrame):
+            name = ("memo",) + key + path
+            self.store.put(self.session_id, name, value)
+            return _Stored(name)
+        if isinstance(value, tuple):
+            return tuple(self._pack(key, item, path + (i,)) for i, item in enumerate(value))
+        return value
+
+    def _unpack(self, value):
+        # None jika salah satu DataFrame sudah tidak ada di store (mis. session timeout)
+        if isinstance(value, _Stored):
+            return self.store.get(self.session_id, value.name)
+        if isinstance(value, tuple):
+            items = tuple(self._unpack(item) for item in value)
+            return None if any(item is None for item in items) else items
+        return value
+
+    def _release(self, value) -> None:
+        if isinstance(value, _Stored):
+            self.store.delete(self.session_id, value.name)
+        elif isinstance(value, tuple):
+            for item in value:
+                self._release(item)
+
+    def file_hash(self, upload) -> str:
+        """
+        Hash isi file upload. Dihitung sekali per upload (file_id Streamlit),
+        rerun berikutnya tidak membaca ulang isi file.
+        """
+        file_id = getattr(upload, "file_id", None)
+        if file_id is None:
+            return content_hash(upload)
+        if file_id not in self._hashes:
+            self._hashes[file_id] = content_hash(upload)
+            while len(self._hashes) > self.max_entries:
+                self._hashes.popitem(last=False)
+        return self._hashes[file_id]
+
+    def get(self, key: tuple, builder):
+        """Nilai untuk key, atau hasil builder() jika belum ada. Hasil None tidak disimpan."""
+        if key in self._values:
+            value = self._unpack(self._values[key])
+            if value is not None:
+                self._values.move_to_end(key)
+                self.stats["hits"] += 1
+                return value
+            self._release(self._values.pop(key))
+
+        self.stats["misses"] += 1
+        value = builder()
+        if value is not None:
+            self._values[key] = self._pack(key, value)
+            while len(self._values) > self.max_entries:
+                self._release(self._values.popitem(last=False)[1])
+        return value
+
+    def clear(self) -> None:
+        for value in self._values.values():
+            self._release(value)
+        self._hashes.clear()
+        self._values.clear()
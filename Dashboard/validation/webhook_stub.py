@@ -0,0 +1,160 @@
+"""
+Stub lokal webhook n8n untuk pengujian offline.
+
+    python -m validation.webhook_stub --port 5678 --seed 5000
+
+Endpoint yang disediakan sama dengan workflow n8n: POST /webhook/login,
+GET /webhook/get-process (dengan parameter paging di validation.process_log)
+dan POST /webhook/insert-process. Log disimpan di memory.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+USERS = {
+    "sc_user": ("user123", "Supply Chain"),
+    "acc_user": ("user123", "Accountant"),
+    "admin": ("admin123", "Admin"),
+}
+
+
+class ProcessStore:
+    """Log proses di memory, urutan (uploaded_at, id) seperti di validation.process_log."""
+
+    def __init__(self):
+        self.rows = []
+        self._lock = threading.Lock()
+
+    def insert(self, payload: dict) -> dict:
+        row = {**payload, "uploaded_at": datetime.now().isoformat(timespec="seconds")}
+        row.setdefault("id", f"{uuid.uuid4()}.parquet")
+        with self._lock:
+            self.rows.append(row)
+        return row
+
+    def seed(self, count: int) -> None:
+        start = datetime.now() - timedelta(days=365)
+        roles = ["Supply Chain", "Accountant"]
+        for i in range(count):
+            role = roles[i % 2]
+            score = round(random.uniform(60, 100), 2)
+            with self._lock:
+                self.rows.append({
+                    "id": f"{uuid.uuid4()}.parquet",
+                    "user": f"user_{i % 7}",
+                    "role": role,
+                    "role_to_process": role,
+                    "file_type": random.choice(["Reguler", "Retur"]),
+                    "file_name": f"upload_{i}.csv",
+                    "uploaded_at": (start + timedelta(minutes=105 * i)).isoformat(timespec="seconds"),
+                    "val_score": score,
+                    "val_status": "Valid" if score == 100 else "Invalid",
+                })
+
+    def page(self, params: dict) -> dict:
+        def key(row):
+            return (row["uploaded_at"], str(row["id"]))
+
+        def cursor_key(cursor):
+            uploaded_at, _, row_id = cursor.partition("|")
+            return (datetime.fromisoformat(uploaded_at).isoformat(timespec="seconds"), row_id)
+
+        with self._lock:
+            rows = list(self.rows)
+        if params.get("role"):
+            rows = [row for row in rows if row.get("role") == params["role"]]
+        if params.get("date_from"):
+            rows = [row for row in rows if row["uploaded_at"][:10] >= params["date_from"]]
+        if params.get("date_to"):
+            rows = [row for row in rows if row["uploaded_at"][:10] <= params["date_to"]]
+        if params.get("before"):
+            before = cursor_key(params["before"])
+            rows = [row for row in rows if key(row) < before]
+        if params.get("after"):
+            after = cursor_key(params["after"])
+            rows = [row for row in rows if key(row) > after]
+
+        limit = int(params.get("limit", 200))
+        rows.sort(key=key, reverse=not params.get("after"))
+        items = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = f"{last['uploaded_at']}|{last['id']}"
+        return {"items": items, "next_cursor": next_cursor}
+
+
+def make_handler(store: ProcessStore, delay: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, sama seperti n8n
+        disable_nagle_algorithm = True
+
+        def _send(self, status: int, body) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _json_body(self) -> dict:
+            length = int(self.headers.get("Content-Length", 0))
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self):
+            time.sleep(delay)
+            url = urlparse(self.path)
+            if url.path != "/webhook/get-process":
+                return self._send(404, {"message": "Not Found"})
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            self._send(200, store.page(params))
+
+        def do_POST(self):
+            time.sleep(delay)
+            path = urlparse(self.path).path
+            payload = self._json_body()
+            if path == "/webhook/login":
+                password, role = USERS.get(payload.get("username"), (None, None))
+                if role and payload.get("password") == password:
+                    return self._send(200, {"message": "Login Success", "role": role, "user": payload["username"]})
+                return self._send(200, {"message": "Invalid username or password."})
+            if path == "/webhook/insert-process":
+                return self._send(200, store.insert(payload))
+            self._send(404, {"message": "Not Found"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m validation.webhook_stub", description="Stub lokal webhook n8n.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5678)
+    parser.add_argument("--seed", type=int, default=0, help="Jumlah log proses contoh")
+    parser.add_argument("--delay", type=float, default=0.0, help="Jeda (detik) setiap request, untuk simulasi n8n lambat")
+    args = parser.parse_args(argv)
+
+    store = ProcessStore()
+    store.seed(args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(store, args.delay))
+    print(f"Stub webhook n8n berjalan di http://{args.host}:{args.port}/webhook")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
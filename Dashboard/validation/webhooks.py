@@ -0,0 +1,82 @@
+"""
+Client HTTP bersama untuk webhook n8n (login, get-process, insert-process).
+
+Satu requests.Session per proses dengan connection pool keep-alive, timeout
+connect / read, dan retry dengan backoff. Konfigurasi lewat environment:
+
+    N8N_BASE_URL         default http://localhost:5678/webhook
+    N8N_CONNECT_TIMEOUT  detik, default 3
+    N8N_READ_TIMEOUT     detik, default 10
+    N8N_RETRIES          default 3
+    N8N_BACKOFF          faktor backoff urllib3, default 0.5
+    N8N_POOL_SIZE        koneksi per host, default 10
+
+Untuk pengujian tanpa n8n, jalankan stub lokal: python -m validation.webhook_stub
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+N8N_BASE_URL = os.getenv("N8N_BASE_URL", "http://localhost:5678/webhook").rstrip("/")
+CONNECT_TIMEOUT = float(os.getenv("N8N_CONNECT_TIMEOUT", "3"))
+READ_TIMEOUT = float(os.getenv("N8N_READ_TIMEOUT", "10"))
+RETRIES = int(os.getenv("N8N_RETRIES", "3"))
+BACKOFF = float(os.getenv("N8N_BACKOFF", "0.5"))
+POOL_SIZE = int(os.getenv("N8N_POOL_SIZE", "10"))
+RETRY_STATUS = (429, 502, 503, 504)
+
+_session = None
+_executor = None
+_lock = threading.Lock()
+
+
+def webhook_url(path: str) -> str:
+    return f"{N8N_BASE_URL}/{path.lstrip('/')}"
+
+
+def session() -> requests.Session:
+    """Session bersama (dibuat sekali per proses)."""
+    global _session
+    with _lock:
+        if _session is None:
+            # Error koneksi di-retry untuk semua method; status / read error hanya untuk GET,
+            # supaya POST yang mungkin sudah diproses n8n tidak terkirim dua kali
+            retry = Retry(
+                total=RETRIES,
+                backoff_factor=BACKOFF,
+                status_forcelist=RETRY_STATUS,
+                allowed_methods=frozenset({"GET"}),
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retry)
+            _session = requests.Session()
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def get(path: str, params: dict = None, timeout=None) -> requests.Response:
+    """GET ke webhook, dengan retry. Error koneksi / timeout diteruskan sebagai requests.RequestException."""
+    return session().get(webhook_url(path), params=params, timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT))
+
+
+def post(path: str, payload: dict, timeout=None) -> requests.Response:
+    """POST JSON ke webhook."""
+    return session().post(webhook_url(path), json=payload, timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT))
+
+
+def post_in_background(path: str, payload: dict):
+    """
+    POST JSON di thread latar belakang (fire-and-forget) supaya render halaman
+    tidak menunggu n8n. Mengembalikan Future berisi Response atau exception.
+    """
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="n8n-webhook")
+    return _executor.submit(post, path, payload)
@@ -1,7 +1,59 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import time
 import os
+from io import BytesIO
+
+try:
+    import python_calamine  # engine Excel berbasis Rust, jauh lebih cepat dari openpyxl
+    EXCEL_ENGINE = "calamine"
+except ImportError:  # pandas memilih engine sesuai ekstensi file
+    EXCEL_ENGINE = None
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def read_upload(data: bytes, name: str) -> pd.DataFrame:
+    """Parse file upload sekali per isi file; rerun berikutnya memakai hasil cache."""
+    if name.endswith('.csv'):
+        return pd.read_csv(BytesIO(data))
+    return pd.read_excel(BytesIO(data), engine=EXCEL_ENGINE)
+
+# --- Klasifikasi hasil validasi (vektor, tanpa apply per baris) ---
+STATUS_LABELS = ["VALID", "TIDAK VALID", "MISSING"]
+KATEGORI_LABELS = ["VALID", "Pembulatan (1–9.999)", "Sedang (10rb–999rb)", "Besar (≥1jt)", "MISSING"]
+
+def group_outlet_tanggal(df, outlet_col, date_col, tar_col):
+    """Total nilai target per outlet × tanggal (tanpa jam)."""
+    keyed = pd.DataFrame({
+        'outlet': df[outlet_col],
+        'tanggal': pd.to_datetime(df[date_col]).dt.normalize(),
+        'nilai_target': pd.to_numeric(df[tar_col], errors='coerce').fillna(0),
+    })
+    grouped = keyed.groupby(['outlet', 'tanggal'])['nilai_target'].sum().reset_index()
+    # Total dibulatkan sekali ke int64 rupiah (bukan per baris): selisih antar total eksak
+    grouped['nilai_target'] = grouped['nilai_target'].round().astype('int64')
+    return grouped
+
+def encode_outlets(*grouped):
+    """Kode outlet semua tabel ke kategori yang sama, supaya join dilakukan di atas kode integer."""
+    outlets = pd.Index(pd.concat([g['outlet'] for g in grouped]).astype(str).unique())
+    return [g.assign(outlet=pd.Categorical(g['outlet'].astype(str), categories=outlets)) for g in grouped]
+
+def classify_validasi(validasi, sap_col, sc_col):
+    """Kolom status dan kategori_selisih (categorical). Baris tanpa pasangan di salah satu sisi = MISSING."""
+    missing = (validasi[sap_col].isna() | validasi[sc_col].isna()).to_numpy()
+    abs_selisih = validasi['selisih'].abs().to_numpy()
+    status = np.select([missing, abs_selisih < 1], ["MISSING", "VALID"], "TIDAK VALID")
+    kategori = np.select(
+        [missing, abs_selisih < 1, abs_selisih <= 9_999, abs_selisih <= 999_999],
+        ["MISSING", "VALID", KATEGORI_LABELS[1], KATEGORI_LABELS[2]],
+        KATEGORI_LABELS[3],
+    )
+    return validasi.assign(
+        status=pd.Categorical(status, categories=STATUS_LABELS),
+        kategori_selisih=pd.Categorical(kategori, categories=KATEGORI_LABELS),
+    )
 
 # --- Konfigurasi dan Pengecekan Keamanan ---
 st.set_page_config(
@@ -46,7 +98,7 @@ if st.session_state.get('role') == "Supply Chain":
         if st.session_state.sc_df is not None:
             st.success("File SC Retur sudah dikonfirmasi.")
             if st.button("Ganti File SC", key="replace_sc"):
-                keys_to_reset = ['sc_df', 'sc_outlet_col', 'sc_date_col', 'sc_tar_col', 'validation_triggered', 'validasi']
+                keys_to_reset = ['sc_df', 'sc_outlet_col', 'sc_date_col', 'sc_tar_col', 'validation_triggered', 'validasi', 'validasi_missing']
                 for key in keys_to_reset:
                     if key in st.session_state: del st.session_state[key]
                 st.rerun()
@@ -54,7 +106,7 @@ if st.session_state.get('role') == "Supply Chain":
             sc_file = st.file_uploader("Upload file retur dari Supply Chain", type=["csv", "xlsx"], key="sc_uploader")
             if sc_file:
                 try:
-                    temp_df = pd.read_csv(sc_file) if sc_file.name.endswith('.csv') else pd.read_excel(sc_file)
+                    temp_df = read_upload(sc_file.getvalue(), sc_file.name)
                     st.dataframe(temp_df.head())
                     available_cols = temp_df.columns.tolist()
                     sc_outlet_selection = 'kode_outlet' if 'kode_outlet' in available_cols else st.selectbox("Pilih kolom outlet SC:", available_cols, key="sc_outlet_manual")
@@ -82,7 +134,7 @@ elif st.session_state.get('role') == "Akuntansi":
         if st.session_state.sap_df is not None:
             st.success("File SAP Retur sudah dikonfirmasi.")
             if st.button("Ganti File SAP", key="replace_sap"):
-                keys_to_reset = ['sap_df', 'sap_outlet_col', 'sap_date_col', 'sap_tar_col', 'validation_triggered', 'validasi']
+                keys_to_reset = ['sap_df', 'sap_outlet_col', 'sap_date_col', 'sap_tar_col', 'validation_triggered', 'validasi', 'validasi_missing']
                 for key in keys_to_reset:
                     if key in st.session_state: del st.session_state[key]
                 st.rerun()
@@ -90,7 +142,7 @@ elif st.session_state.get('role') == "Akuntansi":
             sap_file = st.file_uploader("Upload file retur dari SAP", type=["csv", "xlsx"], key="sap_uploader")
             if sap_file:
                 try:
-                    temp_sap = pd.read_csv(sap_file) if sap_file.name.endswith('.csv') else pd.read_excel(sap_file)
+                    temp_sap = read_upload(sap_file.getvalue(), sap_file.name)
                     st.dataframe(temp_sap.head())
                     available_cols = temp_sap.columns.tolist()
                     sap_outlet_selection = 'profit_center' if 'profit_center' in available_cols else st.selectbox("Pilih kolom outlet SAP:", available_cols, key="sap_outlet_manual")
@@ -121,39 +173,27 @@ if st.session_state.sc_df is not None and st.session_state.sap_df is not None:
                 sc_outlet, sc_date, sc_tar = st.session_state.sc_outlet_col, st.session_state.sc_date_col, st.session_state.sc_tar_col
                 sap_outlet, sap_date, sap_tar = st.session_state.sap_outlet_col, st.session_state.sap_date_col, st.session_state.sap_tar_col
 
-                sap_df[sap_date] = pd.to_datetime(sap_df[sap_date])
-                sc_df[sc_date] = pd.to_datetime(sc_df[sc_date])
+                sc_grouped, sap_grouped = encode_outlets(
+                    group_outlet_tanggal(sc_df, sc_outlet, sc_date, sc_tar),
+                    group_outlet_tanggal(sap_df, sap_outlet, sap_date, sap_tar),
+                )
 
-                sc_grouped = sc_df.groupby([sc_outlet, sc_date])[sc_tar].sum().reset_index()
-                sap_grouped = sap_df.groupby([sap_outlet, sap_date])[sap_tar].sum().reset_index()
-
-                # ===== PERBAIKAN BUG DI SINI: Menggunakan .rename() yang lebih aman =====
-                sc_grouped = sc_grouped.rename(columns={sc_outlet: 'outlet', sc_date: 'tanggal', sc_tar: 'nilai_target'})
-                sap_grouped = sap_grouped.rename(columns={sap_outlet: 'outlet', sap_date: 'tanggal', sap_tar: 'nilai_target'})
-                # =======================================================================
-                
                 validasi = pd.merge(sap_grouped, sc_grouped, on=["outlet", "tanggal"], how="outer", suffixes=('_sap', '_sc'))
                 
                 sap_col_name, sc_col_name = 'nilai_target_sap', 'nilai_target_sc'
                 st.session_state['sap_col_suffixed'], st.session_state['sc_col_suffixed'] = sap_col_name, sc_col_name
                 
                 validasi["selisih"] = validasi[sap_col_name].fillna(0) - validasi[sc_col_name].fillna(0)
-
-                def classify_status(row):
-                    if pd.isna(row[sap_col_name]) or pd.isna(row[sc_col_name]): return "MISSING"
-                    elif abs(row['selisih']) < 1: return "VALID"
-                    else: return "TIDAK VALID"
-                validasi["status"] = validasi.apply(classify_status, axis=1)
-                validasi = validasi[validasi["status"] != "MISSING"]
-
-                def kategori_selisih(x):
-                    if pd.isna(x): return "MISSING"
-                    if abs(x) < 1: return "VALID"
-                    elif 1 <= abs(x) <= 9_999: return "Pembulatan (1–9.999)"
-                    elif abs(x) <= 999_999: return "Sedang (10rb–999rb)"
-                    else: return "Besar (≥1jt)"
-                validasi["kategori_selisih"] = validasi["selisih"].apply(kategori_selisih)
+                validasi = classify_validasi(validasi, sap_col_name, sc_col_name)
+
+                # Baris MISSING (hanya ada di SAP atau hanya di SC) dilaporkan terpisah, tidak ikut skor validasi
+                is_missing = (validasi["status"] == "MISSING").to_numpy()
+                validasi_missing = validasi[is_missing].assign(
+                    sumber=np.where(validasi.loc[is_missing, sc_col_name].isna(), "Hanya SAP", "Hanya SC")
+                )
+                validasi = validasi[~is_missing].reset_index(drop=True)
                 st.session_state['validasi'] = validasi
+                st.session_state['validasi_missing'] = validasi_missing.reset_index(drop=True)
 
                 valid_count = (validasi['status'] == 'VALID').sum()
                 total_data = len(validasi)
@@ -167,4 +207,23 @@ if st.session_state.sc_df is not None and st.session_state.sap_df is not None:
                 st.error(f"Terjadi kesalahan saat memproses data: {e}. Pastikan kolom yang dipilih pada langkah 1 sudah benar.")
                 st.session_state.validation_triggered = False # Reset trigger agar tombol bisa ditekan lagi
 else:
-    st.warning("Harap pastikan kedua file (SC dan SAP) sudah dikonfirmasi untuk dapat melanjutkan proses validasi.")
\ No newline at end of file
+    st.warning("Harap pastikan kedua file (SC dan SAP) sudah dikonfirmasi untuk dapat melanjutkan proses validasi.")
+
+# --- Baris MISSING (tidak ikut skor validasi) ---
+validasi_missing = st.session_state.get('validasi_missing')
+if validasi_missing is not None and not validasi_missing.empty:
+    st.subheader("Data Tanpa Pasangan (MISSING)")
+    jumlah_per_sumber = validasi_missing['sumber'].value_counts()
+    st.warning(
+        f"{len(validasi_missing):,} outlet × tanggal hanya ada di salah satu file dan tidak ikut skor validasi: "
+        + ", ".join(f"{sumber} {jumlah:,}" for sumber, jumlah in jumlah_per_sumber.items())
+    )
+    with st.expander("Lihat data MISSING"):
+        kolom_missing = ['sumber', 'outlet', 'tanggal', st.session_state['sap_col_suffixed'], st.session_state['sc_col_suffixed']]
+        st.dataframe(validasi_missing[kolom_missing], use_container_width=True)
+        st.download_button(
+            "📥 Download data MISSING (CSV)",
+            validasi_missing[kolom_missing].to_csv(index=False).encode('utf-8'),
+            file_name="validasi_missing.csv",
+            mime="text/csv",
+        )
\ No newline at end of file